@@ -50,8 +50,10 @@ from .measure import (
     register_task_input_check_func,
 )
 from .measure_record import (
+    RecordIndex,
     RecordReader,
     RecordToFile,
+    RecordToIndexedFile,
     load_best_record,
     load_records,
     save_records,
@@ -19,6 +19,7 @@
 """Cost model based on xgboost"""
 import multiprocessing
 import logging
+import time
 from typing import Dict
 from collections import defaultdict
 
@@ -26,8 +27,13 @@ import numpy as np
 
 from tvm.autotvm.tuner.metric import max_curve
 from .cost_model import PythonBasedModel
-from ..feature import get_per_store_features_from_measure_pairs, get_per_store_features_from_states
+from ..feature import (
+    RaggedFeatures,
+    get_per_store_features_from_measure_pairs,
+    get_per_store_features_from_states,
+)
 from ..measure_record import RecordReader
+from ..workload_registry import workload_key_to_tensors
 
 try:
     from xgboost.callback import TrainingCallback  # type: ignore
@@ -110,6 +116,17 @@ class XGBModel(PythonBasedModel):
     adaptive_training: bool = False
         Whether to use adaptive training, which reduces the training frequency when there are
         too many logs.
+    incremental: bool = False
+        Whether to continue boosting the previous model instead of retraining from scratch.
+        The measurement inputs are not kept in this mode. Only the features and costs of
+        a bounded replay buffer of samples are kept, and a full retraining on the buffer
+        still happens every `refit_interval` updates.
+    refit_interval: int = 8
+        The number of incremental updates between two full retrainings
+    replay_buffer_size: int = 4096
+        The maximum number of samples kept for training in the incremental mode.
+        When the buffer is full, old samples are kept with a probability proportional to
+        their normalized throughput, so the buffer favors the fast programs of every task.
     """
 
     def __init__(
@@ -119,6 +136,9 @@ class XGBModel(PythonBasedModel):
         seed=None,
         model_file=None,
         adaptive_training=False,
+        incremental=False,
+        refit_interval=8,
+        replay_buffer_size=4096,
     ):
         global xgb
         try:
@@ -151,18 +171,34 @@ class XGBModel(PythonBasedModel):
         self.verbose_eval = verbose_eval
         self.model_file = model_file
         self.adaptive_training = adaptive_training
+        self.incremental = incremental
+        self.refit_interval = refit_interval
+        self.replay_buffer_size = replay_buffer_size
 
         super().__init__()
 
         # cache measurement input/result pairs and extracted features
         self.inputs = []
         self.results = []
+        self.num_samples = 0
         self.last_train_length = 0
-        self.inputs_feature_cache = []
+        self.inputs_feature_cache = RaggedFeatures()
+
+        # the replay buffer of the incremental mode
+        self._incremental_ct = 0
+        self._rng = np.random.RandomState(seed or 43)
+        self._replay_features = RaggedFeatures()
+        self._replay_costs = np.empty(0)
+        self._replay_task_ids = np.empty(0, dtype=np.int64)
+        # (workload_key, target) -> task id
+        self._task_keys = {}
+        # the min cost of every task, including the samples dropped from the buffer
+        self._task_min_costs = np.empty(0)
 
     def update(self, inputs, results):
         """Update the cost model according to new measurement results (training data).
-        XGBoost does not support incremental training, so we re-train a new model every time.
+        XGBoost does not support incremental training, so we re-train a new model every time,
+        unless the model is in the incremental mode.
         Parameters
         ----------
         inputs : List[MeasureInput]
@@ -174,38 +210,75 @@ class XGBModel(PythonBasedModel):
             return
         assert len(inputs) == len(results)
 
-        self.inputs.extend(inputs)
-        self.results.extend(results)
+        if self.incremental:
+            n_new = self._update_replay_buffer(inputs, results)
+            if n_new == 0:
+                return
+            self.num_samples += n_new
+        else:
+            self.num_samples += len(inputs)
+            self.inputs.extend(inputs)
+            self.results.extend(results)
 
         if (
             self.adaptive_training
-            and len(self.inputs) - self.last_train_length < self.last_train_length / 5
+            and self.num_samples - self.last_train_length < self.last_train_length / 5
         ):
             # Set a training threshold related to `last_train_length` to reduce the training
             # overhead when there're too many logs
             return
-        self.last_train_length = len(self.inputs)
+        self.last_train_length = self.num_samples
+
+        if self.incremental:
+            costs = self._replay_costs
+            normalized_throughputs = self._task_min_costs[self._replay_task_ids] / costs
+            dtrain = pack_sum_xgbmatrix(
+                self._replay_features,
+                normalized_throughputs,
+                self._replay_task_ids,
+                normalized_throughputs,
+            )
+            if self.bst is not None and self._incremental_ct < self.refit_interval:
+                tic = time.time()
+                self._train(dtrain, num_boost_round=200, xgb_model=self.bst)
+                self._incremental_ct += 1
+                logger.debug(
+                    "XGBModel: Incremental train: %.2f\tbuffer: %d\tobs: %d",
+                    time.time() - tic,
+                    len(costs),
+                    self.num_samples,
+                )
+            else:
+                self._train(dtrain, num_boost_round=10000)
+                self._incremental_ct = 0
+        else:
+            # extract feature
+            n_cached = len(self.inputs_feature_cache)
+            features, normalized_throughputs, task_ids = get_per_store_features_from_measure_pairs(
+                self.inputs, self.results, skip_first_n_feature_extraction=n_cached, ragged=True
+            )
+            # the cache grows in place, the features of old records are not copied again
+            self.inputs_feature_cache.extend(features[n_cached:])
+            dtrain = pack_sum_xgbmatrix(
+                self.inputs_feature_cache, normalized_throughputs, task_ids, normalized_throughputs
+            )
+            self._train(dtrain, num_boost_round=10000)
 
-        # extract feature
-        n_cached = len(self.inputs_feature_cache)
-        features, normalized_throughputs, task_ids = get_per_store_features_from_measure_pairs(
-            self.inputs, self.results, skip_first_n_feature_extraction=n_cached
-        )
-        if n_cached > 0:
-            features = list(features)
-            features[:n_cached] = self.inputs_feature_cache
-            features = np.array(features, dtype=object)
-        self.inputs_feature_cache = features
-        dtrain = pack_sum_xgbmatrix(
-            features, normalized_throughputs, task_ids, normalized_throughputs
-        )
+        # Update the model file if it has been set
+        if self.model_file:
+            self.save(self.model_file)
 
-        # train xgb model
+    def _train(self, dtrain, num_boost_round, xgb_model=None):
+        """Train the xgb model, or continue boosting `xgb_model` if it is not None"""
+        if xgb_model is not None:
+            # reset the early stopping state recorded by the previous training
+            xgb_model.set_attr(best_score=None, best_iteration=None, best_msg=None)
         self.bst = xgb.train(
             self.xgb_params,
             dtrain,
-            num_boost_round=10000,
+            num_boost_round=num_boost_round,
             obj=pack_sum_square_error,
+            xgb_model=xgb_model,
             callbacks=[
                 CustomCallback(
                     stopping_rounds=50,
@@ -218,9 +291,72 @@ class XGBModel(PythonBasedModel):
             ],
         )
 
-        # Update the model file if it has been set
-        if self.model_file:
-            self.save(self.model_file)
+    def _update_replay_buffer(self, inputs, results):
+        """Extract the features of new samples into the replay buffer and drop old samples
+        when the buffer is full. Returns the number of new samples."""
+        # The feature extraction skips the records of tasks that cannot be rebuilt, so they
+        # are dropped here first to match the features with the costs of the other records.
+        registered = {}
+        pairs = []
+        for inp, res in zip(inputs, results):
+            key = inp.task.workload_key
+            if key not in registered:
+                registered[key] = inp.task.compute_dag is not None or _is_registered(key)
+            if registered[key]:
+                pairs.append((inp, res))
+        if len(pairs) < len(inputs):
+            logger.warning(
+                "XGBModel: Skip %d records, their tasks are not registered",
+                len(inputs) - len(pairs),
+            )
+        if not pairs:
+            return 0
+        inputs, results = [x[0] for x in pairs], [x[1] for x in pairs]
+
+        features, _, _ = get_per_store_features_from_measure_pairs(inputs, results, ragged=True)
+        if len(features) != len(inputs):
+            logger.warning("XGBModel: Skip %d records, their features are missing", len(inputs))
+            return 0
+
+        costs = np.array([np.mean([x.value for x in res.costs]) for res in results])
+        task_ids = np.array(
+            [
+                self._task_keys.setdefault(
+                    (inp.task.workload_key, str(inp.task.target)), len(self._task_keys)
+                )
+                for inp in inputs
+            ],
+            dtype=np.int64,
+        )
+        n_tasks = len(self._task_keys)
+        if n_tasks > len(self._task_min_costs):
+            self._task_min_costs = np.append(
+                self._task_min_costs, np.full(n_tasks - len(self._task_min_costs), np.inf)
+            )
+        np.minimum.at(self._task_min_costs, task_ids, costs)
+
+        self._replay_features.extend(features)
+        self._replay_costs = np.concatenate([self._replay_costs, costs])
+        self._replay_task_ids = np.concatenate([self._replay_task_ids, task_ids])
+
+        n_total, n_new = len(self._replay_costs), len(costs)
+        if n_total <= self.replay_buffer_size:
+            return n_new
+        n_old = n_total - n_new
+        n_keep = max(self.replay_buffer_size - n_new, 0)
+        if n_keep == 0:
+            indices = np.arange(n_total - self.replay_buffer_size, n_total)
+        else:
+            # keep old samples with a probability proportional to their normalized throughput,
+            # with a floor so that slow programs are still represented
+            old_task_ids = self._replay_task_ids[:n_old]
+            probs = self._task_min_costs[old_task_ids] / self._replay_costs[:n_old] + 0.05
+            keep = self._rng.choice(n_old, n_keep, replace=False, p=probs / np.sum(probs))
+            indices = np.concatenate([np.sort(keep), np.arange(n_old, n_total)])
+        self._replay_features = self._replay_features.take(indices)
+        self._replay_costs = self._replay_costs[indices]
+        self._replay_task_ids = self._replay_task_ids[indices]
+        return n_new
 
     def predict(self, task, states):
         """Predict the scores of states
@@ -235,18 +371,16 @@ class XGBModel(PythonBasedModel):
         scores: List[float]
             The predicted scores for all states
         """
-        features = get_per_store_features_from_states(states, task)
-        if self.bst is not None and len(self.inputs) > self.num_warmup_sample:
+        features = get_per_store_features_from_states(states, task, ragged=True)
+        if self.bst is not None and self.num_samples > self.num_warmup_sample:
             dtest, pack_ids = feature_to_pack_sum_xgbmatrix(features)
             raw_preds = self.bst.predict(dtest)
-            ret = predict_throughput_pack_sum(raw_preds, pack_ids)
+            ret = predict_throughput_pack_sum(raw_preds, pack_ids, len(states))
         else:
             ret = np.random.uniform(0, 1, (len(states),))
 
         # Predict -inf for invalid states that failed to be lowered.
-        for idx, feature in enumerate(features):
-            if feature.min() == feature.max() == 0:
-                ret[idx] = float("-inf")
+        ret[features.all_zero()] = float("-inf")
 
         return ret
 
@@ -286,26 +420,22 @@ class XGBModel(PythonBasedModel):
         To implement this format, we also store int as float, so we can store all numbers
         into a single float array.
         """
-        features = get_per_store_features_from_states(states, task)
-        if self.bst is not None and len(self.inputs) > self.num_warmup_sample:
+        features = get_per_store_features_from_states(states, task, ragged=True)
+        n_states = len(states)
+        if self.bst is not None and self.num_samples > self.num_warmup_sample:
             dtest, pack_ids = feature_to_pack_sum_xgbmatrix(features)
             raw_preds = self.bst.predict(dtest)
-            breakdown = predict_throughput_pack_sum(raw_preds, pack_ids)
-            stage_scores = [[] for _ in range(len(states))]
-            for pred, pack_id in zip(raw_preds, pack_ids):
-                stage_scores[pack_id].append(pred)
-            for idx, stage_score in enumerate(stage_scores):
-                breakdown = np.append(breakdown, len(stage_score))
-                breakdown = np.concatenate((breakdown, np.array(stage_score)))
+            # scatter the stage scores after the stage count of their state
+            offsets = features.offsets
+            breakdown = np.empty(2 * n_states + len(raw_preds))
+            breakdown[:n_states] = predict_throughput_pack_sum(raw_preds, pack_ids, n_states)
+            breakdown[n_states + np.arange(n_states) + offsets[:-1]] = np.diff(offsets)
+            breakdown[n_states + pack_ids + 1 + np.arange(len(raw_preds))] = raw_preds
         else:
-            breakdown = np.concatenate(
-                (np.random.uniform(0, 1, (len(states),)), np.zeros(len(states)))
-            )
+            breakdown = np.concatenate((np.random.uniform(0, 1, (n_states,)), np.zeros(n_states)))
 
         # Predict 0 for invalid states that failed to be lowered.
-        for idx, feature in enumerate(features):
-            if feature.min() == feature.max() == 0:
-                breakdown[idx] = float("-inf")
+        breakdown[:n_states][features.all_zero()] = float("-inf")
 
         return breakdown
 
@@ -345,35 +475,37 @@ class XGBModel(PythonBasedModel):
         self.num_warmup_sample = -1
 
 
+def _is_registered(workload_key):
+    """Whether the compute of a workload key is registered, i.e. its task can be rebuilt"""
+    try:
+        workload_key_to_tensors(workload_key)
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
 def feature_to_pack_sum_xgbmatrix(xs):
     """Convert an extracted multi-stage feature vector to a xgbmatrx in pack-sum format
     Parameters
     ----------
-    xs: np.ndarray
+    xs: Union[np.ndarray, RaggedFeatures]
         The feature vector
     Returns
     -------
     dmatrix: xgb.DMatrix
         The DMatrix
-    pack_ids: List[int]
+    pack_ids: np.ndarray
         pack ids information
     """
-    x_flatten = []
-    pack_ids = []
-
-    for ct, x in enumerate(xs):
-        for row in x:
-            x_flatten.append(row)
-            pack_ids.append(ct)
-
-    return xgb.DMatrix(np.array(x_flatten)), pack_ids
+    xs = RaggedFeatures.from_list(xs)
+    return xgb.DMatrix(xs.rows), xs.pack_ids()
 
 
 def pack_sum_xgbmatrix(xs, ys, gids=None, weights=None):
     """Convert (feature, label) pairs into a xgb matrix with pack-sum format
     Parameters
     ----------
-    xs: np.ndarray
+    xs: Union[np.ndarray, RaggedFeatures]
         The feature vector
     ys: np.ndarray
         The normaizlied throughput
@@ -386,45 +518,30 @@ def pack_sum_xgbmatrix(xs, ys, gids=None, weights=None):
     dmatrix: xgb.DMatrix
         The DMatrix with pack-sum information
     """
+    xs = RaggedFeatures.from_list(xs)
+    ys = np.asarray(ys)
     if gids is not None:
         # sort by group
-        indices = gids.argsort()
-        xs, ys = xs[indices], ys[indices]
+        indices = gids.argsort(kind="stable")
+        xs, ys = xs.take(indices), ys[indices]
         group_sizes = np.bincount(gids)
         if weights is not None:
-            weights = weights[indices]
+            weights = np.asarray(weights)[indices]
     else:
         # assume it has only one group
         group_sizes = [len(xs)]
 
-    x_flatten = []
-    y_flatten = []
-    weights_flatten = []
-    pack_ids = []
-
-    if weights is not None:
-        for ct, (x, y, w) in enumerate(zip(xs, ys, weights)):
-            for row in x:
-                x_flatten.append(row)
-                y_flatten.append(y)
-                weights_flatten.append(w)
-                pack_ids.append(ct)
-    else:
-        for ct, (x, y) in enumerate(zip(xs, ys)):
-            for row in x:
-                x_flatten.append(row)
-                y_flatten.append(y)
-                pack_ids.append(ct)
-
-    ret = xgb.DMatrix(np.array(x_flatten), y_flatten)
+    # every stage (row) of a program gets the label and weight of the program
+    counts = xs.row_counts()
+    ret = xgb.DMatrix(xs.rows, np.repeat(ys, counts))
     if weights is not None:
-        ret.set_weight(weights_flatten)
-    dmatrix_context.set("pack_ids", ret, np.array(pack_ids))
+        ret.set_weight(np.repeat(weights, counts))
+    dmatrix_context.set("pack_ids", ret, xs.pack_ids())
     dmatrix_context.set("group_sizes", ret, group_sizes)
     return ret
 
 
-def predict_throughput_pack_sum(raw_preds, pack_ids):
+def predict_throughput_pack_sum(raw_preds, pack_ids, n_packs=None):
     """Predict the throughputs for predictions in pack-sum format
     Parameters
     ----------
@@ -432,12 +549,14 @@ def predict_throughput_pack_sum(raw_preds, pack_ids):
         The raw predictions
     pack_ids: List[int]
         The pack id for predictions
+    n_packs: Optional[int]
+        The number of packs, if the last packs may have no predictions
     Returns
     -------
     throughputs: np.ndarray
         The throughput
     """
-    sum_pred = np.bincount(pack_ids, weights=raw_preds)
+    sum_pred = np.bincount(pack_ids, weights=raw_preds, minlength=n_packs or 0)
     return sum_pred
 
 
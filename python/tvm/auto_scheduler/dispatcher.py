@@ -24,6 +24,7 @@ as a schedule configuration here.
 # pylint: disable=invalid-name
 
 import logging
+import os
 import pathlib
 from collections.abc import Iterable
 
@@ -33,7 +34,7 @@ from tvm.contrib.utils import tempdir
 from tvm.tir.expr import FloatImm
 from .cost_model import RandomModel, XGBModel
 from .measure import LocalRPCMeasureContext
-from .measure_record import RecordToFile, load_records
+from .measure_record import RECORD_INDEX_SUFFIX, RecordIndex, RecordToFile, load_records
 from .search_policy import PreloadMeasuredStates, SketchPolicy
 from .search_task import SearchTask, TuningOptions
 from .utils import calc_workload_dis_factor, decode_workload_key
@@ -196,6 +197,7 @@ class ApplyHistoryBest(DispatchContext):
             Collection of tuning records.
             If is str, then it should be the filename of a records log file.
             Each row of this file is an encoded record pair. Otherwise, it is an iterator.
+            If a log file has a :any:`RecordIndex`, only its best records are decoded.
         n_lines: Optional[int]
             if it is not None, only load the first `n_lines` lines of log
         """
@@ -208,8 +210,14 @@ class ApplyHistoryBest(DispatchContext):
                 rec = str(rec)
 
             if isinstance(rec, str):
-                rec = load_records(rec)
-                joint_records += rec
+                if n_lines is None and os.path.isfile(rec + RECORD_INDEX_SUFFIX):
+                    # only decode the best records of the indexed log
+                    index = RecordIndex(rec)
+                    joint_records += index.best_records()
+                    index.close()
+                else:
+                    rec = load_records(rec)
+                    joint_records += rec
             else:
                 if rec is not None:
                     joint_records.append(rec)
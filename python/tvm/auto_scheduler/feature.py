@@ -27,7 +27,6 @@ The feature specification is defined by `src/auto_scheduler/feature.cc::FeatureS
 """
 
 from typing import List, Tuple, Union, Optional, Dict
-import struct
 
 import numpy as np
 
@@ -87,61 +86,214 @@ def unpack_feature(byte_arr: bytearray) -> Tuple[np.ndarray, np.ndarray, np.ndar
     To implement this format, we also store int as float, so we can store all numbers
     into a single float array.
     """
+    features, normalized_throughputs, task_ids = unpack_feature_ragged(byte_arr)
+    data = features.rows.astype("float64")
+    features = [data[features.offsets[i] : features.offsets[i + 1]] for i in range(len(features))]
+    return np.array(features, dtype=object), normalized_throughputs, task_ids
+
+
+def unpack_feature_ragged(byte_arr: bytearray) -> Tuple["RaggedFeatures", np.ndarray, np.ndarray]:
+    """Unpack the flatten feature (in byte array format) from c++ into a ragged array.
+    This is the same as `unpack_feature`, but the whole byte array is parsed with NumPy
+    and the features are returned as a :any:`RaggedFeatures`.
+
+    Parameters
+    ----------
+    byte_arr: bytearray
+        The two-dimensional feature vector in serialized byte array format
+
+    Returns
+    -------
+    features: RaggedFeatures
+        Feature vectors
+    normalized_throughputs: np.ndarray
+        Normalized throughputs
+    task_ids: np.ndarray
+        Task ids
+    """
     vec_len = DEFAULT_FEATURE_VEC_LEN
 
     # unpack sizes
     offset = 0
-    n = struct.unpack_from("1i", byte_arr, offset=offset)[0]
+    n = int(np.frombuffer(byte_arr, dtype=np.int32, count=1, offset=offset)[0])
     offset += SIZE_OF_INT32
 
-    sizes = struct.unpack_from(f"{n + 2}i", byte_arr, offset=offset)
+    sizes = np.frombuffer(byte_arr, dtype=np.int32, count=n + 2, offset=offset).astype(np.int64)
     offset += SIZE_OF_INT32 * (n + 2)
 
-    # unpack features
-    features = []
-    for size in sizes[:-2]:
-        row = []
-
-        # Now, we need to unpack the feature for multiple statements.
-        # The format is:
-        # {
-        #   int   n_stage;                        // The number of stages
-        #   float feature_vecs[n_stage][vec_len]  // The feature vector for each stage
-        # }
-        # where vec_len can be calculated by `(size - 1) / n_stmts`
-
-        if size == 0:
-            # failed during lowering
-            features.append(np.zeros((1, vec_len)))
-        else:
-            n_stmts = struct.unpack_from("f", byte_arr, offset=offset)
-            offset += SIZE_OF_FLOAT32
-
-            n_stmts = int(n_stmts[0] + 0.5)
-            tmp_vec_len = (size - 1) // n_stmts
-            assert (
-                tmp_vec_len == vec_len
-            ), f"The length of feature vector is wrong. Expected {vec_len} but got {tmp_vec_len}."
-            assert tmp_vec_len * n_stmts == size - 1
-            for _ in range(n_stmts):
-                x = struct.unpack_from(f"{vec_len}f", byte_arr, offset=offset)
-                offset += vec_len * SIZE_OF_FLOAT32
-                row.append(x)
-
-            features.append(np.array(row))
+    # unpack features. The feature of a record is
+    # {float n_stage; float feature_vecs[n_stage][vec_len]}
+    # or empty if it failed during lowering, which is unpacked as a row of zeros.
+    feature_sizes = sizes[:n]
+    flat = np.frombuffer(byte_arr, dtype=np.float32, count=int(feature_sizes.sum()), offset=offset)
+    offset += flat.nbytes
+
+    valid = feature_sizes > 0
+    starts = np.cumsum(feature_sizes) - feature_sizes
+    n_stmts = np.ones(n, dtype=np.int64)
+    n_stmts[valid] = (flat[starts[valid]] + 0.5).astype(np.int64)
+    wrong = np.flatnonzero(valid & (feature_sizes - 1 != n_stmts * vec_len))
+    assert len(wrong) == 0, (
+        f"The length of feature vector is wrong. Expected {vec_len} but got "
+        f"{(feature_sizes[wrong[0]] - 1) / n_stmts[wrong[0]]}."
+    )
+
+    header = np.zeros(len(flat), dtype=bool)
+    header[starts[valid]] = True
+    data = np.zeros((int(n_stmts.sum()), vec_len), dtype=np.float32)
+    data[np.repeat(valid, n_stmts)] = flat[~header].reshape(-1, vec_len)
+    features = RaggedFeatures(data, np.concatenate([[0], np.cumsum(n_stmts)]))
 
     # unpack normalized_throughputs
-    m = sizes[-2]
-    normalized_throughputs = struct.unpack_from(f"{m}f", byte_arr, offset=offset)
+    m = int(sizes[-2])
+    normalized_throughputs = np.frombuffer(byte_arr, dtype=np.float32, count=m, offset=offset)
     offset += m * SIZE_OF_FLOAT32
 
     # unpack task_ids
-    m = sizes[-1]
-    task_ids = struct.unpack_from(f"{m}i", byte_arr, offset=offset)
+    m = int(sizes[-1])
+    task_ids = np.frombuffer(byte_arr, dtype=np.int32, count=m, offset=offset)
     offset += m * SIZE_OF_INT32
 
     assert offset == len(byte_arr), f"{offset} vs {len(byte_arr)}"
-    return np.array(features, dtype=object), np.array(normalized_throughputs), np.array(task_ids)
+    return features, normalized_throughputs.astype(np.float64), task_ids.astype(np.int64)
+
+
+class RaggedFeatures:
+    """The per-store features of many records in one contiguous buffer.
+
+    The feature rows of all records are stored in a single float32 matrix, and the rows
+    of record i are `data[offsets[i]:offsets[i + 1]]`. The buffer grows in place
+    when records are appended, so that the features of a growing training set are
+    not copied record by record.
+
+    Parameters
+    ----------
+    data: Optional[np.ndarray]
+        The feature rows of all records, with shape (n_rows, vec_len)
+    offsets: Optional[np.ndarray]
+        The row offsets of the records, with shape (n_records + 1,)
+    vec_len: int
+        The length of a feature vector, if data is not given
+    """
+
+    def __init__(self, data=None, offsets=None, vec_len=DEFAULT_FEATURE_VEC_LEN):
+        if data is None:
+            data = np.empty((0, vec_len), dtype=np.float32)
+            offsets = np.zeros(1, dtype=np.int64)
+        self._data = np.asarray(data, dtype=np.float32)
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+        self._n_records = len(self._offsets) - 1
+
+    @staticmethod
+    def from_list(features):
+        """Build ragged features from a list of 2-D feature arrays
+
+        Parameters
+        ----------
+        features: List[np.ndarray]
+            The feature rows of every record
+
+        Returns
+        -------
+        features: RaggedFeatures
+        """
+        if isinstance(features, RaggedFeatures):
+            return features
+        features = [np.asarray(x, dtype=np.float32) for x in features]
+        if not features:
+            return RaggedFeatures()
+        offsets = np.concatenate([[0], np.cumsum([len(x) for x in features])])
+        return RaggedFeatures(np.concatenate(features), offsets)
+
+    def __len__(self):
+        return self._n_records
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(np.arange(self._n_records)[index])
+        # the buffers are over-allocated, so the index is checked against the records
+        if index < 0:
+            index += self._n_records
+        if not 0 <= index < self._n_records:
+            raise IndexError(f"record index out of range: {index}")
+        return self._data[self._offsets[index] : self._offsets[index + 1]]
+
+    def __iter__(self):
+        for i in range(self._n_records):
+            yield self._data[self._offsets[i] : self._offsets[i + 1]]
+
+    @property
+    def offsets(self):
+        """The row offsets of the records"""
+        return self._offsets[: self._n_records + 1]
+
+    @property
+    def rows(self):
+        """The feature rows of all records"""
+        return self._data[: self._offsets[self._n_records]]
+
+    def row_counts(self):
+        """The number of feature rows (stages) of every record"""
+        return np.diff(self.offsets)
+
+    def pack_ids(self):
+        """The record index of every feature row"""
+        return np.repeat(np.arange(self._n_records), self.row_counts())
+
+    def all_zero(self):
+        """Whether all the features of every record are zero, i.e. it failed to be lowered"""
+        if self._n_records == 0:
+            return np.zeros(0, dtype=bool)
+        nonzero_rows = np.any(self.rows != 0, axis=1).astype(np.int64)
+        return np.add.reduceat(nonzero_rows, self.offsets[:-1]) == 0
+
+    def take(self, indices):
+        """Gather the features of some records
+
+        Parameters
+        ----------
+        indices: np.ndarray
+            The indices of the records
+
+        Returns
+        -------
+        features: RaggedFeatures
+            A copy of the features of the records, in the order of indices
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        counts = self.row_counts()[indices]
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        starts = self.offsets[:-1][indices]
+        rows = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+        return RaggedFeatures(self._data[rows], offsets)
+
+    def extend(self, other):
+        """Append the records of other features in place
+
+        Parameters
+        ----------
+        other: RaggedFeatures or List[np.ndarray]
+            The features to append
+        """
+        other = RaggedFeatures.from_list(other)
+        n_rows, n_new_rows = self._offsets[self._n_records], len(other.rows)
+        n_records = self._n_records + len(other)
+
+        # grow the buffers geometrically, so appending is amortized O(new rows)
+        if n_rows + n_new_rows > len(self._data):
+            data = np.empty(
+                (max(2 * len(self._data), n_rows + n_new_rows), self._data.shape[1]), np.float32
+            )
+            data[:n_rows] = self._data[:n_rows]
+            self._data = data
+        if n_records + 1 > len(self._offsets):
+            offsets = np.empty(max(2 * len(self._offsets), n_records + 1), np.int64)
+            offsets[: self._n_records + 1] = self._offsets[: self._n_records + 1]
+            self._offsets = offsets
+
+        self._data[n_rows : n_rows + n_new_rows] = other.rows
+        self._offsets[self._n_records + 1 : n_records + 1] = other.offsets[1:] + n_rows
+        self._n_records = n_records
 
 
 def get_per_store_features_from_file(
@@ -178,7 +330,8 @@ def get_per_store_features_from_measure_pairs(
     results: List[MeasureResult],
     skip_first_n_feature_extraction: int = 0,
     max_n_bufs: Optional[int] = None,
-) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    ragged: bool = False,
+) -> Tuple[Union[np.ndarray, RaggedFeatures], np.ndarray, np.ndarray]:
     """Get per-store features from measurement input/result pairs
 
     Parameters
@@ -191,10 +344,12 @@ def get_per_store_features_from_measure_pairs(
         Skip feature extraction for the first n states
     max_n_bufs: int
         The maximum number of extracted buffers for one statement
+    ragged: bool
+        Whether to return the features as a RaggedFeatures instead of an object array
 
     Returns
     -------
-    features: np.ndarray
+    features: Union[np.ndarray, RaggedFeatures]
         Feature vectors
     normalized_throughputs: np.ndarray
         Normalized throughputs
@@ -204,12 +359,15 @@ def get_per_store_features_from_measure_pairs(
     byte_arr = _ffi_api.GetPerStoreFeaturesFromMeasurePairs(
         inputs, results, skip_first_n_feature_extraction, max_n_bufs or DEFAULT_MAX_N_BUFS
     )
-    return unpack_feature(byte_arr)
+    return unpack_feature_ragged(byte_arr) if ragged else unpack_feature(byte_arr)
 
 
 def get_per_store_features_from_states(
-    states: List[Union[State, StateObject]], task: "SearchTask", max_n_bufs: Optional[int] = None
-) -> np.ndarray:
+    states: List[Union[State, StateObject]],
+    task: "SearchTask",
+    max_n_bufs: Optional[int] = None,
+    ragged: bool = False,
+) -> Union[np.ndarray, RaggedFeatures]:
     """Get per-store features from measurement input/result pairs
 
     Parameters
@@ -220,10 +378,12 @@ def get_per_store_features_from_states(
         The search task of the input states
     max_n_bufs: Optional[int]
         The maximum number of extracted buffers for one statement
+    ragged: bool
+        Whether to return the features as a RaggedFeatures instead of an object array
 
     Returns
     -------
-    features: np.ndarray
+    features: Union[np.ndarray, RaggedFeatures]
         Feature vectors
     """
     if isinstance(states[0], State):
@@ -233,6 +393,8 @@ def get_per_store_features_from_states(
     byte_arr = _ffi_api.GetPerStoreFeaturesFromStates(
         state_objects, task, max_n_bufs or DEFAULT_MAX_N_BUFS
     )
+    if ragged:
+        return unpack_feature_ragged(byte_arr)[0]
     return unpack_feature(byte_arr)[0]
 
 
@@ -18,20 +18,35 @@
 
 """ Serialization and other I/O support for measurement records (tuning logs). """
 import argparse
+import hashlib
+import json
 import logging
 import os
 import itertools
+import sqlite3
+import tempfile
+import threading
 
 import numpy as np
 
 import tvm._ffi
+from tvm.contrib.popen_pool import PopenPoolExecutor
 from tvm.runtime import Object
-from .measure import MeasureErrorNo, MeasureCallback
+from tvm.target import Target
+from .measure import MeasureErrorNo, MeasureCallback, PythonBasedMeasureCallback
 from .utils import calc_workload_dis_factor, decode_workload_key
 from . import _ffi_api
 
 logger = logging.getLogger("auto_scheduler")
 
+# The suffix of the offset index file of a log file
+RECORD_INDEX_SUFFIX = ".index.sqlite"
+
+# The number of leading bytes of a log file checked to detect rewritten files
+RECORD_INDEX_HEAD_BYTES = 4096
+
+_RECORD_DECODER = json.JSONDecoder()
+
 
 @tvm._ffi.register_object("auto_scheduler.RecordToFile")
 class RecordToFile(MeasureCallback):
@@ -134,6 +149,271 @@ class RecordReader(Object):
             yield ret[0], ret[1]  # (input, result)
 
 
+def _decode_record_key(line):
+    """Decode the search task and the measure result of a record line,
+    without decoding the state in between."""
+    try:
+        # the quoted keys cannot appear inside the strings of the state, whose quotes are escaped
+        start = line.index("[", line.index("[", line.index('"i":')) + 1)
+        task, _ = _RECORD_DECODER.raw_decode(line, start)
+        start = line.index("[", line.rindex('"r":'))
+        result, _ = _RECORD_DECODER.raw_decode(line, start)
+    except ValueError:
+        record = json.loads(line)
+        task, result = record["i"][0], record["r"]
+    return task, result
+
+
+def _file_head_digest(f, size):
+    f.seek(0)
+    return hashlib.sha1(f.read(min(size, RECORD_INDEX_HEAD_BYTES))).hexdigest()
+
+
+class RecordIndex(object):
+    """
+    An on-disk offset index of a log file.
+
+    The index is a SQLite file that saves the byte offset, workload key, target and cost
+    of every valid record, keyed by target keys and workload hash. The best records of
+    a workload are then found without deserializing the states of the whole log, and only
+    the matching lines are decoded. The index is updated incrementally from the end of
+    the indexed part of the log, so it catches up with records appended by any writer,
+    and it is rebuilt if the log file is rewritten. Several processes can share an index.
+
+    Parameters
+    ----------
+    filename : str
+        File name of the log file.
+    index_file : Optional[str]
+        File name of the index. Defaults to the log file name with `RECORD_INDEX_SUFFIX`.
+    """
+
+    def __init__(self, filename, index_file=None):
+        self.filename = os.fsdecode(filename)
+        self.index_file = index_file or self.filename + RECORD_INDEX_SUFFIX
+        # transactions are managed explicitly, so an update holds the write lock throughout.
+        # The connection may be used by measure callbacks running in other threads.
+        self.db = sqlite3.connect(
+            self.index_file, timeout=600, isolation_level=None, check_same_thread=False
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS records (offset INTEGER PRIMARY KEY, length INTEGER, "
+            "seq INTEGER, workload_hash TEXT, workload_key TEXT, target TEXT, "
+            "target_kind TEXT, model TEXT, cost REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS records_workload ON records (workload_hash)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS target_keys (target_key TEXT, workload_hash TEXT, "
+            "offset INTEGER)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS target_keys_workload "
+            "ON target_keys (target_key, workload_hash)"
+        )
+        # target string -> (target keys, target kind, model)
+        self._targets = {}
+        self.update()
+
+    def _parse_target(self, target):
+        if target not in self._targets:
+            parsed = Target(target)
+            self._targets[target] = (
+                [str(k) for k in parsed.keys],
+                parsed.kind.name,
+                str(parsed.model),
+            )
+        return self._targets[target]
+
+    def update(self):
+        """Index the records appended to the log file since the last update.
+
+        Returns
+        -------
+        n_records : int
+            The number of newly indexed records.
+        """
+        if not os.path.isfile(self.filename):
+            return 0
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            n_records = self._update()
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        if n_records:
+            logger.debug("Indexed %d records of %s", n_records, self.filename)
+        return n_records
+
+    def _update(self):
+        meta = dict(self.db.execute("SELECT key, value FROM meta"))
+        size, seq = meta.get("size", 0), meta.get("n_records", 0)
+        n_old = seq
+
+        with open(self.filename, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            if size and (file_size < size or _file_head_digest(f, size) != meta.get("head")):
+                logger.info("%s has been rewritten, rebuild its index", self.filename)
+                self.db.execute("DELETE FROM records")
+                self.db.execute("DELETE FROM target_keys")
+                size, seq, n_old = 0, 0, 0
+
+            f.seek(size)
+            records, keys = [], []
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # an incomplete line that is being appended
+                    break
+                offset = size
+                size += len(line)
+                line = line.rstrip(b"\r\n")
+                length = len(line)
+                line = line.decode()
+                # skip comment lines begin with '#' or ' ' as RecordReader does
+                if not line or line[0] in "# ":
+                    continue
+                seq += 1
+
+                task, result = _decode_record_key(line)
+                if result[1] != MeasureErrorNo.NO_ERROR:
+                    continue
+                workload_key, target = task[0], task[1]
+                workload_hash = decode_workload_key(workload_key)[0]
+                target_keys, target_kind, model = self._parse_target(target)
+                records.append(
+                    (
+                        offset,
+                        length,
+                        seq - 1,
+                        workload_hash,
+                        workload_key,
+                        target,
+                        target_kind,
+                        model,
+                        float(np.mean(result[0])),
+                    )
+                )
+                keys.extend((k, workload_hash, offset) for k in target_keys)
+                if len(records) >= 10000:
+                    self._insert(records, keys)
+                    records, keys = [], []
+            self._insert(records, keys)
+
+            self.db.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                [("size", size), ("n_records", seq), ("head", _file_head_digest(f, size))],
+            )
+        return seq - n_old
+
+    def _insert(self, records, keys):
+        self.db.executemany("INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", records)
+        self.db.executemany("INSERT INTO target_keys VALUES (?, ?, ?)", keys)
+
+    def read_records(self, offsets):
+        """Decode the records at some offsets of the log file.
+
+        Parameters
+        ----------
+        offsets : List[Tuple[int, int]]
+            The offsets and lengths of the records.
+
+        Returns
+        -------
+        records : List[Tuple[MeasureInput, MeasureResult]]
+            The decoded records.
+        """
+        ret = []
+        with open(self.filename, "rb") as f:
+            for offset, length in offsets:
+                f.seek(offset)
+                ret.append(tuple(load_record_from_string(f.read(length).decode())))
+        return ret
+
+    def load_best(self, workload_key=None, target=None, include_compatible=False):
+        """Return the best measurement pair of the log file.
+        This is the indexed version of :any:`load_best_record`, see it for the parameters.
+        """
+        query = "SELECT offset, length, workload_key, target_kind, cost FROM records"
+        params = []
+        if workload_key is not None:
+            query += " WHERE workload_hash = ?"
+            params.append(decode_workload_key(workload_key)[0])
+        rows = self.db.execute(query + " ORDER BY offset", params)
+
+        best_cost = 1e30
+        best = None
+        for offset, length, rec_workload_key, target_kind, cost in rows:
+            if target and target_kind != target.kind.name:
+                continue
+            if workload_key is not None:
+                dis_f = calc_workload_dis_factor(
+                    decode_workload_key(workload_key), decode_workload_key(rec_workload_key)
+                )
+                if dis_f == float("inf"):
+                    continue
+                if not include_compatible and dis_f != 1:
+                    continue
+                cost *= dis_f
+
+            if cost < best_cost:
+                best_cost = cost
+                best = (offset, length)
+
+        if best is None:
+            return None, None
+        return self.read_records([best])[0]
+
+    def best_records(self):
+        """Decode the best records of every workload for each target key and target model.
+
+        Returns
+        -------
+        records : List[Tuple[MeasureInput, MeasureResult]]
+            The best records, in the order of the log file.
+        """
+        offsets = set()
+        for query in [
+            "SELECT offset, length, MIN(cost) FROM records JOIN target_keys USING (offset) "
+            "GROUP BY target_key, workload_key",
+            "SELECT offset, length, MIN(cost) FROM records WHERE model != 'unknown' "
+            "GROUP BY model, workload_key",
+        ]:
+            offsets.update((offset, length) for offset, length, _ in self.db.execute(query))
+        return self.read_records(sorted(offsets))
+
+    def close(self):
+        """Close the index file."""
+        self.db.close()
+
+
+class RecordToIndexedFile(PythonBasedMeasureCallback):
+    """
+    A measurement callback that appends measurement records to a file and updates
+    its :any:`RecordIndex`, so the best records can be loaded without decoding the whole file.
+
+    Parameters
+    ----------
+    filename : str
+        File name for this callback to write log to.
+    """
+
+    def __init__(self, filename):
+        dirname = os.path.dirname(os.path.abspath(filename))
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+        self.filename = filename
+        self.index = RecordIndex(filename)
+        # the callback can be called by the measurers of tasks tuned in different threads
+        self.lock = threading.Lock()
+        super(RecordToIndexedFile, self).__init__()
+
+    def callback(self, policy, inputs, results):
+        with self.lock:
+            save_records(self.filename, inputs, results)
+            self.index.update()
+
+
 def load_record_from_string(record):
     """
     Load the measure record from string.
@@ -216,6 +496,7 @@ def save_records(filename, inputs, results):
 def load_best_record(filename, workload_key=None, target=None, include_compatible=False):
     """Return the best measurement pair form a log file. This may return none results if
     there is no legal measure pair with the specified workload_key/target found from the log file.
+    If the log file has a :any:`RecordIndex`, only the best line is decoded.
 
     Parameters
     ----------
@@ -237,6 +518,13 @@ def load_best_record(filename, workload_key=None, target=None, include_compatibl
     result : auto_scheduler.measure.MeasureResult
         The best State's MeasureResult from this log fine.
     """
+    if os.path.isfile(filename + RECORD_INDEX_SUFFIX):
+        index = RecordIndex(filename)
+        try:
+            return index.load_best(workload_key, target, include_compatible)
+        finally:
+            index.close()
+
     log_reader = RecordReader(filename)
     best_cost = 1e30
     best_inp = None
@@ -272,95 +560,195 @@ def load_best_record(filename, workload_key=None, target=None, include_compatibl
     return best_inp, best_res
 
 
-def distill_record_file(in_file, out_file):
+def _distill_chunk(file_idx, filename, start, end):
+    """Find the best records of the lines that start in a byte range of a log file.
+
+    Returns
+    -------
+    best: Dict[Tuple[str, str, Tuple], Tuple[float, int, int, int]]
+        (target key, workload hash, workload args) -> (cost, file index, offset, length)
+    """
+    best = {}
+    # target string -> target keys
+    targets = {}
+    with open(filename, "rb") as f:
+        if start > 0:
+            # skip the line started in the previous range
+            f.seek(start - 1)
+            f.readline()
+        offset = f.tell()
+        while offset < end:
+            line = f.readline()
+            if not line:
+                break
+            line_offset = offset
+            offset += len(line)
+            line = line.rstrip(b"\r\n")
+            text = line.decode()
+            # skip comment lines begin with '#' or ' ' as RecordReader does
+            if not text or text[0] in "# ":
+                continue
+
+            task, result = _decode_record_key(text)
+            if result[1] != MeasureErrorNo.NO_ERROR:
+                continue
+            cost = float(np.mean(result[0]))
+            if task[1] not in targets:
+                targets[task[1]] = [str(k) for k in Target(task[1]).keys]
+            workload_hash, workload_args = decode_workload_key(task[0])
+            for k in targets[task[1]]:
+                key = (k, workload_hash, workload_args)
+                if key not in best or cost < best[key][0]:
+                    best[key] = (cost, file_idx, line_offset, len(line))
+    return best
+
+
+def _distill_records(in_files, out_file, n_parallel=None, chunk_size=64 << 20):
+    """Keep the best record of each target key and workload of the log files in out_file.
+    Return the number of saved records."""
+    chunks = []
+    for file_idx, filename in enumerate(in_files):
+        size = os.path.getsize(filename)
+        chunks.extend(
+            (file_idx, filename, start, min(start + chunk_size, size))
+            for start in range(0, size, chunk_size)
+        )
+
+    pool = None
+    if n_parallel == 1 or len(chunks) <= 1:
+        chunk_bests = (_distill_chunk(*chunk) for chunk in chunks)
+    else:
+        pool = PopenPoolExecutor(max_workers=min(n_parallel or os.cpu_count(), len(chunks)))
+        futures = [pool.submit(_distill_chunk, *chunk) for chunk in chunks]
+        chunk_bests = (future.result() for future in futures)
+
+    # reduce in the order of the chunks, so the first of the records with equal costs is kept
+    best = {}
+    try:
+        for chunk_best in chunk_bests:
+            for key, value in chunk_best.items():
+                if key not in best or value[0] < best[key][0]:
+                    best[key] = value
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # a record can be the best of multiple target keys
+    winners = sorted({(file_idx, offset, length) for _, file_idx, offset, length in best.values()})
+
+    # copy the raw lines of the best records, the output may also be one of the inputs
+    dirname = os.path.dirname(os.path.abspath(out_file))
+    if not os.path.exists(dirname):
+        os.makedirs(dirname)
+    if os.path.isfile(out_file):
+        mode = os.stat(out_file).st_mode & 0o7777
+    else:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    tmp_fd, tmp_name = tempfile.mkstemp(prefix=".tmp_", dir=dirname)
+    try:
+        with os.fdopen(tmp_fd, "wb") as fout:
+            for file_idx, group in itertools.groupby(winners, key=lambda x: x[0]):
+                with open(in_files[file_idx], "rb") as fin:
+                    for _, offset, length in group:
+                        fin.seek(offset)
+                        fout.write(fin.read(length) + b"\n")
+        # mkstemp creates the file with mode 0600
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, out_file)
+    except BaseException:
+        os.remove(tmp_name)
+        raise
+    return len(winners)
+
+
+def distill_record_file(in_file, out_file, n_parallel=None, chunk_size=64 << 20):
     """
     Pick the best entries from a record file and store them to another file.
     This function distills the useful log entries from a large log file.
     If out_file already exists, the best entries from both
     in_file and out_file will be saved.
 
+    The files are scanned in chunks of lines in parallel, only the costs and offsets of the
+    best records are kept, and the lines of the best records are copied to out_file as is.
+
     Parameters
     ----------
     in_file: str
         The filename of input
-    out_file: str or file
+    out_file: str
         The filename of output
+    n_parallel: Optional[int]
+        The number of processes to scan the chunks. None to use all CPUs.
+    chunk_size: int
+        The number of bytes of a chunk
     """
-    # pylint: disable=import-outside-toplevel
-    from .dispatcher import ApplyHistoryBest
-
-    context = load_records(in_file)
-
-    dirname = os.path.dirname(os.path.abspath(out_file))
-    if not os.path.exists(dirname):
-        os.makedirs(dirname)
-
+    in_files = [in_file]
     if os.path.isfile(out_file):
-        out_context = load_records(out_file)
-        context = itertools.chain(context, out_context)
+        in_files.append(out_file)
+    n_records = _distill_records(in_files, out_file, n_parallel, chunk_size)
+    logger.info("Extract %d best records from %s to %s", n_records, in_file, out_file)
 
-    def measure_input_str_key(inp):
-        return _ffi_api.SerializeMeasureInput(inp)
 
-    # Dict[target key,
-    #   Dict[workload hash,
-    #     Dict[workload args, (cost, (MeasureInput, MeasureResult))]]]
-    # Full type: Dict[str, Dict[str, Dict[Tuple, Tuple[float, Tuple[Measureinput, MeasureResult]]]]]
-    best_records = {}
-
-    for inp, res in context:
-        if res.error_no != 0:
-            continue
-
-        # Keep the best record for each target and workload.
-        costs = [x.value for x in res.costs if isinstance(x, tvm.tir.expr.FloatImm)]
-        cost = np.mean(costs)
-        for k in inp.task.target.keys:
-            entry, _, workload_args = ApplyHistoryBest.get_workload_entry(
-                best_records, k, inp.task.workload_key
-            )
-            if workload_args not in entry or cost < entry[workload_args][0]:
-                entry[workload_args] = (cost, (inp, res))
-
-    # Remove duplications by multiple target keys.
-    out_records = {}
-    for target_entry in best_records.values():
-        for workload_entry in target_entry.values():
-            for _, (inp, res) in workload_entry.values():
-                out_records[measure_input_str_key(inp)] = (inp, res)
-
-    inputs = []
-    results = []
-    for inp, res in out_records.values():
-        inputs.append(inp)
-        results.append(res)
+def merge_record_files(in_files, out_file, n_parallel=None, chunk_size=64 << 20):
+    """
+    Merge the log files of multiple tuning machines into the best entries of all of them.
+    Unlike :any:`distill_record_file`, the existing content of out_file is replaced.
 
-    # create a new file and save the best records
-    open(out_file, "w")
-    save_records(out_file, inputs, results)
-    logger.info("Extract %d best records from %s to %s", len(inputs), in_file, out_file)
+    Parameters
+    ----------
+    in_files: List[str]
+        The filenames of inputs
+    out_file: str
+        The filename of output
+    n_parallel: Optional[int]
+        The number of processes to scan the chunks. None to use all CPUs.
+    chunk_size: int
+        The number of bytes of a chunk
+    """
+    n_records = _distill_records(list(in_files), out_file, n_parallel, chunk_size)
+    logger.info("Merge %d best records from %d files to %s", n_records, len(in_files), out_file)
 
 
 def main():
     """The main function for CLI."""
     parser = argparse.ArgumentParser()
-    parser.add_argument("--mode", choices=["distill"], default="distill")
-    parser.add_argument("-i", "--input", type=str, help="input file")
+    parser.add_argument("--mode", choices=["distill", "merge", "index"], default="distill")
+    parser.add_argument(
+        "-i", "--input", type=str, nargs="+", help="input file(s), multiple for merge mode"
+    )
     parser.add_argument("-o", "--output", type=str, default=None, help="output file")
+    parser.add_argument(
+        "-j", "--n-parallel", type=int, default=None, help="number of processes, all CPUs if unset"
+    )
 
     args = parser.parse_args()
     logging.basicConfig()
     logger.setLevel(logging.INFO)
 
     if args.mode == "distill":
-        args.output = args.output or args.input + ".best.json"
-        distill_record_file(args.input, args.output)
+        for in_file in args.input:
+            distill_record_file(in_file, args.output or in_file + ".best.json", args.n_parallel)
+    elif args.mode == "merge":
+        if not args.output:
+            parser.error("merge mode requires an output file")
+        merge_record_files(args.input, args.output, args.n_parallel)
+    elif args.mode == "index":
+        for in_file in args.input:
+            index = RecordIndex(in_file)
+            logger.info("Indexed %s to %s", in_file, index.index_file)
+            index.close()
 
 
 """
 Usage:
 * Distill the best entries from a large log file
 e.g. python -m tvm.auto_scheduler.measure_record --mode distill -i input.json
+* Merge the best entries of the log files of multiple tuning machines
+e.g. python -m tvm.auto_scheduler.measure_record --mode merge -i a.json b.json -o best.json
+* Build or update the offset index of a log file
+e.g. python -m tvm.auto_scheduler.measure_record --mode index -i input.json
 """
 if __name__ == "__main__":
     main()
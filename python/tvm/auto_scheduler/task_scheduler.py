@@ -26,13 +26,14 @@ import os
 import time
 import math
 import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import numpy as np
 
 from .search_policy import SearchPolicy, SketchPolicy, PreloadMeasuredStates
 from .cost_model import RandomModel, XGBModel
 from .utils import array_mean
-from .measure import ProgramMeasurer
+from .measure import LocalRunner, ProgramMeasurer
 from .measure_record import RecordReader
 from . import _ffi_api
 
@@ -48,6 +49,7 @@ def make_search_policies(
     load_model_file=None,
     load_log_file=None,
     adaptive_training=False,
+    incremental_training=False,
 ):
     """Make a list of search policies for a list of search tasks.
     It creates one policy per task.
@@ -74,6 +76,9 @@ def make_search_policies(
     adaptive_training: bool = False
         Option used by XGBModel to reduce the model training frequency when there're too
         many logs.
+    incremental_training: bool = False
+        Option used by XGBModel to continue boosting the previous model on a bounded
+        replay buffer instead of retraining on all logs.
 
     Returns
     -------
@@ -90,6 +95,7 @@ def make_search_policies(
                 num_warmup_sample=len(tasks) * num_measures_per_round,
                 model_file=load_model_file,
                 adaptive_training=adaptive_training,
+                incremental=incremental_training,
             )
             if load_model_file and os.path.isfile(load_model_file):
                 logger.info("TaskScheduler: Load pretrained model...")
@@ -285,6 +291,8 @@ class TaskScheduler:
         search_policy_params=None,
         adaptive_training=False,
         per_task_early_stopping=None,
+        incremental_training=False,
+        num_parallel_tasks=1,
     ):
         """Tune a batch of tasks together.
 
@@ -305,6 +313,15 @@ class TaskScheduler:
             too many logs.
         per_task_early_stopping : Optional[int]
             Stop tuning a task early if getting no improvement after n measurements.
+        incremental_training : bool = False
+            Option used by XGBModel to continue boosting the previous model on a bounded
+            replay buffer of samples, so its memory and training time stay flat in long runs.
+        num_parallel_tasks : int = 1
+            The number of tasks tuned concurrently. Each in-flight task round searches and
+            measures with its own measurer in a separate thread, and the next task is chosen
+            by the strategy as soon as a round finishes. Set it to the number of devices
+            (divided by the `n_parallel` of the runner) registered on the RPC tracker, so the
+            device farm is kept busy. Measure callbacks may then be called from multiple threads.
         """
         # init members
         self.tune_option = tune_option
@@ -348,8 +365,27 @@ class TaskScheduler:
             self.load_model_file,
             self.load_log_file,
             adaptive_training,
+            incremental_training,
         )
 
+        if num_parallel_tasks > 1:
+            if isinstance(tune_option.runner, LocalRunner):
+                logger.warning(
+                    "TaskScheduler: Tuning tasks concurrently with a LocalRunner makes "
+                    "their measurements interfere with each other."
+                )
+            measurers = [self.measurer] + [
+                ProgramMeasurer(
+                    tune_option.builder,
+                    tune_option.runner,
+                    tune_option.measure_callbacks,
+                    tune_option.verbose,
+                )
+                for _ in range(num_parallel_tasks - 1)
+            ]
+            self._tune_concurrently(measurers)
+            return
+
         # do a round robin first to warm up
         for idx in range(len(self.tasks)):
             # skip warming up this task if it has been tuned before (restored from the log file)
@@ -361,86 +397,171 @@ class TaskScheduler:
         # use the specific strategy to choose workload to tune
         task_idx = -1
         while self.ct < tune_option.num_measure_trials and len(self.dead_tasks) < len(self.tasks):
-            if self.strategy == "round-robin":
-                task_idx = (task_idx + 1) % len(self.tasks)
-                while task_idx in self.dead_tasks:
-                    task_idx = (task_idx + 1) % len(self.tasks)
-            elif self.strategy == "gradient":
-                gradients = []
-                for i in range(len(self.tasks)):
-                    if i in self.dead_tasks:
-                        gradients.append(0)
-                        continue
+            task_idx = self._select_task(task_idx)
+
+            self._tune_task(task_idx)
+            self._adjust_similarity_group(task_idx)
+
+            if self._check_early_stopping():
+                break
 
-                    # compute gradient from chain rule : (delta f / delta g_i)
-                    delta = 1e-4
-                    new_costs = list(self.best_costs)
-                    new_costs[i] -= delta
-                    chain_grad = (
-                        self._compute_score(self.best_costs) - self._compute_score(new_costs)
-                    ) / delta
-
-                    # compute (g_i(t_i) - g(t_i - \Delta t)) / (\Delta t)
-                    if (
-                        self.task_cts[i] - 1 < len(self.task_costs_history[i])
-                        and self.task_cts[i] - 1 - self.backward_window_size >= 0
+    def _tune_concurrently(self, measurers):
+        """Tune tasks with one round in flight per measurer, until the trials are used up,
+        all tasks are dead or the tuning stops early"""
+        # do a round robin first to warm up
+        warm_up_tasks = [idx for idx in range(len(self.tasks)) if not self.task_cts[idx]]
+        n_warm_up_rounds = len(warm_up_tasks)
+        if not n_warm_up_rounds:
+            self.best_ct = self.ct
+            self.best_score = self.cur_score
+
+        # future -> (task_idx, measurer)
+        running = {}
+        free_measurers = list(measurers)
+        task_idx = -1
+        stop = False
+        with ThreadPoolExecutor(max_workers=len(measurers)) as executor:
+            while True:
+                # dispatch rounds to the free measurers
+                while free_measurers and not stop:
+                    busy_tasks = {idx for idx, _ in running.values()}
+                    if warm_up_tasks:
+                        next_idx = warm_up_tasks.pop(0)
+                    elif n_warm_up_rounds or (
+                        self.ct + len(running) * self.num_measures_per_round
+                        >= self.tune_option.num_measure_trials
                     ):
-                        backward_grad = (
-                            self.task_costs_history[i][self.task_cts[i] - 1]
-                            - self.task_costs_history[i][
-                                self.task_cts[i] - 1 - self.backward_window_size
-                            ]
-                        ) / self.backward_window_size
+                        break
                     else:
-                        backward_grad = 0
-
-                    # compute (g_i(t_i + \Delta t) - g(t_i)) / (\Delta t)
-                    g_next_1 = self.best_costs[i] - (self.best_costs[i] / self.task_cts[i])
-
-                    g_next_2 = self.beta * 1e30
-                    group_id = self.tag_to_group_id.get(self.task_tags[i], None)
-                    if group_id is not None and len(self.group_task_ids[group_id]) > 1:
-                        best_flops = max(
-                            [
-                                self.flop_cts[j] / self.best_costs[j]
-                                for j in self.group_task_ids[group_id]
-                            ]
-                        )
-                        g_next_2 = self.beta * self.flop_cts[i] / best_flops
-
-                    g_next = min(g_next_1, g_next_2)
-                    forward_grad = g_next - self.best_costs[i]
-
-                    # combine all grads
-                    grad = chain_grad * (
-                        self.alpha * backward_grad + (1 - self.alpha) * forward_grad
+                        next_idx = self._select_task(task_idx, busy_tasks)
+                        if next_idx is None:
+                            break
+                        task_idx = next_idx
+
+                    for callback in self.callbacks:
+                        callback.pre_tune(self, next_idx)
+                    measurer = free_measurers.pop()
+                    future = executor.submit(
+                        self.search_policies[next_idx].continue_search_one_round,
+                        self.num_measures_per_round,
+                        measurer,
                     )
-                    assert grad <= 0
-                    gradients.append(grad)
+                    running[future] = (next_idx, measurer)
+
+                if not running:
+                    break
+
+                # update the status and the allocation with the rounds finished so far
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, measurer = running.pop(future)
+                    free_measurers.append(measurer)
+                    measure_inputs, measure_results = future.result()
+                    self._finish_task_round(idx, measure_inputs, measure_results)
+
+                    if n_warm_up_rounds:
+                        n_warm_up_rounds -= 1
+                        if not n_warm_up_rounds:
+                            self.best_ct = self.ct
+                            self.best_score = self.cur_score
+                        continue
 
-                if max(gradients) == min(gradients):
-                    task_idx = np.random.choice(len(gradients))
+                    self._adjust_similarity_group(idx)
+                    if not stop and self._check_early_stopping():
+                        # wait for the rounds in flight
+                        stop = True
+
+    def _select_task(self, task_idx, excluded=()):
+        """Choose the next task to tune after the task `task_idx` with the strategy.
+        Dead tasks and the tasks in `excluded` are skipped, return None if no task is left."""
+        candidates = [
+            i for i in range(len(self.tasks)) if i not in self.dead_tasks and i not in excluded
+        ]
+        if not candidates:
+            return None
+
+        if self.strategy == "round-robin":
+            task_idx = (task_idx + 1) % len(self.tasks)
+            while task_idx not in candidates:
+                task_idx = (task_idx + 1) % len(self.tasks)
+        elif self.strategy == "gradient":
+            gradients = self._compute_gradients(excluded)
+            if max(gradients) == min(gradients):
+                if excluded:
+                    task_idx = np.random.choice(candidates)
                 else:
-                    task_idx = np.argmin(gradients)
+                    task_idx = np.random.choice(len(gradients))
             else:
-                raise ValueError("Invalid strategy: " + self.strategy)
-
-            self._tune_task(task_idx)
-            self._adjust_similarity_group(task_idx)
+                task_idx = np.argmin(gradients)
+        else:
+            raise ValueError("Invalid strategy: " + self.strategy)
+        return task_idx
+
+    def _compute_gradients(self, excluded=()):
+        """Compute the gradient of the objective with respect to the tuning time of each task.
+        The gradients of dead tasks and the tasks in `excluded` are 0."""
+        gradients = []
+        for i in range(len(self.tasks)):
+            if i in self.dead_tasks or i in excluded:
+                gradients.append(0)
+                continue
 
-            if self.cur_score < self.best_score:
-                self.best_score = self.cur_score
-                self.best_ct = self.ct
-            elif self.ct - self.best_ct >= self.early_stopping_all and all(
-                cost < 1e9 for cost in self.best_costs
+            # compute gradient from chain rule : (delta f / delta g_i)
+            delta = 1e-4
+            new_costs = list(self.best_costs)
+            new_costs[i] -= delta
+            chain_grad = (
+                self._compute_score(self.best_costs) - self._compute_score(new_costs)
+            ) / delta
+
+            # compute (g_i(t_i) - g(t_i - \Delta t)) / (\Delta t)
+            if (
+                self.task_cts[i] - 1 < len(self.task_costs_history[i])
+                and self.task_cts[i] - 1 - self.backward_window_size >= 0
             ):
-                if self.tune_option.verbose >= 1:
-                    print(
-                        "Stop early since no performance improvement in the last "
-                        + str(self.early_stopping_all)
-                        + " measurement trials."
-                    )
-                break
+                backward_grad = (
+                    self.task_costs_history[i][self.task_cts[i] - 1]
+                    - self.task_costs_history[i][self.task_cts[i] - 1 - self.backward_window_size]
+                ) / self.backward_window_size
+            else:
+                backward_grad = 0
+
+            # compute (g_i(t_i + \Delta t) - g(t_i)) / (\Delta t)
+            g_next_1 = self.best_costs[i] - (self.best_costs[i] / self.task_cts[i])
+
+            g_next_2 = self.beta * 1e30
+            group_id = self.tag_to_group_id.get(self.task_tags[i], None)
+            if group_id is not None and len(self.group_task_ids[group_id]) > 1:
+                best_flops = max(
+                    [self.flop_cts[j] / self.best_costs[j] for j in self.group_task_ids[group_id]]
+                )
+                g_next_2 = self.beta * self.flop_cts[i] / best_flops
+
+            g_next = min(g_next_1, g_next_2)
+            forward_grad = g_next - self.best_costs[i]
+
+            # combine all grads
+            grad = chain_grad * (self.alpha * backward_grad + (1 - self.alpha) * forward_grad)
+            assert grad <= 0
+            gradients.append(grad)
+        return gradients
+
+    def _check_early_stopping(self):
+        """Update the best score and check whether the tuning should stop early"""
+        if self.cur_score < self.best_score:
+            self.best_score = self.cur_score
+            self.best_ct = self.ct
+        elif self.ct - self.best_ct >= self.early_stopping_all and all(
+            cost < 1e9 for cost in self.best_costs
+        ):
+            if self.tune_option.verbose >= 1:
+                print(
+                    "Stop early since no performance improvement in the last "
+                    + str(self.early_stopping_all)
+                    + " measurement trials."
+                )
+            return True
+        return False
 
     def _tune_task(self, task_idx):
         """Tune the select task for one round"""
@@ -452,7 +573,10 @@ class TaskScheduler:
         measure_inputs, measure_results = self.search_policies[task_idx].continue_search_one_round(
             self.num_measures_per_round, self.measurer
         )
+        self._finish_task_round(task_idx, measure_inputs, measure_results)
 
+    def _finish_task_round(self, task_idx, measure_inputs, measure_results):
+        """Update the status of the task with the results of a round"""
         self.task_cts[task_idx] += 1
 
         for res in measure_results:
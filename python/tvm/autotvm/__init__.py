@@ -59,6 +59,7 @@ from .task import (
     DispatchContext,
     FallbackContext,
     ApplyHistoryBest as apply_history_best,
+    ApplyHistoryBestLazy as apply_history_best_lazy,
     ApplyGraphBest as apply_graph_best,
     ApplyFixedConfig as apply_fixed_config,
 )
@@ -19,7 +19,9 @@
 Database of MeasureInput/MeasureResult pair.
 This can be used for replaying measurement.
 """
+import itertools
 import os
+import sqlite3
 
 from .record import encode, decode, measure_str_key
 
@@ -61,6 +63,39 @@ class Database(object):
         """
         raise NotImplementedError()
 
+    def load_batch(self, inps, get_all=False):
+        """
+        Load the results of a batch of inputs
+
+        Parameters
+        ----------
+        inps: Array of MeasureInput
+            the inputs to look up
+        get_all: bool, optional
+            Whether the latest result (or all matching results) should be returned
+
+        Returns
+        -------
+        recs: Array of MeasureResult, where None denotes no saved result
+        """
+        return [self.load(inp, get_all=get_all) for inp in inps]
+
+    def save_batch(self, inps, results, extend=False):
+        """
+        Save the results of a batch of inputs
+
+        Parameters
+        ----------
+        inps: Array of MeasureInput
+            the inputs to be translated into keys
+        results: Array of MeasureResult
+            the results to associate with the keys
+        extend:
+            Whether to extend existing MeasureResults if they exist
+        """
+        for inp, res in zip(inps, results):
+            self.save(inp, res, extend=extend)
+
 
 def filter_inputs(db, measure_inputs, retry=False):
     """
@@ -84,8 +119,7 @@ def filter_inputs(db, measure_inputs, retry=False):
     """
     partial_results = list()
     unsaved = list()
-    for inp in measure_inputs:
-        res = db.load(inp)
+    for inp, res in zip(measure_inputs, db.load_batch(measure_inputs)):
         if res is None or (retry and res.error_no != 0):
             unsaved.append(inp)
             partial_results.append(None)
@@ -188,6 +222,116 @@ class RedisDatabase(Database):
         self.db.flushdb()
 
 
+class SQLiteDatabase(Database):
+    """
+    Local file-backed record database, which needs no database service.
+
+    The encoded records are stored in a table indexed by `measure_str_key`,
+    and batches are loaded or saved with one query per batch.
+
+    Parameters
+    ----------
+    path: str
+        The path of the database file. Use ":memory:" for a temporary database.
+    """
+
+    # keep the number of bound parameters below the SQLite limit
+    MAX_BATCH_KEYS = 900
+
+    def __init__(self, path):
+        self.path = os.fsdecode(path)
+        self.db = sqlite3.connect(self.path, timeout=600)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS records (key TEXT NOT NULL, timestamp REAL, record TEXT)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS records_key ON records (key, timestamp)")
+        self.db.commit()
+
+    def _query(self, keys, order):
+        """Yield the (key, record) rows of keys in the given order"""
+        keys = list(keys)
+        for i in range(0, len(keys), SQLiteDatabase.MAX_BATCH_KEYS):
+            chunk = keys[i : i + SQLiteDatabase.MAX_BATCH_KEYS]
+            yield from self.db.execute(
+                "SELECT key, record FROM records WHERE key IN (%s) ORDER BY %s"
+                % (", ".join("?" * len(chunk)), order),
+                chunk,
+            )
+
+    def load(self, inp, get_all=False):
+        return self.load_batch([inp], get_all=get_all)[0]
+
+    def load_batch(self, inps, get_all=False):
+        keys = [measure_str_key(inp) for inp in inps]
+        rows = {}
+        # saved order for all results, otherwise the latest result comes last
+        order = "key, rowid" if get_all else "key, timestamp, rowid"
+        for key, record in self._query(set(keys), order):
+            rows.setdefault(key, []).append(record)
+
+        results = {}
+        for key, records in rows.items():
+            if not get_all:
+                records = records[-1:]
+            records = [decode(x) for x in records]
+            records = [rec[1] for rec in records if rec is not None]
+            if records:
+                results[key] = records if get_all else records[0]
+        return [results.get(key) for key in keys]
+
+    def save(self, inp, res, extend=False):
+        self.save_batch([inp], [res], extend=extend)
+
+    def save_batch(self, inps, results, extend=False):
+        rows = [
+            (measure_str_key(inp), res.timestamp, encode(inp, res))
+            for inp, res in zip(inps, results)
+        ]
+        with self.db:
+            if not extend:
+                # only keep the last result of a key in this batch
+                latest = {row[0]: row for row in rows}
+                rows = list(latest.values())
+                self.db.executemany("DELETE FROM records WHERE key = ?", [(k,) for k in latest])
+            self.db.executemany("INSERT INTO records VALUES (?, ?, ?)", rows)
+
+    def filter(self, func):
+        """
+        Dump all of the records that match the given rule
+
+        Parameters
+        ----------
+        func: callable
+            The signature of the function is (MeasureInput, [MeasureResult]) -> bool
+
+        Returns
+        -------
+        list of records in tuple (MeasureInput, MeasureResult) matching the rule
+        """
+        matched_records = list()
+        cursor = self.db.execute("SELECT key, record FROM records ORDER BY key, rowid")
+        for _, rows in itertools.groupby(cursor, key=lambda row: row[0]):
+            records = [decode(row[1]) for row in rows]
+            records = [rec for rec in records if rec is not None]
+            if not records:
+                continue
+            inps, results = zip(*records)
+            inp = inps[0]
+            if not func(inp, results):
+                continue
+            result = max(results, key=lambda res: res.timestamp)
+            matched_records.append((inp, result))
+        return matched_records
+
+    def flush(self):
+        with self.db:
+            self.db.execute("DELETE FROM records")
+
+    def close(self):
+        """Close the database file"""
+        self.db.close()
+
+
 class DummyDatabase(RedisDatabase):
     """
     A database based on python dictionary for testing.
@@ -21,5 +21,6 @@ from . import _base
 from . import base_graph_tuner
 
 from .base_graph_tuner import BaseGraphTuner
+from .layout_transform_database import LayoutTransformDatabase
 from .dynamic_programming_tuner import DPTuner
 from .pbqp_tuner import PBQPTuner
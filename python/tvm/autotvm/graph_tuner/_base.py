@@ -22,6 +22,4 @@
 # This number is set to be 10e9 seconds to align with autotvm.
 INVALID_LAYOUT_TIME = 10e9
 
-MAX_OUTPUT_NODES = 16
-
 OPT_OUT_OP = ["layout_transform"]
@@ -17,6 +17,7 @@
 # pylint: disable=too-many-arguments,too-many-locals,too-many-statements,too-many-instance-attributes,too-many-branches,too-many-nested-blocks,invalid-name,unused-argument,unused-variable,no-member,no-value-for-parameter
 """Base class for graph tuner."""
 import logging
+import os
 from abc import abstractmethod
 
 import numpy as np
@@ -40,6 +41,7 @@ from .utils import (
     expr2graph,
 )
 from ._base import INVALID_LAYOUT_TIME
+from .layout_transform_database import LayoutTransformDatabase
 
 from ._base import OPT_OUT_OP
 
@@ -376,6 +378,8 @@ class BaseGraphTuner(object):
         target_host=None,
         infer_layout=False,
         runner=None,
+        layout_db=None,
+        interpolate_layout=False,
     ):
         """Benchmark all possible layout transformation in the graph,
         given a set of schedule candidates for each workload of target operator.
@@ -441,6 +445,18 @@ class BaseGraphTuner(object):
             This might bring performance loss comparing to benchmarking layout transformation.
         runner : Runner, optional
             Accept a user-supplied runner
+
+        layout_db : str, os.PathLike or LayoutTransformDatabase, optional
+            Persistent database of layout transformation timings, shared across models
+            and sessions. Workloads found in it are not benchmarked again, and new
+            benchmark records are saved to it.
+            If it is a path, the database is opened at that path and closed when
+            benchmarking finishes.
+
+        interpolate_layout : bool, optional
+            Whether to estimate the time of a workload missing from `layout_db` from the
+            saved timings of the same layout pair, instead of benchmarking it.
+            Workloads without enough saved timings are still benchmarked.
         """
         self._logger.info("Start to benchmark layout transformation...")
         self._target, target_host = Target.canon_target_and_host(self._target, target_host)
@@ -501,43 +517,76 @@ class BaseGraphTuner(object):
         elif not runner:
             runner = autotvm.LocalRunner(number=min_exec_num, repeat=1, timeout=timeout)
         measure_option = autotvm.measure_option(builder=builder, runner=runner)
-        for args in args_list:
-            data, in_layout, out_layout = args
-            ltf_workload = autotvm.task.args_to_workload(args, "layout_transform")
-            if ltf_workload in self._layout_transform_perf_records:
-                continue
+        close_layout_db = isinstance(layout_db, (str, bytes, os.PathLike))
+        if close_layout_db:
+            layout_db = LayoutTransformDatabase(layout_db)
+        try:
+            for args in args_list:
+                data, in_layout, out_layout = args
+                ltf_workload = autotvm.task.args_to_workload(args, "layout_transform")
+                if ltf_workload in self._layout_transform_perf_records:
+                    continue
 
-            if infer_layout:
-                input_shape = ltf_workload[1][1]
-                flops = 1
-                for i in input_shape:
-                    flops *= i
+                if layout_db is not None:
+                    record = layout_db.load(self._target, ltf_workload)
+                    if record is None and interpolate_layout:
+                        estimated_time = layout_db.interpolate(self._target, ltf_workload)
+                        if estimated_time is not None:
+                            record = (
+                                MeasureInput(target=self._target, task=None, config=None),
+                                MeasureResult(
+                                    costs=(estimated_time,), error_no=0, all_cost=-1, timestamp=-1
+                                ),
+                            )
+                    if record is not None:
+                        self._layout_transform_perf_records[ltf_workload] = record
+                        continue
 
-                # Rule out invalid layout transformations
-                out = topi.layout_transform(data, in_layout, out_layout)
-                out_flops = 1
-                for i in topi.utils.get_const_tuple(out.shape):
-                    out_flops *= i
+                if infer_layout:
+                    input_shape = ltf_workload[1][1]
+                    flops = 1
+                    for i in input_shape:
+                        flops *= i
 
-                if flops != out_flops:
-                    inferred_time = INVALID_LAYOUT_TIME
-                else:
-                    inferred_time = flops * avg_time
+                    # Rule out invalid layout transformations
+                    out = topi.layout_transform(data, in_layout, out_layout)
+                    out_flops = 1
+                    for i in topi.utils.get_const_tuple(out.shape):
+                        out_flops *= i
 
-                record_input = MeasureInput(target=self._target, task=None, config=None)
-                record_output = MeasureResult(
-                    costs=(inferred_time,), error_no=0, all_cost=-1, timestamp=-1
-                )
-                self._layout_transform_perf_records[ltf_workload] = (record_input, record_output)
-                continue
+                    if flops != out_flops:
+                        inferred_time = INVALID_LAYOUT_TIME
+                    else:
+                        inferred_time = flops * avg_time
+
+                    record_input = MeasureInput(target=self._target, task=None, config=None)
+                    record_output = MeasureResult(
+                        costs=(inferred_time,), error_no=0, all_cost=-1, timestamp=-1
+                    )
+                    self._layout_transform_perf_records[ltf_workload] = (
+                        record_input,
+                        record_output,
+                    )
+                    continue
 
-            records = []
-            task = autotvm.task.create("layout_transform", args=args, target=self._target)
-            tuner = autotvm.tuner.GridSearchTuner(task)
-            tuner.tune(n_trial=1, measure_option=measure_option, callbacks=[_log_to_list(records)])
-            if not isinstance(records[0][1].costs[0], float):
-                records[0] = (records[0][0], records[0][1]._replace(costs=(INVALID_LAYOUT_TIME,)))
-            self._layout_transform_perf_records[ltf_workload] = records[0]
+                records = []
+                task = autotvm.task.create("layout_transform", args=args, target=self._target)
+                tuner = autotvm.tuner.GridSearchTuner(task)
+                tuner.tune(
+                    n_trial=1, measure_option=measure_option, callbacks=[_log_to_list(records)]
+                )
+                if not isinstance(records[0][1].costs[0], float):
+                    records[0] = (
+                        records[0][0],
+                        records[0][1]._replace(costs=(INVALID_LAYOUT_TIME,)),
+                    )
+                self._layout_transform_perf_records[ltf_workload] = records[0]
+                # failed benchmarks are not cached, so that they are retried by the next run
+                if layout_db is not None and records[0][1].error_no == 0:
+                    layout_db.save(ltf_workload, records[0])
+        finally:
+            if close_layout_db:
+                layout_db.close()
 
         self._iterate_layout_transform(self._create_matrix_callback)
         self._logger.info("Benchmarking layout transformation successful.")
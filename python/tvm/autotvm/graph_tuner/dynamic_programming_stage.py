@@ -101,6 +101,8 @@ class DPStage(object):
         self._states = None
         self._full_states = None
         self._full_states_idx = None
+        self._input_argmin = None
+        self._num_full_states = 0
         self._create_states()
 
     def _create_states(self):
@@ -122,11 +124,9 @@ class DPStage(object):
             input_stage = self._global_stage_dict[input_idx]
             input_dep = input_stage.dep
             input_states = input_stage.states
-            input_flatten_states = input_states.flatten()
             input_record_list = input_node_entry["record_candidates"]
             num_schedules = len(self._record_list)
             num_input_schedules = len(input_record_list)
-            num_input_states = input_flatten_states.shape[0]
 
             full_states_shape = tuple(
                 [num_schedules, num_input_schedules]
@@ -135,33 +135,28 @@ class DPStage(object):
                     for dep_idx in input_dep
                 ]
             )
-            self._full_states = np.zeros(full_states_shape).flatten().astype("float32")
             self._full_states_idx = [self._idx, input_idx] + input_dep
-            dep_multiplier = 1
-            for i in range(2, len(full_states_shape)):
-                dep_multiplier *= full_states_shape[i]
             input_node_time_counted = input_idx in self._global_counted_nodes_set
 
+            # full_states[i, j, deps...] = time of schedule i + layout transform time from
+            # input schedule j to i + input states[j, deps...] if input time is not counted yet
+            layout_transform_time = np.array(
+                self._global_layout_transform_interlayer_cost[(input_idx, self._idx)],
+                dtype="float64",
+            )
+            input_time = 0 if input_node_time_counted else input_states.astype("float64")
+            dep_shape = (1,) * (len(full_states_shape) - 2)
+            self._full_states = np.empty(full_states_shape, dtype="float32")
             for i in range(num_schedules):
                 current_sch_time = float(self._record_list[i][1].costs[0])
-                for j in range(num_input_states):
-                    input_sch_idx = j // dep_multiplier
-                    layout_transform_time = self._global_layout_transform_interlayer_cost[
-                        (input_idx, self._idx)
-                    ][input_sch_idx][i]
-
-                    if input_node_time_counted:
-                        total_time = current_sch_time + layout_transform_time
-                    else:
-                        total_time = (
-                            current_sch_time + layout_transform_time + input_flatten_states[j]
-                        )
-                    current_state_idx = i * num_input_states + j
-                    self._full_states[current_state_idx] = total_time
+                self._full_states[i] = (
+                    current_sch_time
+                    + layout_transform_time[:, i].reshape((num_input_schedules,) + dep_shape)
+                    + input_time
+                )
 
             if not input_node_time_counted:
                 self._global_counted_nodes_set.add(input_idx)
-            self._full_states = self._full_states.reshape(full_states_shape)
 
             # If out degree of input node is 1, we can remove the dimension of input node,
             # since the states of input node will not be needed any more. Otherwise, input
@@ -169,6 +164,12 @@ class DPStage(object):
             if len(self._global_out_nodes_dict[input_idx]) == 1:
                 self._states = np.amin(self._full_states, axis=1)
                 self._dep = list(input_dep)
+                # only the best input schedule of each state is needed in the backward pass
+                self._input_argmin = np.argmin(self._full_states, axis=1).astype(
+                    np.min_scalar_type(num_input_schedules)
+                )
+                self._num_full_states = self._full_states.size
+                self._full_states = None
             else:
                 self._states = self._full_states
                 self._dep = [
@@ -222,39 +223,34 @@ class DPStage(object):
         states_list, aligned_node_list = DPStage.align_states(
             input_index_list, self._global_stage_dict, self._global_node_list
         )
-        target_node_idx, target_major_axis, target_multiplier, target_states = states_list[0]
+        target_node_idx, target_major_axis, _, target_states = states_list[0]
         aligned_shape = target_states.shape
-        self._full_states = np.zeros(aligned_shape).astype("float32").flatten()
         self._full_states_idx = list(aligned_node_list)
-        num_states = self._full_states.shape[0]
         node_time_counted = [item[0] in self._global_counted_nodes_set for item in states_list]
-        target_states = target_states.flatten()
-        src_states_list = [states_list[i][3].flatten() for i in range(1, len(states_list))]
-
-        for i in range(num_states):
-            target_sch_idx = (
-                i % (target_multiplier * aligned_shape[target_major_axis])
-            ) // target_multiplier
-            if node_time_counted[0]:
-                new_state = 0
-            else:
-                new_state = target_states[i]
 
+        # Broadcast the layout transformation time of each source node to the target node
+        # along their axes, and accumulate them with the states not counted yet.
+        if len(states_list) > 1:
+            new_states = np.zeros(aligned_shape, dtype="float64")
+            if not node_time_counted[0]:
+                new_states += target_states
             for j in range(1, len(states_list)):
-                src_states = src_states_list[j - 1]
-                src_node_idx, src_major_axis, src_multiplier, _ = states_list[j]
-                src_sch_idx = (
-                    i % (src_multiplier * aligned_shape[src_major_axis])
-                ) // src_multiplier
-                layout_transform_time = self._global_layout_transform_interlayer_cost[
-                    (src_node_idx, target_node_idx)
-                ][src_sch_idx][target_sch_idx]
-
-                if node_time_counted[j]:
-                    new_state += layout_transform_time
-                else:
-                    new_state += layout_transform_time + src_states[i]
-                self._full_states[i] = new_state
+                src_node_idx, src_major_axis, _, src_states = states_list[j]
+                layout_transform_time = np.array(
+                    self._global_layout_transform_interlayer_cost[(src_node_idx, target_node_idx)],
+                    dtype="float64",
+                )
+                if src_major_axis > target_major_axis:
+                    layout_transform_time = layout_transform_time.T
+                broadcast_shape = [1] * len(aligned_shape)
+                broadcast_shape[src_major_axis] = aligned_shape[src_major_axis]
+                broadcast_shape[target_major_axis] = aligned_shape[target_major_axis]
+                new_states += layout_transform_time.reshape(broadcast_shape)
+                if not node_time_counted[j]:
+                    new_states += src_states
+            self._full_states = new_states.astype("float32")
+        else:
+            self._full_states = np.zeros(aligned_shape, dtype="float32")
 
         for i, node_counted in enumerate(node_time_counted):
             if not node_counted:
@@ -306,6 +302,19 @@ class DPStage(object):
         """Get complete states."""
         return self._full_states
 
+    @property
+    def input_argmin(self):
+        """Get the best input schedule of each state, if the input dimension was reduced.
+        In this case complete states are released after the stage is created."""
+        return self._input_argmin
+
+    @property
+    def num_full_states(self):
+        """Get the number of complete states evaluated for this stage."""
+        if self._full_states is not None:
+            return self._full_states.size
+        return self._num_full_states
+
     @property
     def full_states_idx(self):
         """Get node index of complete states."""
@@ -369,3 +378,73 @@ class DPStage(object):
                 multiplier *= aligned_shape[i]
             states_list.append((input_idx, major_axis, multiplier, input_node_states))
         return states_list, aligned_node_list
+
+    @staticmethod
+    def min_sum_states(input_index_list, stage_dict, check_num_states=None):
+        """Pick the schedules of several nodes and their dependencies which minimize
+        the sum of their states.
+
+        The nodes are eliminated one at a time. The states that contain a node are
+        summed over the nodes they depend on, and minimized over that node, so only
+        states over the dependencies shared by the remaining nodes are created,
+        instead of the states over all of them.
+
+        Parameters
+        ----------
+        input_index_list : list of int
+            List of node index, e.g. the output nodes of the graph.
+
+        stage_dict : dict of int to Stage
+            Global dictionary of node index to stage.
+
+        check_num_states : callable, optional
+            Called with the number of states before they are created.
+
+        Returns
+        -------
+        optimal_record_dict : dict of int to int
+            The optimal schedule index of the nodes and their dependencies.
+        """
+        # every term is (list of node index, states with one axis per node)
+        terms = [
+            ([idx] + list(stage_dict[idx].dep), stage_dict[idx].states) for idx in input_index_list
+        ]
+        remaining = []
+        for term_nodes, _ in terms:
+            remaining += [idx for idx in term_nodes if idx not in remaining]
+
+        eliminated = []
+        while remaining:
+            # eliminate the node whose terms span the fewest states
+            scopes = []
+            for idx in remaining:
+                scope = {idx: None}
+                for term_nodes, states in terms:
+                    if idx in term_nodes:
+                        scope.update(zip(term_nodes, states.shape))
+                scopes.append(scope)
+            pos = int(np.argmin([np.prod(list(scope.values())) for scope in scopes]))
+            idx, scope = remaining.pop(pos), scopes[pos]
+            node_list = list(scope)
+            if check_num_states is not None:
+                check_num_states(int(np.prod(list(scope.values()))))
+
+            total = 0
+            rest_terms = []
+            for term_nodes, states in terms:
+                if idx not in term_nodes:
+                    rest_terms.append((term_nodes, states))
+                    continue
+                # transpose and reshape the states to broadcast along node_list
+                axes = [node for node in node_list if node in term_nodes]
+                states = np.transpose(states, [term_nodes.index(node) for node in axes])
+                total = total + np.reshape(
+                    states, [scope[node] if node in axes else 1 for node in node_list]
+                )
+            eliminated.append((idx, node_list[1:], np.argmin(total, axis=0)))
+            terms = rest_terms + [(node_list[1:], np.min(total, axis=0))]
+
+        optimal_record_dict = {}
+        for idx, dep_list, argmin in reversed(eliminated):
+            optimal_record_dict[idx] = int(argmin[tuple(optimal_record_dict[x] for x in dep_list)])
+        return optimal_record_dict
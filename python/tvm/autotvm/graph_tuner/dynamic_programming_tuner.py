@@ -19,7 +19,6 @@
 import sys
 import numpy as np
 
-from ._base import MAX_OUTPUT_NODES
 from .base_graph_tuner import BaseGraphTuner
 from .dynamic_programming_stage import DPStage
 from .utils import has_multiple_inputs, is_boundary_node
@@ -75,7 +74,7 @@ class DPTuner(BaseGraphTuner):
         self._logger.info("Start forward pass...")
         for node_idx in sorted(self._in_nodes_dict.keys()):
             stage = DPStage(idx=node_idx, target_ops=self._target_ops, **self._global_data_dict)
-            self._check_num_states(stage.full_states.size)
+            self._check_num_states(stage.num_full_states)
             self._stage_dict[node_idx] = stage
         self._logger.info("Finished forward pass.")
 
@@ -83,58 +82,15 @@ class DPTuner(BaseGraphTuner):
         """Backward pass in DP to generate optimal solution."""
         self._logger.info("Start backward pass...")
         input_names = self._input_shapes.keys()
-        optimal_record_dict = {}
-        # Pick optimal schedule for output nodes
         output_idx_list = []
         for key, val in self._out_nodes_dict.items():
             if not val:
                 output_idx_list.append(key)
 
-        # Restrict number of output nodes to avoid numpy reshape error
-        if len(output_idx_list) > MAX_OUTPUT_NODES:
-            msg = (
-                "The number of outputs in graph is larger than upper "
-                "limit: %s vs %s. Usually this is caused by too many "
-                "LAYOUT_FIXED_OP in graph. Switch to greedily select schedule."
-                "No action required at this moment. We will continuously improve graph tuner"
-                % (len(output_idx_list), MAX_OUTPUT_NODES)
-            )
-            self._logger.warning(msg)
-            self._optimal_record_dict = {key: 0 for key in self._in_nodes_dict}
-            return
-
-        states_list, aligned_node_list = DPStage.align_states(
-            output_idx_list, self._stage_dict, self._node_list
+        # Pick optimal schedule for output nodes and their dependencies
+        optimal_record_dict = DPStage.min_sum_states(
+            output_idx_list, self._stage_dict, self._check_num_states
         )
-        num_states = states_list[0][3].size
-        self._check_num_states(num_states * len(output_idx_list))
-        aligned_node_shape = states_list[0][3].shape
-        min_time = 0
-        min_pos = -1
-        for states in states_list:
-            min_time += np.amax(states[3])
-        flatten_states_list = [current_states[3].flatten() for current_states in states_list]
-        for i in range(num_states):
-            current_time = 0
-            for j, current_states in enumerate(states_list):
-                current_time += flatten_states_list[j][i]
-            if min_time > current_time:
-                min_time = current_time
-                min_pos = i
-        for i, states in enumerate(states_list):
-            current_major_axis = states[1]
-            current_sch_idx = (
-                min_pos % (states[2] * aligned_node_shape[current_major_axis])
-            ) // states[2]
-            optimal_record_dict[aligned_node_list[i]] = current_sch_idx
-        # Pick optimal schedule for dependencies of output nodes
-        for i in range(len(states_list), len(aligned_node_list)):
-            multiplier = 1
-            for j in range(i + 1, len(aligned_node_list)):
-                multiplier *= aligned_node_shape[j]
-            optimal_record_dict[aligned_node_list[i]] = (
-                min_pos // multiplier % aligned_node_shape[i]
-            )
 
         # Backward pass to get optimal schedules for other nodes
         bfs_q = queue.Queue()
@@ -157,11 +113,14 @@ class DPTuner(BaseGraphTuner):
                 if input_idx not in visited:
                     bfs_q.put(input_idx)
                     if input_idx not in optimal_record_dict:
-                        dep_list = self._stage_dict[node_idx].dep
-                        dep_idx = tuple([optimal_record_dict[item] for item in dep_list])
-                        tmp = np.argmin(full_states, axis=1)
-                        optimal_input_sch_idx = tmp[(optimal_sch_idx,) + dep_idx]
-                        optimal_record_dict[input_idx] = optimal_input_sch_idx
+                        stage = self._stage_dict[node_idx]
+                        dep_idx = tuple([optimal_record_dict[item] for item in stage.dep])
+                        if stage.input_argmin is not None:
+                            optimal_input_sch_idx = stage.input_argmin[(optimal_sch_idx,) + dep_idx]
+                        else:
+                            tmp = np.argmin(full_states, axis=1)
+                            optimal_input_sch_idx = tmp[(optimal_sch_idx,) + dep_idx]
+                        optimal_record_dict[input_idx] = int(optimal_input_sch_idx)
             else:
                 input_idx_list = self._in_nodes_dict[node_idx]
                 optimal_record_dict[input_idx_list[0]] = optimal_sch_idx
@@ -0,0 +1,153 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# pylint: disable=invalid-name
+"""Persistent database of layout transformation timings for graph tuners."""
+import os
+import sqlite3
+
+import numpy as np
+
+from tvm.autotvm.record import encode, decode
+from tvm.target import Target
+
+from ._base import INVALID_LAYOUT_TIME
+
+
+class LayoutTransformDatabase(object):
+    """A SQLite file of layout transformation benchmark records, shared by graph tuners
+    across models and sessions.
+
+    Records are keyed by target and layout_transform workload, i.e. the input shape,
+    dtype, source layout and destination layout.
+
+    Parameters
+    ----------
+    path : str
+        The path of the database file.
+    """
+
+    def __init__(self, path):
+        self.path = os.fsdecode(path)
+        self.db = sqlite3.connect(self.path, timeout=600)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS layout_transform (target TEXT, workload TEXT, "
+            "in_layout TEXT, out_layout TEXT, dtype TEXT, numel INTEGER, cost REAL, "
+            "record TEXT, PRIMARY KEY (target, workload))"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS layout_transform_pair "
+            "ON layout_transform (target, in_layout, out_layout, dtype)"
+        )
+        self.db.commit()
+
+    def load(self, target, workload):
+        """Load the benchmark record of a layout transformation workload.
+
+        Parameters
+        ----------
+        target : Target
+            The target the record was measured on.
+
+        workload : tuple
+            The layout_transform workload.
+
+        Returns
+        -------
+        record : (MeasureInput, MeasureResult) or None
+            The saved record, None if the workload has not been benchmarked.
+        """
+        row = self.db.execute(
+            "SELECT record FROM layout_transform WHERE target = ? AND workload = ?",
+            (str(Target.canon_target(target)), repr(workload)),
+        ).fetchone()
+        return None if row is None else decode(row[0])
+
+    def save(self, workload, record):
+        """Save the benchmark record of a layout transformation workload.
+
+        Parameters
+        ----------
+        workload : tuple
+            The layout_transform workload.
+
+        record : (MeasureInput, MeasureResult)
+            The benchmark record.
+        """
+        inp, res = record
+        _, (_, shape, dtype), in_layout, out_layout = workload
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO layout_transform VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    str(Target.canon_target(inp.target)),
+                    repr(workload),
+                    in_layout,
+                    out_layout,
+                    dtype,
+                    int(np.prod(shape)),
+                    float(res.costs[0]),
+                    encode(inp, res),
+                ),
+            )
+
+    def interpolate(self, target, workload, min_samples=3):
+        """Estimate the time of an unseen layout transformation workload.
+
+        The time is fitted as a linear function of the number of elements, from the
+        saved records of the same target, dtype and layout pair, and bounded below
+        by the fastest of these records.
+
+        Parameters
+        ----------
+        target : Target
+            The target to estimate for.
+
+        workload : tuple
+            The layout_transform workload.
+
+        min_samples : int, optional
+            The minimum number of saved records to fit.
+
+        Returns
+        -------
+        time : float or None
+            The estimated time in seconds, None if there are not enough records.
+        """
+        _, (_, shape, dtype), in_layout, out_layout = workload
+        rows = self.db.execute(
+            "SELECT numel, cost FROM layout_transform WHERE target = ? AND in_layout = ? "
+            "AND out_layout = ? AND dtype = ? AND cost < ?",
+            (
+                str(Target.canon_target(target)),
+                in_layout,
+                out_layout,
+                dtype,
+                INVALID_LAYOUT_TIME,
+            ),
+        ).fetchall()
+        if len(rows) < min_samples:
+            return None
+
+        numel, cost = np.array(rows, dtype="float64").T
+        if np.ptp(numel) == 0:
+            return float(np.mean(cost))
+        slope, intercept = np.polyfit(numel, cost, 1)
+        return float(max(intercept + slope * np.prod(shape), np.min(cost)))
+
+    def close(self):
+        """Close the database file."""
+        self.db.close()
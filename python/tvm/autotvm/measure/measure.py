@@ -51,8 +51,24 @@ class MeasureResult(namedtuple("MeasureResult", ["costs", "error_no", "all_cost"
         All cost of this measure, including rpc, compilation, test runs
     timestamp: float
         The absolute time stamp when we finish measurement.
+    repeats: int, optional
+        The number of repeats actually run on the device, or None if unknown.
+        This is not a tuple field and is not stored in tuning logs.
+    reused: bool, optional
+        Whether the result is copied from a structurally identical configuration
+        instead of being measured. This is not a tuple field, but it is stored in
+        tuning logs.
     """
 
+    repeats = None
+    reused = False
+
+    def __new__(cls, costs, error_no, all_cost, timestamp, repeats=None, reused=False):
+        self = super(MeasureResult, cls).__new__(cls, costs, error_no, all_cost, timestamp)
+        self.repeats = repeats
+        self.reused = reused
+        return self
+
     def __repr__(self):
         error_no_str = (
             str(MeasureErrorNo(self.error_no))
@@ -61,7 +77,8 @@ class MeasureResult(namedtuple("MeasureResult", ["costs", "error_no", "all_cost"
         )
         return (
             f"{self.__class__.__name__}(costs={self.costs!r}, error_no={error_no_str}, "
-            f"all_cost={self.all_cost}, timestamp={self.timestamp!r})"
+            f"all_cost={self.all_cost}, timestamp={self.timestamp!r}, repeats={self.repeats}, "
+            f"reused={self.reused})"
         )
 
 
@@ -99,6 +116,8 @@ class Builder(object):
         self.user_build_kwargs = build_kwargs if build_kwargs is not None else {}
         self.runner_build_kwargs = None
         self.task = None
+        # the maximum number of built batches that wait to be run, set by a pipelined tuner
+        self.pipeline_depth = 1
 
     def set_task(self, task, build_kwargs=None):
         """
@@ -139,6 +158,18 @@ class Builder(object):
         """
         raise NotImplementedError()
 
+    def update(self, measure_inputs, results):
+        """Update the builder with the measurement results of its builds.
+        This is called after every batch is run.
+
+        Parameters
+        ----------
+        measure_inputs: List of MeasureInput
+            The measure input
+        results: List of MeasureResult
+            The final results of measurement
+        """
+
 
 class Runner(object):
     """Runner that runs and measures the time cost of a generated program in tuning
@@ -156,6 +187,8 @@ class Runner(object):
         self.timeout = timeout
         self.n_parallel = n_parallel or multiprocessing.cpu_count()
         self.task = None
+        # the best mean cost found by the tuner of the current task, set by the tuner
+        self.best_cost = None
 
     def set_task(self, task):
         """
@@ -167,6 +200,11 @@ class Runner(object):
             The tuning task
         """
         self.task = task
+        self.best_cost = None
+
+    def close(self):
+        """Release the resources that are kept across tasks, e.g. local rpc servers.
+        The runner can still be used afterwards."""
 
     def get_build_kwargs(self):
         """
@@ -289,8 +327,11 @@ def create_measure_batch(task, option):
     def measure_batch(measure_inputs):
         build_results = builder.build(measure_inputs)
         results = runner.run(measure_inputs, build_results)
+        builder.update(measure_inputs, results)
         return results
 
     measure_batch.n_parallel = builder.n_parallel
+    measure_batch.builder = builder
+    measure_batch.runner = runner
     measure_batch.attach_objects = attach_objects
     return measure_batch
@@ -32,9 +32,11 @@ import time
 import traceback
 import typing
 import warnings
-from collections import namedtuple
+import weakref
+from collections import deque, namedtuple
 from random import getrandbits
 
+import numpy as np
 import tvm._ffi
 import tvm.ir.transform
 from tvm import nd
@@ -42,7 +44,7 @@ from tvm import rpc as _rpc
 from tvm.autotvm.env import AutotvmGlobalScope, reset_global_scope
 from tvm.contrib import ndk, stackvm, tar
 from tvm.contrib.popen_pool import PopenPoolExecutor
-from tvm.driver import build
+from tvm.driver import build, lower
 from tvm.error import TVMError
 from tvm.target import Target
 
@@ -92,6 +94,12 @@ class LocalBuilder(Builder):
         If False, do not fork when building. Requires n_parallel=1.
     runtime: Optional[Runtime]
         Specify the runtime to generate artifacts for
+    dedup: bool
+        If True, configs whose lowered IRModules are structurally equal on the same target
+        are built and measured only once per task. A duplicate of a config measured in an
+        earlier batch reuses its measurement result, and duplicates within a batch share
+        one build artifact that the runner measures once. Reused results are marked by
+        an `all_cost` of 0 in the tuning log, since no build or run time is spent on them.
     """
 
     def __init__(
@@ -102,6 +110,7 @@ class LocalBuilder(Builder):
         build_func="default",
         do_fork=False,
         runtime=None,
+        dedup=False,
     ):
         super(LocalBuilder, self).__init__(timeout, n_parallel, build_kwargs)
 
@@ -124,17 +133,114 @@ class LocalBuilder(Builder):
             timeout=timeout, initializer=reset_global_scope, initargs=(AutotvmGlobalScope.current,)
         )
         self.tmp_dir = tempfile.mkdtemp()
+        # artifact directories of the batches that are built but not run yet,
+        # shared by the build and run threads of a pipelined tuner
+        self._pending_tmp_dirs = deque()
+        self._pending_lock = threading.Lock()
+
+        self.dedup = dedup
+        # config index -> structural key of its lowered module, for the current task
+        self._structural_keys = {}
+        # structural key -> the first successful measurement result
+        self._measured = {}
+
+    def set_task(self, task, build_kwargs=None):
+        super(LocalBuilder, self).set_task(task, build_kwargs)
+        self._structural_keys = {}
+        self._measured = {}
 
     def build(self, measure_inputs):
-        results = []
+        # Artifacts are removed in update() once their batch is run, so that a batch
+        # can be built while the previous one is still running.
+        with self._pending_lock:
+            if self.tmp_dir not in self._pending_tmp_dirs:
+                shutil.rmtree(self.tmp_dir, ignore_errors=True)
+            self.tmp_dir = tempfile.mkdtemp()
+            self._pending_tmp_dirs.append(self.tmp_dir)
+            # the artifacts of batches beyond the pipeline depth are never run
+            while len(self._pending_tmp_dirs) > max(self.pipeline_depth, 1):
+                shutil.rmtree(self._pending_tmp_dirs.popleft(), ignore_errors=True)
+
+        if not self.dedup:
+            return self._build(measure_inputs)
+
+        keys, lowered_mods = self._lower(measure_inputs)
+        results = [None] * len(measure_inputs)
+        first_of = {}
+        to_build = []
+        for k, (inp, key) in enumerate(zip(measure_inputs, keys)):
+            if key is None:
+                to_build.append(k)
+                continue
+            self._structural_keys[inp.config.index] = key
+            if key in self._measured:
+                results[k] = reuse_measure_result(self._measured[key])
+            elif key not in first_of:
+                first_of[key] = k
+                to_build.append(k)
+
+        built = self._build(
+            [measure_inputs[k] for k in to_build], [lowered_mods[k] for k in to_build]
+        )
+        for k, res in zip(to_build, built):
+            results[k] = res
+        # duplicates in this batch share the artifact of the first one
+        for k, key in enumerate(keys):
+            if results[k] is None:
+                results[k] = results[first_of[key]]
+
+        logger.debug(
+            "Build %d of %d configs, the others are structural duplicates",
+            len(to_build),
+            len(measure_inputs),
+        )
+        return results
 
-        shutil.rmtree(self.tmp_dir, ignore_errors=True)
-        self.tmp_dir = tempfile.mkdtemp()
+    def update(self, measure_inputs, results):
+        # batches are run in the order they are built
+        with self._pending_lock:
+            if self._pending_tmp_dirs:
+                shutil.rmtree(self._pending_tmp_dirs.popleft(), ignore_errors=True)
+
+        if not self.dedup:
+            return
+        for inp, res in zip(measure_inputs, results):
+            key = self._structural_keys.get(inp.config.index)
+            if key is not None and res.error_no == 0 and key not in self._measured:
+                self._measured[key] = res
+
+    def _lower(self, measure_inputs):
+        """Lower every input, and get the structural keys and lowered modules,
+        or None on errors"""
+        futures = [
+            self.executor.submit(lowered_structural_key, inp, **self.build_kwargs)
+            for inp in measure_inputs
+        ]
+        keys, lowered_mods = [], []
+        for future in futures:
+            try:
+                key, mod = future.result()
+            except Exception:  # pylint: disable=broad-except
+                # the error is reported again by the actual build
+                key, mod = None, None
+            keys.append(key)
+            lowered_mods.append(mod)
+        return keys, lowered_mods
+
+    def _build(self, measure_inputs, lowered_mods=None):
+        results = []
+        lowered_mods = lowered_mods or [None] * len(measure_inputs)
 
         for i in range(0, len(measure_inputs), self.n_parallel):
             futures = []
-            for inp in measure_inputs[i : i + self.n_parallel]:
-                ret = self.executor.submit(self.build_func, inp, self.tmp_dir, **self.build_kwargs)
+            for inp, mod in zip(
+                measure_inputs[i : i + self.n_parallel], lowered_mods[i : i + self.n_parallel]
+            ):
+                kwargs = dict(self.build_kwargs)
+                if mod is not None:
+                    # the module is already lowered for its structural key
+                    kwargs["lowered_mod"] = mod
+                ret = self.executor.submit(self.build_func, inp, self.tmp_dir, **kwargs)
                 futures.append(ret)
 
             for future in futures:
@@ -235,6 +341,15 @@ class RPCRunner(Runner):
     module_loader : ModuleLoader
         If given, a context manager that loads the module to be timed into the remote runtime.
         If not given, default_module_loader is used.
+    abort_ratio: float, optional
+        If set, measurement is adaptive. The first `repeat` of a candidate is run alone,
+        and the remaining repeats are skipped if it is more than `abort_ratio` times slower
+        than the best cost the tuner has found for the task.
+    noise_threshold: float, optional
+        In adaptive measurement, the relative standard deviation above which a candidate
+        whose costs cannot be told apart from the best cost gets extra repeats.
+    max_extra_repeats: int, optional
+        In adaptive measurement, the maximum number of extra repeats for noisy candidates.
     """
 
     def __init__(
@@ -251,6 +366,9 @@ class RPCRunner(Runner):
         cooldown_interval=0.1,
         enable_cpu_cache_flush=False,
         module_loader=None,
+        abort_ratio=None,
+        noise_threshold=0.05,
+        max_extra_repeats=0,
     ):
         super(RPCRunner, self).__init__(timeout, n_parallel)
 
@@ -269,6 +387,10 @@ class RPCRunner(Runner):
         self.cooldown_interval = cooldown_interval
         self.module_loader = module_loader
 
+        self.abort_ratio = abort_ratio
+        self.noise_threshold = noise_threshold
+        self.max_extra_repeats = max_extra_repeats
+
         self.executor = PopenPoolExecutor(
             timeout=timeout * (self.n_parallel + 1),
             initializer=reset_global_scope,
@@ -297,6 +419,7 @@ class RPCRunner(Runner):
 
     def set_task(self, task):
         self.task = task
+        self.best_cost = None
 
         if check_remote(task.target, self.key, self.host, self.port):
             logger.info("Get devices for measurement successfully!")
@@ -341,11 +464,21 @@ class RPCRunner(Runner):
             timeout=self.timeout,
         )
 
-        for i in range(0, len(measure_inputs), self.n_parallel):
+        # builds that share an artifact (see LocalBuilder dedup) are measured only once
+        unique, duplicate_of, first_of = [], {}, {}
+        for k, build_res in enumerate(build_results):
+            if isinstance(build_res, BuildResult) and build_res.filename is not None:
+                if build_res.filename in first_of:
+                    duplicate_of[k] = first_of[build_res.filename]
+                    continue
+                first_of[build_res.filename] = k
+            unique.append(k)
+        results = [None] * len(build_results)
+
+        for i in range(0, len(unique), self.n_parallel):
             futures = []
-            for measure_inp, build_res in zip(
-                measure_inputs[i : i + self.n_parallel], build_results[i : i + self.n_parallel]
-            ):
+            for k in unique[i : i + self.n_parallel]:
+                measure_inp, build_res = measure_inputs[k], build_results[k]
                 module_loader = (
                     self.module_loader
                     if self.module_loader is not None
@@ -363,21 +496,26 @@ class RPCRunner(Runner):
                     self.ref_input,
                     self.enable_cpu_cache_flush,
                     module_loader,
+                    self.best_cost if self.abort_ratio is not None else None,
+                    self.abort_ratio,
+                    self.noise_threshold,
+                    self.max_extra_repeats,
                 )
                 futures.append(ret)
 
-            for future in futures:
+            for k, future in zip(unique[i : i + self.n_parallel], futures):
                 try:
                     res = future.result()
-                    results.append(res)
+                    results[k] = res
                 except Exception as ex:  # pylint: disable=broad-except
                     tb = traceback.format_exc()
-                    results.append(
-                        MeasureResult(
-                            (tb, ex), MeasureErrorNo.RUN_TIMEOUT, self.timeout, time.time()
-                        )
+                    results[k] = MeasureResult(
+                        (tb, ex), MeasureErrorNo.RUN_TIMEOUT, self.timeout, time.time()
                     )
 
+        for k, first in duplicate_of.items():
+            results[k] = reuse_measure_result(results[first])
+
         return results
 
 
@@ -412,6 +550,25 @@ class LocalRunner(RPCRunner):
         its actual latency during end-to-end inference.
         To make this option effective, the argument `number` should also be set to 1.
         This is only has effect on CPU task.
+    abort_ratio: float, optional
+        If set, measurement is adaptive, see :any:`RPCRunner`.
+    noise_threshold: float, optional
+        The noise threshold of adaptive measurement, see :any:`RPCRunner`.
+    max_extra_repeats: int, optional
+        The maximum number of extra repeats of adaptive measurement, see :any:`RPCRunner`.
+    warm_worker: bool, optional
+        Whether to measure CPU tasks in a persistent warm worker process instead of a
+        local rpc server. The worker keeps its session and the argument buffers of the
+        current task alive across configs, and only loads the module of each config.
+        A crashed or timed out worker is restarted by the executor.
+        Other targets fall back to the rpc server.
+    warm_worker_max_uses: int, optional
+        In warm worker mode, the number of configs a worker measures before it is
+        restarted, which releases the modules loaded into it.
+    worker_cores: list of int, optional
+        In warm worker mode, the CPU cores to pin the worker process and its threads to,
+        for stable timings. By default the worker is not pinned. Targets that fall back
+        to the rpc server are not pinned either.
     Note
     ----
     This is a "fake" local mode. We start a silent rpc tracker and rpc server
@@ -427,7 +584,15 @@ class LocalRunner(RPCRunner):
         cooldown_interval=0.1,
         enable_cpu_cache_flush=False,
         module_loader=None,
+        abort_ratio=None,
+        noise_threshold=0.05,
+        max_extra_repeats=0,
+        warm_worker=False,
+        warm_worker_max_uses=256,
+        worker_cores=None,
     ):
+        if warm_worker and module_loader is not None:
+            raise ValueError("A custom module_loader is not supported in warm worker mode")
         super(LocalRunner, self).__init__(
             "",
             None,
@@ -441,9 +606,26 @@ class LocalRunner(RPCRunner):
             cooldown_interval=cooldown_interval,
             enable_cpu_cache_flush=enable_cpu_cache_flush,
             module_loader=module_loader,
+            abort_ratio=abort_ratio,
+            noise_threshold=noise_threshold,
+            max_extra_repeats=max_extra_repeats,
         )
-        self.tracker = None
-        self.server = None
+        # weak references to the local tracker and server, which are owned by the
+        # measure batches created for this runner
+        self._local_rpc = None
+
+        self.warm_worker = warm_worker
+        self.worker_cores = worker_cores
+        # the executor of the rpc server, which also measures the fallback targets
+        self._rpc_executor = self.executor
+        if warm_worker:
+            # the modules loaded into a worker are only released when it is restarted
+            self._warm_executor = PopenPoolExecutor(
+                timeout=timeout * (self.n_parallel + 1),
+                initializer=_init_warm_worker,
+                initargs=(AutotvmGlobalScope.current, worker_cores),
+                maximum_process_uses=warm_worker_max_uses,
+            )
 
     def set_task(self, task):
         # pylint: disable=import-outside-toplevel
@@ -451,28 +633,90 @@ class LocalRunner(RPCRunner):
         from ...rpc.tracker import Tracker
 
         self.task = task
-        tracker = Tracker(port=9000, port_end=10000, silent=True)
-        device_key = f"$local$device${tracker.port}"
-        server = Server(
-            port=9000,
-            port_end=10000,
-            key=device_key,
-            silent=True,
-            tracker_addr=("127.0.0.1", tracker.port),
-        )
-        self.key = device_key
+        if self.warm_worker:
+            if "cpu" in task.target.keys:
+                self.best_cost = None
+                self.module_loader = WarmModuleLoader()
+                self.executor = self._warm_executor
+                return None, None
+            logger.warning(
+                "Warm worker mode only supports CPU targets, measure %s through rpc", task.target
+            )
+            self.module_loader = None
+            self.executor = self._rpc_executor
+
+        # The local tracker and server do not depend on the task. They are reused when
+        # the runner is set to another task while a measure batch still holds them,
+        # e.g. in every round of a TaskScheduler, and stop with the last one.
+        local_rpc = self._local_rpc_alive()
+        if local_rpc is None:
+            tracker = Tracker(port=9000, port_end=10000, silent=True)
+            server = Server(
+                port=9000,
+                port_end=10000,
+                key=f"$local$device${tracker.port}",
+                silent=True,
+                tracker_addr=("127.0.0.1", tracker.port),
+            )
+            local_rpc = (server, tracker)
+            self._local_rpc = tuple(weakref.ref(x) for x in local_rpc)
+        self.key = f"$local$device${local_rpc[1].port}"
         self.host = "127.0.0.1"
-        self.port = tracker.port
+        self.port = local_rpc[1].port
 
         super(LocalRunner, self).set_task(task)
-        return server, tracker
+        return local_rpc
+
+    def _local_rpc_alive(self):
+        """The local server and tracker if they are still running, otherwise None"""
+        if self._local_rpc is None:
+            return None
+        local_rpc = tuple(ref() for ref in self._local_rpc)
+        if all(x is not None and x.proc is not None and x.proc.is_alive() for x in local_rpc):
+            return local_rpc
+        return None
+
+    def close(self):
+        local_rpc = self._local_rpc_alive()
+        if local_rpc is not None:
+            for x in local_rpc:
+                x.terminate()
+        self._local_rpc = None
+
+
+def _build_pass_context(checks=None, build_option=None):
+    """The pass context of a build, with the validity checks as extra lowering passes"""
+    checks = checks or {}
+    current_pass_context: tvm.ir.transform.PassContext = tvm.ir.transform.PassContext.current()
+    current_config = dict(current_pass_context.config)
+    if build_option is not None:
+        current_config.update(build_option)
+
+    if "tir.add_lower_pass" in current_config:
+        current_add_lower_pass = list(current_config["tir.add_lower_pass"])
+    else:
+        current_add_lower_pass = []
+    if checks.get("gpu"):
+        current_add_lower_pass.append((2, gpu_verify_pass(**checks.get("gpu"))))
+    if checks.get("hexagon"):
+        current_add_lower_pass.append((2, vtcm_verify_pass(**checks.get("hexagon"))))
+    current_config["tir.add_lower_pass"] = current_add_lower_pass
+
+    return tvm.ir.transform.PassContext(
+        opt_level=current_pass_context.opt_level,
+        required_pass=current_pass_context.required_pass,
+        disabled_pass=current_pass_context.disabled_pass,
+        instruments=current_pass_context.instruments,
+        config=current_config,
+    )
 
 
-def _build_func_common(measure_input, runtime=None, checks=None, build_option=None):
+def _build_func_common(
+    measure_input, runtime=None, checks=None, build_option=None, lowered_mod=None
+):
     """Common part for building a configuration"""
     target, task, config = measure_input
     target, task.target_host = Target.canon_target_and_host(target, task.target_host)
-    checks = checks or {}
     with target:
         s, args = task.instantiate(config)
 
@@ -490,34 +734,65 @@ def _build_func_common(measure_input, runtime=None, checks=None, build_option=No
 
             func = vta.build(s, args, target_host=task.target_host)
         else:
-            current_pass_context: tvm.ir.transform.PassContext = (
-                tvm.ir.transform.PassContext.current()
-            )
-            current_config = dict(current_pass_context.config)
-            if build_option is not None:
-                current_config.update(build_option)
-
-            if "tir.add_lower_pass" in current_config:
-                current_add_lower_pass = list(current_config["tir.add_lower_pass"])
-            else:
-                current_add_lower_pass = []
-            if checks.get("gpu"):
-                current_add_lower_pass.append((2, gpu_verify_pass(**checks.get("gpu"))))
-            if checks.get("hexagon"):
-                current_add_lower_pass.append((2, vtcm_verify_pass(**checks.get("hexagon"))))
-            current_config["tir.add_lower_pass"] = current_add_lower_pass
-
-            with tvm.ir.transform.PassContext(
-                opt_level=current_pass_context.opt_level,
-                required_pass=current_pass_context.required_pass,
-                disabled_pass=current_pass_context.disabled_pass,
-                instruments=current_pass_context.instruments,
-                config=current_config,
-            ):
-                func = build(s, args, target=target, runtime=runtime)
+            with _build_pass_context(checks, build_option):
+                if lowered_mod is not None:
+                    # lowered by lowered_structural_key with the same pass context
+                    func = build({target: lowered_mod}, runtime=runtime)
+                else:
+                    func = build(s, args, target=target, runtime=runtime)
     return func, tuple((get_const_tuple(x.shape), x.dtype) for x in args)
 
 
+def lowered_structural_key(measure_input, checks=None, build_option=None):
+    """Lower a configuration as its build would, and get a key that is equal for
+    configurations lowering to structurally equal modules on the same target.
+
+    Parameters
+    ----------
+    measure_input: MeasureInput
+        The input of measurement
+    checks: dict, optional
+        The validity checks of the build
+    build_option: dict, optional
+        The build options
+
+    Returns
+    -------
+    key: str or None
+        The key, or None if the configuration is invalid or not lowered by TVM
+    mod: IRModule or None
+        The lowered module, which can be passed to the build as `lowered_mod`
+    """
+    target, task, config = measure_input
+    if hasattr(target, "device_name") and target.device_name == "vta":
+        return None, None
+    target, task.target_host = Target.canon_target_and_host(target, task.target_host)
+    with target:
+        s, args = task.instantiate(config)
+        if not config.valid():
+            return None, None
+        with _build_pass_context(checks, build_option):
+            mod = lower(s, args)
+    return f"{target}:{tvm.ir.structural_hash(mod)}", mod
+
+
+def reuse_measure_result(result):
+    """Copy the measurement result of a structurally identical configuration.
+    The copy is marked as reused, and no time or repeats are spent on it.
+
+    Parameters
+    ----------
+    result: MeasureResult
+        The result to reuse
+
+    Returns
+    -------
+    result: MeasureResult
+        The reused result
+    """
+    return MeasureResult(result.costs, result.error_no, 0.0, time.time(), 0, reused=True)
+
+
 class _WrappedBuildFunc:
     """
     Wrap build_func to a function that can be used in measure.
@@ -594,6 +869,10 @@ def run_through_rpc(
     ref_input,
     enable_cpu_cache_flush=False,
     module_loader=None,
+    best_cost=None,
+    abort_ratio=None,
+    noise_threshold=0.05,
+    max_extra_repeats=0,
 ):
     """Run a generated library through rpc
 
@@ -633,6 +912,17 @@ def run_through_rpc(
         This is only has effect on CPU task.
     module_loader: ModuleLoader
         A function that returns a ContextManager used to establish and teardown the remote session.
+    best_cost: float, optional
+        The best cost measured so far. Measurement is adaptive if both best_cost
+        and abort_ratio are given.
+    abort_ratio: float, optional
+        The remaining repeats are skipped if the first repeat is more than abort_ratio
+        times slower than best_cost.
+    noise_threshold: float, optional
+        The relative standard deviation above which a candidate whose costs cannot be
+        told apart from best_cost gets extra repeats.
+    max_extra_repeats: int, optional
+        The maximum number of extra repeats for noisy candidates.
     """
     if isinstance(build_result, MeasureResult):
         return build_result
@@ -650,38 +940,45 @@ def run_through_rpc(
             # the PackedFunc as an object. Currently, we pass function name to work
             # around it.
             f_prepare = "cache_flush_cpu_non_first_arg" if enable_cpu_cache_flush else ""
-            time_f = mod.time_evaluator(
-                mod.entry_name,
-                dev,
-                number=number,
-                repeat=repeat,
-                min_repeat_ms=min_repeat_ms,
-                f_preproc=f_prepare,
-            )
 
-            if ref_input:
-                args = [nd.array(x, device=dev) for x in ref_input]
-            else:
-                try:
-                    random_fill = remote.get_function("tvm.contrib.random.random_fill")
-                except AttributeError:
-                    raise AttributeError(
-                        "Please make sure USE_RANDOM is ON in the config.cmake "
-                        "on the remote devices"
-                    )
-                args = [nd.empty(x[0], x[1], dev) for x in build_result.arg_info]
-                if "scatter" not in measure_input.task.name:
-                    # the index tensor of scatter op cannot be randomly initialized
-                    for arg in args:
-                        random_fill(arg)
-                dev.sync()
+            def _time(n_repeat):
+                time_f = mod.time_evaluator(
+                    mod.entry_name,
+                    dev,
+                    number=number,
+                    repeat=n_repeat,
+                    min_repeat_ms=min_repeat_ms,
+                    f_preproc=f_prepare,
+                )
+                return list(time_f(*args).results)
+
+            alloc_args = getattr(module_loader, "alloc_args", _alloc_args)
+            args = alloc_args(remote, dev, measure_input, build_result, ref_input)
 
-            costs = time_f(*args).results
+            if best_cost is None or abort_ratio is None:
+                costs = _time(repeat)
+            else:
+                costs = _time(1)
+                # skip the remaining repeats of a clearly dominated candidate
+                if repeat > 1 and costs[0] <= abort_ratio * best_cost:
+                    costs += _time(repeat - 1)
+                    # add repeats while the candidate cannot be told apart from the best
+                    extra = 0
+                    while extra < max_extra_repeats:
+                        mean, std = np.mean(costs), np.std(costs)
+                        if std <= noise_threshold * mean or abs(mean - best_cost) > 2 * std:
+                            break
+                        n_repeat = min(repeat, max_extra_repeats - extra)
+                        costs += _time(n_repeat)
+                        extra += n_repeat
+        repeats = len(costs)
 
         if len(costs) > 2:  # remove largest and smallest value to reduce variance
             costs = list(costs)
             costs.sort()
             costs = tuple(costs[1:-1])
+        else:
+            costs = tuple(costs)
     except TVMError as exc:
         msg = str(exc)
         if "Stack trace returned" in msg:
@@ -690,9 +987,89 @@ def run_through_rpc(
             msg = msg[: msg.index("CUDA Source")]
         costs = (traceback.format_exc(), RuntimeError(msg[:1024]))
         errno = MeasureErrorNo.RUNTIME_DEVICE
+        repeats = None
     tstamp = time.time()
     time.sleep(cooldown_interval)
-    return MeasureResult(costs, errno, tstamp - tic + build_result.time_cost, tstamp)
+    return MeasureResult(costs, errno, tstamp - tic + build_result.time_cost, tstamp, repeats)
+
+
+def _alloc_args(remote, dev, measure_input, build_result, ref_input):
+    """Allocate the arguments of a built module on the device, randomly filled
+    unless the reference input is given"""
+    if ref_input:
+        return [nd.array(x, device=dev) for x in ref_input]
+
+    try:
+        random_fill = remote.get_function("tvm.contrib.random.random_fill")
+    except AttributeError:
+        raise AttributeError(
+            "Please make sure USE_RANDOM is ON in the config.cmake on the remote devices"
+        )
+    args = [nd.empty(x[0], x[1], dev) for x in build_result.arg_info]
+    if "scatter" not in measure_input.task.name:
+        # the index tensor of scatter op cannot be randomly initialized
+        for arg in args:
+            random_fill(arg)
+    dev.sync()
+    return args
+
+
+# The session and argument buffers kept alive in a warm worker process
+_WARM_WORKER_STATE = {}
+
+
+def _init_warm_worker(global_scope, cores=None):
+    """Initialize a warm measurement worker process of LocalRunner
+
+    Parameters
+    ----------
+    global_scope: AutotvmGlobalScope
+        The global autotvm state to copy into the worker
+    cores: list of int, optional
+        The CPU cores to pin the worker and its thread pool to
+    """
+    reset_global_scope(global_scope)
+    if cores:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cores)
+            # the thread pool of the runtime is created lazily with this number of threads
+            os.environ["TVM_NUM_THREADS"] = str(len(cores))
+        else:
+            logger.warning("Cannot pin the measurement worker to cores on this platform")
+
+
+class WarmModuleLoader:
+    """The module loader of the warm worker mode of LocalRunner.
+
+    The module is loaded into the worker process itself through a local session,
+    which is created once per worker. The argument buffers of the last measured
+    workload are reused as long as the argument shapes and dtypes do not change.
+    """
+
+    @contextlib.contextmanager
+    def __call__(self, remote_kwargs, build_result):
+        if "session" not in _WARM_WORKER_STATE:
+            _WARM_WORKER_STATE["session"] = _rpc.LocalSession()
+        yield _WARM_WORKER_STATE["session"], tvm.runtime.load_module(build_result.filename)
+
+    @staticmethod
+    def alloc_args(remote, dev, measure_input, build_result, ref_input):
+        """Allocate the arguments, or reuse the ones of the previous config"""
+        if ref_input:
+            return _alloc_args(remote, dev, measure_input, build_result, ref_input)
+
+        key = (
+            str(dev),
+            measure_input.task.name,
+            tuple((tuple(shape), dtype) for shape, dtype in build_result.arg_info),
+        )
+        cached = _WARM_WORKER_STATE.get("args")
+        if cached is None or cached[0] != key:
+            # only keep the buffers of one workload alive
+            _WARM_WORKER_STATE.pop("args", None)
+            args = _alloc_args(remote, dev, measure_input, build_result, ref_input)
+            cached = _WARM_WORKER_STATE["args"] = (key, args)
+        return cached[1]
 
 
 class DefaultModuleLoader:
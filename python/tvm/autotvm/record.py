@@ -20,15 +20,19 @@
 
 import argparse
 import base64
+from contextlib import ExitStack
+import heapq
 from io import TextIOBase
 import logging
 import pickle
 import json
+import struct
+import tempfile
 import time
 from typing import Union
 import os
 import itertools
-from collections import OrderedDict
+from collections import deque
 import numpy as np
 
 from .. import build, lower
@@ -36,11 +40,17 @@ from ..target import Target
 from ..contrib import popen_pool
 from .. import __version__
 from . import task
-from .task import ConfigEntity, ApplyHistoryBest
+from .task import ConfigEntity
 from .measure import MeasureInput, MeasureResult
 
 AUTOTVM_LOG_VERSION = 0.2
 _old_version_warning = True
+
+# Header of binary record files and the frame header of every record in them.
+BINARY_LOG_MAGIC = b"TVMAUTOTVM\x00BIN\x01"
+BINARY_INDEX_SUFFIX = ".idx"
+_FRAME_HEADER = struct.Struct("<I")
+
 logger = logging.getLogger("autotvm")
 
 try:  # convert unicode to str for python2
@@ -84,12 +94,13 @@ def encode(inp, result, protocol="json"):
     result: autotvm.measure.MeasureResult
         pair of input/result
     protocol: str
-        log protocol, json or pickle
+        log protocol, json, pickle or binary
 
     Returns
     -------
-    row: str
-        a row in the logger file
+    row: str or bytes
+        a row in the logger file. The binary protocol returns the raw bytes payload
+        of a record, see :any:`BinaryRecordWriter`.
     """
 
     if protocol == "json":
@@ -105,6 +116,8 @@ def encode(inp, result, protocol="json"):
             "version": AUTOTVM_LOG_VERSION,
             "tvm_version": __version__,
         }
+        if result.reused:
+            json_dict["reused"] = True
         return json.dumps(json_dict)
     if protocol == "pickle":
         row = (
@@ -115,25 +128,141 @@ def encode(inp, result, protocol="json"):
                 ).decode()
             ),
             str(base64.b64encode(pickle.dumps(inp.config)).decode()),
-            str(base64.b64encode(pickle.dumps(tuple(result))).decode()),
+            str(base64.b64encode(pickle.dumps(tuple(result)[:4])).decode()),
             str(AUTOTVM_LOG_VERSION),
             str(__version__),
         )
+        if result.reused:
+            row += ("reused",)
         return "\t".join(row)
+    if protocol == "binary":
+        row = (
+            str(inp.target),
+            inp.task.name,
+            inp.task.args,
+            inp.task.kwargs,
+            inp.config.to_json_dict(),
+            (
+                result.costs if result.error_no == 0 else (1e9,),
+                result.error_no,
+                result.all_cost,
+                result.timestamp,
+            ),
+            AUTOTVM_LOG_VERSION,
+            __version__,
+        )
+        if result.reused:
+            row += (True,)
+        return pickle.dumps(row, protocol=pickle.HIGHEST_PROTOCOL)
 
     raise RuntimeError("Invalid log protocol: " + protocol)
 
 
+# Decoded targets and task tuples are interned, so that the rows of a log share them.
+_DECODE_CACHE_SIZE = 65536
+_target_cache = {}
+_task_tuple_cache = {}
+
+
+def _intern_target(tgt):
+    """Get the Target of a target string, parsing each distinct string only once"""
+    ret = _target_cache.get(tgt)
+    if ret is None:
+        if len(_target_cache) >= _DECODE_CACHE_SIZE:
+            _target_cache.clear()
+        ret = _target_cache[tgt] = Target(tgt)
+    return ret
+
+
+def _intern_task_tuple(task_name, task_args):
+    """Get the shared (task_name, task_args) tuple equal to the given one"""
+    key = (task_name, task_args)
+    ret = _task_tuple_cache.get(key)
+    if ret is None:
+        if len(_task_tuple_cache) >= _DECODE_CACHE_SIZE:
+            _task_tuple_cache.clear()
+        ret = _task_tuple_cache[key] = key
+    return ret
+
+
+def _clean_json_to_python(x):
+    """1. Convert all list in x to tuple (hashable)
+    2. Convert unicode to str for python2
+    """
+    if isinstance(x, list):
+        return tuple([_clean_json_to_python(a) for a in x])
+    if isinstance(x, _unicode):
+        return str(x)
+    if isinstance(x, (_long, int)):
+        return int(x)
+    return x
+
+
+def _parse_json_row(row):
+    """Parse a json row into picklable python fields.
+    This is the part of json decoding that does not create any tvm object,
+    so it can run in a worker process.
+
+    Returns
+    -------
+    fields : tuple or None
+        (target string, task name, task args, config json dict, result tuple, reused),
+        or None if the row uses old version log format.
+    """
+    row = json.loads(row)
+    if "v" in row and row["v"] == 0.1:
+        return None
+
+    tgt, task_name, task_args, _ = row["input"]
+    tgt = str(tgt)
+    if "-target" in tgt:
+        logger.warning('"-target" is deprecated, use "-mtriple" instead.')
+        tgt = tgt.replace("-target", "-mtriple")
+
+    return (
+        tgt,
+        _clean_json_to_python(task_name),
+        _clean_json_to_python(task_args),
+        row["config"],
+        tuple([tuple(x) if isinstance(x, list) else x for x in row["result"]]),
+        row.get("reused", False),
+    )
+
+
+def _parse_json_rows(rows):
+    """Parse a chunk of rows of a json log, skipping comments"""
+    return [_parse_json_row(row) for row in rows if row and not row.startswith("#")]
+
+
+def _build_record(fields):
+    """Build (MeasureInput, MeasureResult) from the fields returned by _parse_json_row"""
+    global _old_version_warning
+
+    if fields is None:
+        if _old_version_warning:
+            logger.warning("AutoTVM log version 0.1 is no longer supported.")
+            _old_version_warning = False
+        return None
+
+    tgt, task_name, task_args, config_dict, result, reused = fields
+    tsk = task.Task(*_intern_task_tuple(task_name, task_args))
+    config = ConfigEntity.from_json_dict(config_dict)
+    inp = MeasureInput(_intern_target(tgt), tsk, config)
+    result = MeasureResult(*result, reused=reused)
+    config.cost = np.mean(result.costs)
+    return inp, result
+
+
 def decode(row, protocol="json"):
     """Decode encoded record string to python object
 
     Parameters
     ----------
-    row : str
+    row : str or bytes
         a row in the logger file
 
     protocol : str
-        log protocol, json or pickle
+        log protocol, json, pickle or binary
 
     Returns
     -------
@@ -144,39 +273,7 @@ def decode(row, protocol="json"):
     global _old_version_warning
 
     if protocol == "json":
-        row = json.loads(row)
-        if "v" in row and row["v"] == 0.1:
-            if _old_version_warning:
-                logger.warning("AutoTVM log version 0.1 is no longer supported.")
-                _old_version_warning = False
-            return None
-
-        tgt, task_name, task_args, task_kwargs = row["input"]
-        tgt = str(tgt)
-        if "-target" in tgt:
-            logger.warning('"-target" is deprecated, use "-mtriple" instead.')
-            tgt = tgt.replace("-target", "-mtriple")
-        tgt = Target(str(tgt))
-
-        def clean_json_to_python(x):
-            """1. Convert all list in x to tuple (hashable)
-            2. Convert unicode to str for python2
-            """
-            if isinstance(x, list):
-                return tuple([clean_json_to_python(a) for a in x])
-            if isinstance(x, _unicode):
-                return str(x)
-            if isinstance(x, (_long, int)):
-                return int(x)
-            return x
-
-        tsk = task.Task(clean_json_to_python(task_name), clean_json_to_python(task_args))
-        config = ConfigEntity.from_json_dict(row["config"])
-        inp = MeasureInput(tgt, tsk, config)
-        result = MeasureResult(*[tuple(x) if isinstance(x, list) else x for x in row["result"]])
-        config.cost = np.mean(result.costs)
-
-        return inp, result
+        return _build_record(_parse_json_row(row))
     if protocol == "pickle":
         items = row.split("\t")
         if len(items) == 4:
@@ -184,18 +281,252 @@ def decode(row, protocol="json"):
                 logger.warning("AutoTVM log version 0.1 is no longer supported.")
                 _old_version_warning = False
             return None
-        tgt = Target(items[0])
+        tgt = _intern_target(items[0])
         task_tuple = pickle.loads(base64.b64decode(items[1].encode()))
         config = pickle.loads(base64.b64decode(items[2].encode()))
-        result = MeasureResult(*pickle.loads(base64.b64decode(items[3].encode())))
+        result = MeasureResult(
+            *pickle.loads(base64.b64decode(items[3].encode())), reused=len(items) > 6
+        )
         config.cost = np.mean(result.costs)
 
         tsk = task.Task(task_tuple[0], task_tuple[1])
         return MeasureInput(tgt, tsk, config), result
+    if protocol == "binary":
+        tgt, task_name, task_args, _, config_dict, result_tuple, *extra = pickle.loads(row)
+        tsk = task.Task(*_intern_task_tuple(task_name, task_args))
+        config = ConfigEntity.from_json_dict(config_dict)
+        # the fields after the versions are only written for reused results
+        result = MeasureResult(*result_tuple, reused=len(extra) > 2)
+        config.cost = np.mean(result.costs)
+        return MeasureInput(_intern_target(tgt), tsk, config), result
 
     raise RuntimeError("Invalid log protocol: " + protocol)
 
 
+def is_binary_record_file(filepath: Union[str, bytes, os.PathLike]):
+    """Check whether a file is a binary record file written by :any:`BinaryRecordWriter`.
+
+    Parameters
+    ----------
+    filepath: str, bytes, or os.PathLike
+
+    Returns
+    -------
+    ret: bool
+        Whether the file starts with the binary log header.
+    """
+    if not os.path.isfile(filepath):
+        return False
+    with open(filepath, "rb") as f:
+        return f.read(len(BINARY_LOG_MAGIC)) == BINARY_LOG_MAGIC
+
+
+def _read_binary_frame(f, offset):
+    """Read the payload of the record frame starting at offset, or None if it is incomplete"""
+    f.seek(offset)
+    header = f.read(_FRAME_HEADER.size)
+    if len(header) < _FRAME_HEADER.size:
+        return None
+    (size,) = _FRAME_HEADER.unpack(header)
+    payload = f.read(size)
+    if len(payload) < size:
+        return None
+    return payload
+
+
+def _iter_binary_frames(f, start):
+    """Yield (offset, end, payload) for every complete record frame after start"""
+    offset = start
+    while True:
+        payload = _read_binary_frame(f, offset)
+        if payload is None:
+            # end of file, or a partially written record of an interrupted writer
+            return
+        end = f.tell()
+        yield offset, end, payload
+        offset = end
+
+
+def _binary_index_entry(inp, result, offset, end):
+    """The sidecar index entry of a record"""
+    cost = float(np.mean(result.costs)) if result.error_no == 0 else float("inf")
+    return (
+        offset,
+        end,
+        result.error_no,
+        cost,
+        tuple(str(k) for k in inp.target.keys),
+        str(inp.target.model),
+        inp.task.workload,
+    )
+
+
+class BinaryRecordIndex(object):
+    """The sidecar index of a binary record file.
+
+    The index stores the offset, cost, target keys, target model and workload of every
+    record in the binary log. Loading it only unpickles these small entries, so the best
+    record of each (target key, workload) and (target model, workload) pair is known
+    without decoding any record. Records appended after the last index update
+    are indexed when the index is loaded.
+
+    Parameters
+    ----------
+    filepath: str, bytes, or os.PathLike
+        The path of the binary record file.
+    """
+
+    def __init__(self, filepath: Union[str, bytes, os.PathLike]):
+        self.filepath = os.fsdecode(filepath)
+        self.index_path = self.filepath + BINARY_INDEX_SUFFIX
+        # (target key, workload) -> (cost, offset)
+        self.best_by_targetkey = {}
+        # (target model, workload) -> (cost, offset)
+        self.best_by_model = {}
+        # the end of the last indexed record
+        self.indexed_end = len(BINARY_LOG_MAGIC)
+        self._load()
+
+    def _add(self, entry):
+        offset, end, error_no, cost, keys, model, workload = entry
+        self.indexed_end = max(self.indexed_end, end)
+        if error_no != 0:
+            return
+
+        for k in keys:
+            key = (k, workload)
+            if key not in self.best_by_targetkey or self.best_by_targetkey[key][0] > cost:
+                self.best_by_targetkey[key] = (cost, offset)
+
+        if model != "unknown":
+            key = (model, workload)
+            if key not in self.best_by_model or self.best_by_model[key][0] > cost:
+                self.best_by_model[key] = (cost, offset)
+
+    def _load(self):
+        if os.path.isfile(self.index_path):
+            valid_end = 0
+            with open(self.index_path, "rb") as f:
+                while True:
+                    try:
+                        entry = pickle.load(f)
+                    except (EOFError, pickle.UnpicklingError):
+                        break
+                    self._add(entry)
+                    valid_end = f.tell()
+            if os.path.getsize(self.index_path) > valid_end:
+                # drop the partially written entry of an interrupted writer
+                logger.warning("Truncate the corrupted tail of %s", self.index_path)
+                with open(self.index_path, "rb+") as f:
+                    f.truncate(valid_end)
+
+        new_entries = []
+        with open(self.filepath, "rb") as f:
+            for offset, end, payload in _iter_binary_frames(f, self.indexed_end):
+                inp, res = decode(payload, "binary")
+                entry = _binary_index_entry(inp, res, offset, end)
+                self._add(entry)
+                new_entries.append(entry)
+
+        if new_entries:
+            try:
+                with open(self.index_path, "ab") as f:
+                    for entry in new_entries:
+                        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            except OSError:
+                logger.warning("Cannot update the record index %s", self.index_path)
+
+    def best_offsets(self):
+        """Get the offsets of all the best records in ascending order
+
+        Returns
+        -------
+        offsets: List[int]
+        """
+        offsets = set(offset for _, offset in self.best_by_targetkey.values())
+        offsets.update(offset for _, offset in self.best_by_model.values())
+        return sorted(offsets)
+
+    def read(self, offset):
+        """Decode the record at offset
+
+        Parameters
+        ----------
+        offset: int
+            The offset of the record in the binary log
+
+        Returns
+        -------
+        ret : tuple(autotvm.measure.MeasureInput, autotvm.measure.MeasureResult)
+        """
+        with open(self.filepath, "rb") as f:
+            return decode(_read_binary_frame(f, offset), "binary")
+
+    def load_best(self):
+        """Decode only the best records of the binary log
+
+        Returns
+        -------
+        records: List[Tuple[autotvm.measure.MeasureInput, autotvm.measure.MeasureResult]]
+        """
+        with open(self.filepath, "rb") as f:
+            return [
+                decode(_read_binary_frame(f, offset), "binary") for offset in self.best_offsets()
+            ]
+
+
+class BinaryRecordWriter(object):
+    """Append tuning records to a binary record file and keep its sidecar index up to date.
+
+    A binary record file starts with :code:`BINARY_LOG_MAGIC` and is followed by
+    length-prefixed records in the format of ``encode(inp, result, "binary")``.
+    The file is append-only. Only one writer should append to a file at a time.
+
+    Parameters
+    ----------
+    filepath: str, bytes, or os.PathLike
+        The path of the binary record file. It is created if it does not exist.
+    """
+
+    def __init__(self, filepath: Union[str, bytes, os.PathLike]):
+        self.filepath = os.fsdecode(filepath)
+        self.index_path = self.filepath + BINARY_INDEX_SUFFIX
+        if not os.path.isfile(self.filepath) or os.path.getsize(self.filepath) == 0:
+            with open(self.filepath, "wb") as f:
+                f.write(BINARY_LOG_MAGIC)
+            if os.path.isfile(self.index_path):
+                os.remove(self.index_path)
+        elif not is_binary_record_file(self.filepath):
+            raise RuntimeError(f"{self.filepath} is not a binary record file")
+        else:
+            # index the records of an interrupted writer and drop its partial record
+            indexed_end = BinaryRecordIndex(self.filepath).indexed_end
+            if os.path.getsize(self.filepath) > indexed_end:
+                with open(self.filepath, "rb+") as f:
+                    f.truncate(indexed_end)
+
+    def append(self, inputs, results):
+        """Append a batch of records
+
+        Parameters
+        ----------
+        inputs: List[autotvm.measure.MeasureInput]
+        results: List[autotvm.measure.MeasureResult]
+        """
+        entries = []
+        with open(self.filepath, "ab") as f:
+            for inp, result in zip(inputs, results):
+                payload = encode(inp, result, "binary")
+                offset = f.tell()
+                f.write(_FRAME_HEADER.pack(len(payload)))
+                f.write(payload)
+                entries.append(_binary_index_entry(inp, result, offset, f.tell()))
+
+        with open(self.index_path, "ab") as f:
+            for entry in entries:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
 def load_from_buffer(file: TextIOBase):
     """Generator: load records from buffer.
     This is a generator that yields the records.
@@ -217,147 +548,424 @@ def load_from_buffer(file: TextIOBase):
             yield ret
 
 
-def load_from_file(filepath: Union[str, bytes, os.PathLike]):
+def load_from_file(
+    filepath: Union[str, bytes, os.PathLike], workers: int = None, chunk_size: int = 4096
+):
     """Generator: load records from path.
     This is a generator that yields the records.
+    Both text logs and binary record files are supported.
 
     Parameters
     ----------
     filepath: str, bytes, or os.PathLike
+    workers: int, optional
+        The number of worker processes that parse the json rows of a text log.
+        If it is None or 1, the rows are parsed in the current process.
+        Records are yielded in file order in both cases.
+    chunk_size: int, optional
+        The number of rows sent to a worker process at once.
 
     Yields
     ------
     input: autotvm.measure.MeasureInput
     result: autotvm.measure.MeasureResult
     """
-    with open(filepath) as f:
-        for row in f:
-            if row and not row.startswith("#"):
-                ret = decode(row)
-                if ret is None:
-                    continue
+    if is_binary_record_file(filepath):
+        with open(filepath, "rb") as f:
+            for _, _, payload in _iter_binary_frames(f, len(BINARY_LOG_MAGIC)):
+                yield decode(payload, "binary")
+        return
+
+    if workers is None or workers <= 1:
+        with open(filepath) as f:
+            for row in f:
+                if row and not row.startswith("#"):
+                    ret = decode(row)
+                    if ret is None:
+                        continue
+                    yield ret
+        return
+
+    # Parse chunks of rows in worker processes. Tvm objects are only built here,
+    # where targets and task tuples are interned.
+    pool = popen_pool.PopenPoolExecutor(max_workers=workers)
+    pending = deque()
+
+    def _build_chunk(future):
+        for fields in future.result():
+            ret = _build_record(fields)
+            if ret is not None:
                 yield ret
 
+    # the pool is also shut down when the generator is closed before it is exhausted
+    try:
+        with open(filepath) as f:
+            for chunk in iter(lambda: list(itertools.islice(f, chunk_size)), []):
+                pending.append(pool.submit(_parse_json_rows, chunk))
+                if len(pending) >= 2 * workers:
+                    yield from _build_chunk(pending.popleft())
+        while pending:
+            yield from _build_chunk(pending.popleft())
+    finally:
+        pool.shutdown()
+
+
+def load_from_file_offset(filepath: Union[str, bytes, os.PathLike], start: int = 0):
+    """Generator: load records from path, starting at a byte offset.
+    This is a generator that yields the records together with the byte offset right after
+    each of them, so that a reader can resume from there once more records are appended.
+    A partially written record at the end of the file is not yielded.
+
+    Parameters
+    ----------
+    filepath: str, bytes, or os.PathLike
+    start: int, optional
+        The byte offset to start reading from. It must be 0 or an offset
+        previously yielded by this function.
+
+    Yields
+    ------
+    input: autotvm.measure.MeasureInput or None
+    result: autotvm.measure.MeasureResult or None
+        None for comments and records of unsupported versions.
+    end: int
+        The byte offset after the record
+    """
+    if is_binary_record_file(filepath):
+        with open(filepath, "rb") as f:
+            for _, end, payload in _iter_binary_frames(f, max(start, len(BINARY_LOG_MAGIC))):
+                inp, res = decode(payload, "binary")
+                yield inp, res, end
+        return
+
+    with open(filepath, "rb") as f:
+        f.seek(start)
+        while True:
+            row = f.readline()
+            if not row.endswith(b"\n"):
+                return
+            end = f.tell()
+            row = row.decode()
+            ret = decode(row) if row.strip() and not row.startswith("#") else None
+            if ret is None:
+                yield None, None, end
+            else:
+                yield ret[0], ret[1], end
+
+
+def _as_file_list(in_files):
+    """Normalize one or several log files to a list of files"""
+    if isinstance(in_files, (str, bytes, os.PathLike)):
+        return [in_files]
+    return list(in_files)
+
+
+def _external_sort(items, max_memory, tmp_dir=None):
+    """Generator: sort (key, row) pairs within a memory budget.
+    Pairs are buffered and sorted in memory. Once the buffer exceeds the budget,
+    it is written to a sorted run file, and the run files are merged at the end.
+
+    Parameters
+    ----------
+    items: iterable of (tuple, str)
+        The pairs to sort. Keys are tuples of json serializable values and must be unique.
+    max_memory: int
+        The approximate number of bytes of pairs to buffer in memory.
+    tmp_dir: str, optional
+        The directory of the run files. Defaults to the system temporary directory.
+
+    Yields
+    ------
+    key: tuple
+    row: str
+    """
+    with tempfile.TemporaryDirectory(prefix="autotvm_sort_", dir=tmp_dir) as run_dir:
+        runs = []
+        buf, nbytes = [], 0
+        for key, row in items:
+            buf.append((key, row))
+            # rough size of the key, the row and the containers
+            nbytes += len(row) + 256
+            if nbytes >= max_memory:
+                buf.sort()
+                runs.append(os.path.join(run_dir, f"{len(runs)}.run"))
+                with open(runs[-1], "w") as fout:
+                    for item in buf:
+                        fout.write(json.dumps(item) + "\n")
+                buf, nbytes = [], 0
+        buf.sort()
+        if not runs:
+            yield from buf
+            return
+
+        logger.info("Merge %d sorted runs", len(runs) + 1)
+        files = [open(run) for run in runs]
+        try:
+            streams = [((tuple(key), row) for key, row in map(json.loads, f)) for f in files]
+            yield from heapq.merge(buf, *streams)
+        finally:
+            for f in files:
+                f.close()
+
+
+def _sort_by_workload(in_files, clean, max_memory, tmp_dir):
+    """Generator: the records of log files grouped by workload, in the order of the first
+    appearance of the workloads, with an external sort.
+
+    Yields
+    ------
+    wkl_idx: int
+        The index of the workload
+    wkl: str
+        The workload key
+    row: str
+        The encoded record
+    """
+    wkl_ids = {}
+
+    def _keyed_records():
+        seq = 0
+        for in_file in in_files:
+            for inp, res in load_from_file(in_file, workers=os.cpu_count()):
+                wkl_idx = wkl_ids.setdefault(measure_str_key(inp, False), len(wkl_ids))
+                # duplicated records of a workload become adjacent if sorted by config
+                config = measure_str_key(inp) if clean else ""
+                yield (wkl_idx, config, seq), encode(inp, res)
+                seq += 1
+
+    sorted_records = _external_sort(_keyed_records(), max_memory, tmp_dir)
+    wkls = None
+    for wkl_idx, group in itertools.groupby(sorted_records, key=lambda x: x[0][0]):
+        # all the records have been read once the first sorted one is out
+        wkls = wkls or list(wkl_ids)
+        num, num_dup, last = 0, 0, None
+        for (_, config, _), row in group:
+            if clean and config == last:
+                num_dup += 1
+                continue
+            last = config
+            num += 1
+            yield wkl_idx, wkls[wkl_idx], row
+        if clean:
+            logger.info("Key: %s\tValid: %d\tDup: %d\t", wkls[wkl_idx], num, num_dup)
+        else:
+            logger.info("Key: %s\tNum: %d", wkls[wkl_idx], num)
+
 
-def split_workload(in_file, clean=True):
-    """Split a log file into separate files, each of which contains only a single workload
+def split_workload(in_file, clean=True, out_prefix=None, max_memory=1 << 30, tmp_dir=None):
+    """Split log files into separate files, each of which contains only a single workload
     This function can also delete duplicated records in log file
 
+    The records are split with an external sort, so the memory usage is bounded by
+    `max_memory` regardless of the size of the log files. Without cleaning, the records
+    of a workload keep their order in the log files. With cleaning, they are sorted by
+    config and the first of the duplicated records is kept.
+
     Parameters
     ----------
-    in_file: str
-        input filename
+    in_file: str or list of str
+        input filename(s)
     clean: bool
         whether delete duplicated items
+    out_prefix: str, optional
+        The prefix of the output files, which are named `<out_prefix>.<index>.wkl`.
+        Defaults to the (first) input filename.
+    max_memory: int, optional
+        The approximate number of bytes of records to sort in memory
+    tmp_dir: str, optional
+        The directory of the temporary files of the external sort
+
+    Returns
+    -------
+    out_files: list of str
+        The output filenames, in the order of the first appearance of the workloads
     """
+    in_files = _as_file_list(in_file)
+    out_prefix = out_prefix or os.fsdecode(in_files[0])
     tic = time.time()
-    lines = list(open(in_file).readlines())
 
     logger.info("start converting...")
-    pool = popen_pool.PopenPoolExecutor()
-    lines = [rec for rec in pool.map(decode, lines) if rec is not None]
-    logger.info("map done %.2f", time.time() - tic)
-
-    wkl_dict = OrderedDict()
-    for inp, res in lines:
-        wkl = measure_str_key(inp, False)
-        if wkl not in wkl_dict:
-            wkl_dict[wkl] = []
-        wkl_dict[wkl].append([inp, res])
-
-    if clean:
-        for i, (k, v) in enumerate(wkl_dict.items()):
-            # clean duplicated items
-            added = set()
-            cleaned = []
-            for inp, res in v:
-                str_key = measure_str_key(inp)
-                if str_key in added:
-                    continue
-                added.add(str_key)
-                cleaned.append([inp, res])
-
-            # write to file
-            logger.info("Key: %s\tValid: %d\tDup: %d\t", k, len(cleaned), len(v) - len(cleaned))
-            with open(args.i + f".{i:03d}.wkl", "w") as fout:
-                for inp, res in cleaned:
-                    fout.write(encode(inp, res) + "\n")
-    else:
-        for i, (k, v) in enumerate(wkl_dict.items()):
-            logger.info("Key: %s\tNum: %d", k, len(v))
-            with open(args.i + f".{i:03d}.wkl", "w") as fout:
-                for inp, res in v:
-                    fout.write(encode(inp, res) + "\n")
-
-
-def pick_best(in_file, out_file):
+    out_files = []
+    fout = None
+    try:
+        for wkl_idx, _, row in _sort_by_workload(in_files, clean, max_memory, tmp_dir):
+            if wkl_idx == len(out_files):
+                if fout is not None:
+                    fout.close()
+                out_files.append(out_prefix + f".{wkl_idx:03d}.wkl")
+                fout = open(out_files[-1], "w")
+            fout.write(row + "\n")
+    finally:
+        if fout is not None:
+            fout.close()
+    logger.info("split %d workloads in %.2f s", len(out_files), time.time() - tic)
+    return out_files
+
+
+def merge_logs(in_files, out_file, clean=True, max_memory=1 << 30, tmp_dir=None):
+    """Merge several log files into one, grouping the records by workload.
+    This function can also delete duplicated records across the files.
+
+    The memory usage is bounded by `max_memory` as in :any:`split_workload`.
+
+    Parameters
+    ----------
+    in_files: list of str
+        The filenames of input
+    out_file: str
+        The filename of output
+    clean: bool
+        whether delete duplicated items
+    max_memory: int, optional
+        The approximate number of bytes of records to sort in memory
+    tmp_dir: str, optional
+        The directory of the temporary files of the external sort
+    """
+    with open(out_file, "w") as fout:
+        for _, _, row in _sort_by_workload(_as_file_list(in_files), clean, max_memory, tmp_dir):
+            fout.write(row + "\n")
+
+
+def pick_best(in_file, out_file, workers=None):
     """
     Pick the best entries from a file and store them to another file.
     This function distills the useful log entries from a large log file.
     If out_file already exists, the best entries from both
     in_file and out_file will be saved.
 
+    The records are reduced in a single pass, keeping only the current best record
+    of every (target key, workload) and (target model, workload) pair in memory.
+    The best entries are written in the order they appear in the input.
+
+    Parameters
+    ----------
+    in_file: str or list of str
+        The filename(s) of input
+    out_file: str or file
+        The filename of output
+    workers: int, optional
+        The number of worker processes that parse each text log file,
+        see :any:`load_from_file`.
+    """
+    in_files = _as_file_list(in_file)
+    if isinstance(out_file, (str, bytes, os.PathLike)) and os.path.isfile(out_file):
+        in_files.append(out_file)
+
+    def _candidates():
+        for filename in in_files:
+            if is_binary_record_file(filename):
+                # the index locates the best entries without decoding the whole file
+                yield from BinaryRecordIndex(filename).load_best()
+            else:
+                yield from load_from_file(filename, workers=workers)
+
+    # the same keys as ApplyHistoryBest, mapped to (cost, seq, config key, encoded record)
+    best = {}
+    for seq, (inp, res) in enumerate(_candidates()):
+        if res.error_no != 0:
+            continue
+        cost = np.mean(res.costs)
+        keys = [(0, k, inp.task.workload) for k in inp.target.keys]
+        if inp.target.model != "unknown":
+            keys.append((1, inp.target.model, inp.task.workload))
+        entry = None
+        for key in keys:
+            if key not in best or best[key][0] > cost:
+                entry = entry or (cost, seq, measure_str_key(inp), encode(inp, res))
+                best[key] = entry
+
+    # a record can be the best of several keys
+    best_rows = {}
+    for _, seq, str_key, row in best.values():
+        if str_key not in best_rows or best_rows[str_key][0] > seq:
+            best_rows[str_key] = (seq, row)
+
+    logger.info("Extract %d best records from the %s", len(best_rows), in_file)
+    with ExitStack() as stack:
+        fout = out_file
+        if isinstance(out_file, (str, bytes, os.PathLike)):
+            fout = stack.enter_context(open(out_file, "w"))
+        for _, row in sorted(best_rows.values()):
+            fout.write(row + "\n")
+
+
+def convert_log(in_file, out_file, batch_size=4096):
+    """Convert a log file between the json text format and the binary record format.
+    A binary input is written out as a json log, and a json log is appended to a
+    binary record file.
+
     Parameters
     ----------
     in_file: str
         The filename of input
-    out_file: str or file
+    out_file: str
         The filename of output
+    batch_size: int, optional
+        The number of records to append to a binary record file at once
     """
     context = load_from_file(in_file)
-    if os.path.isfile(out_file):
-        out_context = load_from_file(out_file)
-        context = itertools.chain(context, out_context)
-    context, context_clone = itertools.tee(context)
-    best_context = ApplyHistoryBest(context)
-    best_set = set()
-
-    for v in best_context.best_by_model.values():
-        best_set.add(measure_str_key(v[0]))
-
-    for v in best_context.best_by_targetkey.values():
-        best_set.add(measure_str_key(v[0]))
+    if is_binary_record_file(in_file):
+        with open(out_file, "w") as fout:
+            for inp, res in context:
+                fout.write(encode(inp, res) + "\n")
+        return
 
-    logger.info("Extract %d best records from the %s", len(best_set), in_file)
-    fout = open(out_file, "w") if isinstance(out_file, str) else out_file
-
-    for inp, res in context_clone:
-        if measure_str_key(inp) in best_set:
-            fout.write(encode(inp, res) + "\n")
-            best_set.remove(measure_str_key(inp))
+    writer = BinaryRecordWriter(out_file)
+    while True:
+        batch = list(itertools.islice(context, batch_size))
+        if not batch:
+            break
+        writer.append([inp for inp, _ in batch], [res for _, res in batch])
 
 
 """
 Usage:
-This record executable module has three modes.
+This record executable module has five modes.
 
 * Print log file in readable format
 e.g. python -m tvm.autotvm.record --mode read --i collect_conv.log --begin 0 --end 5 --ir --code
 
-* Extract history best from a large log file
-e.g. python -m tvm.autotvm.record --mode pick --i collect.log
+* Extract history best from large log files
+e.g. python -m tvm.autotvm.record --mode pick --i collect.log [collect_2.log ...]
+
+* Split log files into separate files, each of which contains only a single wkl
+e.g. python -m tvm.autotvm.record --mode split --i collect.log [collect_2.log ...] --max-memory 1024
 
-* Split a log file into separate files, each of which contains only a single wkl
-e.g. python -m tvm.autotvm.record --mode split --i collect.log
+* Merge log files into one and delete duplicated records
+e.g. python -m tvm.autotvm.record --mode merge --i collect.log collect_2.log --o merged.log
+
+* Convert a log file between the json and the binary record format
+e.g. python -m tvm.autotvm.record --mode convert --i collect.log --o collect.bin
 """
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--mode", choices=["read", "pick", "split"], default="read")
-    parser.add_argument("--i", type=str, help="input file")
+    parser.add_argument(
+        "--mode", choices=["read", "pick", "split", "merge", "convert"], default="read"
+    )
+    parser.add_argument("--i", type=str, nargs="+", help="input file(s)")
     parser.add_argument("--o", type=str, default=None, help="output file")
     parser.add_argument("--begin", type=int, default=0)
     parser.add_argument("--end", type=int, default=5)
     parser.add_argument("--ir", action="store_true")
     parser.add_argument("--code", action="store_true")
+    parser.add_argument(
+        "--keep-duplicates", action="store_true", help="do not delete duplicated records"
+    )
+    parser.add_argument(
+        "--max-memory", type=int, default=1024, help="memory budget of split and merge in MB"
+    )
+    parser.add_argument("--tmp-dir", type=str, default=None, help="directory of temporary files")
 
     args = parser.parse_args()
     logging.basicConfig(level=logging.INFO)
+    if args.mode in ["read", "convert"] and len(args.i) != 1:
+        parser.error(f"--mode {args.mode} takes a single input file")
 
     if args.mode == "pick":
-        args.o = args.o or args.i + ".best.log"
+        args.o = args.o or args.i[0] + ".best.log"
         pick_best(args.i, args.o)
     elif args.mode == "read":
-        for i, (inp, result) in enumerate(load_from_file(args.i)):
+        for i, (inp, result) in enumerate(load_from_file(args.i[0])):
             if args.begin <= i < args.end:
                 with inp.target:
                     s, arg_bufs = inp.task.instantiate(inp.config)
@@ -375,4 +983,24 @@ if __name__ == "__main__":
                         func = build(s, arg_bufs)
                         print(func.imported_modules[0].get_source())
     elif args.mode == "split":
-        split_workload(args.i)
+        split_workload(
+            args.i,
+            clean=not args.keep_duplicates,
+            out_prefix=args.o,
+            max_memory=args.max_memory << 20,
+            tmp_dir=args.tmp_dir,
+        )
+    elif args.mode == "merge":
+        args.o = args.o or args.i[0] + ".merged.log"
+        merge_logs(
+            args.i,
+            args.o,
+            clean=not args.keep_duplicates,
+            max_memory=args.max_memory << 20,
+            tmp_dir=args.tmp_dir,
+        )
+    elif args.mode == "convert":
+        args.i = args.i[0]
+        if args.o is None:
+            args.o = args.i + (".log" if is_binary_record_file(args.i) else ".bin")
+        convert_log(args.i, args.o)
@@ -38,6 +38,7 @@ from .dispatcher import (
     ApplyConfig,
     ApplyFixedConfig,
     ApplyHistoryBest,
+    ApplyHistoryBestLazy,
     FallbackContext,
     clear_fallback_cache,
     ApplyGraphBest,
@@ -31,8 +31,11 @@ of the DispatchContext base class.
 from __future__ import absolute_import as _abs
 
 from io import TextIOBase
+import hashlib
 import logging
+import os
 from os import PathLike
+import sqlite3
 from pathlib import Path
 from typing import List, Iterable, Tuple, Union
 
@@ -250,9 +253,12 @@ class ApplyHistoryBest(DispatchContext):
 
         Collection of tuning records. If multiple Records objects are passed, their
         contents will be merged.
+    workers : int, optional
+        The number of worker processes that parse each text log file,
+        see :any:`autotvm.record.load_from_file`.
     """
 
-    def __init__(self, records: Union[None, Records, Iterable[Records]]):
+    def __init__(self, records: Union[None, Records, Iterable[Records]], workers: int = None):
         super(ApplyHistoryBest, self).__init__()
 
         self.best_by_targetkey = {}
@@ -260,9 +266,9 @@ class ApplyHistoryBest(DispatchContext):
         self._best_user_defined = {}
 
         if records:
-            self.load(records)
+            self.load(records, workers)
 
-    def load(self, records: Union[Records, Iterable[Records]]):
+    def load(self, records: Union[Records, Iterable[Records]], workers: int = None):
         """Load records to this dispatch context
 
         Parameters
@@ -272,16 +278,27 @@ class ApplyHistoryBest(DispatchContext):
 
             Collection of tuning records. If multiple Records objects are passed, their
             contents will be merged.
+        workers : int, optional
+            The number of worker processes that parse each text log file,
+            see :any:`autotvm.record.load_from_file`.
         """
         # pylint: disable=import-outside-toplevel
-        from ..record import load_from_file, load_from_buffer
+        from ..record import (
+            load_from_file,
+            load_from_buffer,
+            is_binary_record_file,
+            BinaryRecordIndex,
+        )
 
         def _unpack_records(
             records: Union[Records, Iterable[Records]]
         ) -> List[Tuple[MeasureInput, MeasureResult]]:
 
             if isinstance(records, (str, bytes, PathLike)):
-                return load_from_file(records)
+                if is_binary_record_file(records):
+                    # only decode the best records located by the sidecar index
+                    return BinaryRecordIndex(records).load_best()
+                return load_from_file(records, workers=workers)
 
             if isinstance(records, TextIOBase):
                 return load_from_buffer(records)
@@ -369,6 +386,247 @@ class ApplyHistoryBest(DispatchContext):
             self._best_user_defined[key] = cfg
 
 
+class ApplyHistoryBestLazy(DispatchContext):
+    """
+    Apply the history best config, resolving only the workloads that are queried.
+
+    Unlike :any:`ApplyHistoryBest`, the records are not kept in memory. They are reduced
+    once into an on-disk SQLite store that holds the best record of every
+    (target key, workload) and (target model, workload) pair. The store is reused across
+    processes: records appended to the log files afterwards are ingested incrementally,
+    and the store is rebuilt if a log file is rewritten or the set of log files changes.
+    A query only decodes the matching best record.
+
+    Parameters
+    ----------
+    records : str, bytes, Path, or list of them
+        The tuning log files. File-like objects and iterators of records are not
+        supported because they cannot be read again by other processes.
+    store : str, optional
+        The path of the SQLite store. Defaults to the first log file with a
+        ``.best.sqlite`` suffix.
+    read_only : bool, optional
+        Open an existing store read-only and memory-mapped, without ingesting the log
+        files, which need not exist. Concurrent processes then share the pages of the
+        store and never wait for the write lock. Used for pre-built stores such as
+        the ones of a TopHub mirror.
+    """
+
+    # the number of bytes of a read-only store to memory-map
+    MMAP_SIZE = 1 << 30
+    # the number of bytes at both ends of the ingested part of a log file that are hashed
+    # to detect a rewrite
+    FINGERPRINT_BYTES = 4096
+    # the number of records decoded before they are written to the store in one transaction
+    SYNC_BATCH_SIZE = 4096
+
+    def __init__(
+        self,
+        records: Union[Union[str, bytes, Path], Iterable[Union[str, bytes, Path]]],
+        store: Union[None, str, Path] = None,
+        read_only: bool = False,
+    ):
+        super(ApplyHistoryBestLazy, self).__init__()
+
+        if isinstance(records, (str, bytes, PathLike)):
+            records = [records]
+        self._sources = sorted(set(os.path.abspath(os.fsdecode(x)) for x in records))
+        if not self._sources:
+            raise ValueError("ApplyHistoryBestLazy requires at least one log file")
+        self.store = os.fsdecode(store) if store is not None else self._sources[0] + ".best.sqlite"
+
+        # (by_model, name, workload) -> config or None, only for queried workloads
+        self._cache = {}
+        self._best_user_defined = {}
+
+        if read_only:
+            if not os.path.isfile(self.store):
+                raise FileNotFoundError(f"Cannot find the history best store {self.store}")
+            self._conn = sqlite3.connect(
+                Path(os.path.abspath(self.store)).as_uri() + "?mode=ro", uri=True, timeout=600
+            )
+            self._conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+            return
+
+        self._conn = sqlite3.connect(self.store, timeout=600)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources (path TEXT PRIMARY KEY, offset INTEGER, "
+            "inode INTEGER, mtime INTEGER, digest TEXT)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS best (by_model INTEGER, name TEXT, workload TEXT, "
+            "cost REAL, record TEXT, PRIMARY KEY (by_model, name, workload)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+        self._sync()
+
+    def _sync(self):
+        """Ingest the records that are not in the store yet"""
+        # pylint: disable=import-outside-toplevel
+        from ..record import load_from_file_offset, encode
+
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            fingerprints = {
+                path: (offset, inode, mtime, digest)
+                for path, offset, inode, mtime, digest in conn.execute("SELECT * FROM sources")
+            }
+            rebuild = set(fingerprints) - set(self._sources)
+            rebuild |= set(
+                x
+                for x in self._sources
+                if x in fingerprints and self._is_rewritten(x, fingerprints[x])
+            )
+            if rebuild:
+                logger.info("Rebuild the history best store %s", self.store)
+                conn.execute("DELETE FROM sources")
+                conn.execute("DELETE FROM best")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+        # The records are decoded without holding the write lock, and written in batches.
+        # Each batch is only written if no other process has ingested the same part of the
+        # log in the meantime, otherwise reading resumes where the other process stopped.
+        counter = 0
+        for path in self._sources:
+            offset = 0 if rebuild else fingerprints.get(path, (0,))[0]
+            done = False
+            while not done:
+                start, rows, num_records, done = offset, [], 0, True
+                for inp, res, end in load_from_file_offset(path, start):
+                    offset = end
+                    if inp is None or res.error_no != 0:
+                        continue
+                    cost = float(np.mean(res.costs))
+                    row = encode(inp, res)
+                    workload = repr(inp.task.workload)
+                    keys = [(0, str(k)) for k in inp.target.keys]
+                    if inp.target.model != "unknown":
+                        keys.append((1, str(inp.target.model)))
+                    rows += [(by_model, name, workload, cost, row) for by_model, name in keys]
+                    num_records += 1
+                    if num_records >= self.SYNC_BATCH_SIZE:
+                        done = False
+                        break
+                ingested = self._write_batch(path, start, offset, rows)
+                if ingested == offset:
+                    counter += num_records
+                else:
+                    offset, done = ingested, False
+        logger.debug("Finish ingesting %d records", counter)
+
+    def _write_batch(self, path, start, end, rows):
+        """Write the records of a log file between the offsets start and end into the store.
+        Returns end, or the offset ingested by another process if it is not start."""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("SELECT offset FROM sources WHERE path = ?", (path,)).fetchone()
+            current = current[0] if current is not None else 0
+            if current != start:
+                conn.rollback()
+                return current
+            conn.executemany(
+                "INSERT INTO best VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (by_model, name, workload) DO UPDATE SET "
+                "cost = excluded.cost, record = excluded.record "
+                "WHERE excluded.cost < best.cost",
+                rows,
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                (path,) + self._fingerprint(path, end),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return end
+
+    @classmethod
+    def _fingerprint(cls, path, offset):
+        """The offset, inode, modification time and a digest of the first and last bytes
+        of the part of a log file that is ingested, or None if the file is shorter"""
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < offset:
+                return None
+            digest = hashlib.sha1(f.read(min(offset, cls.FINGERPRINT_BYTES)))
+            f.seek(max(offset - cls.FINGERPRINT_BYTES, 0))
+            digest.update(f.read(min(offset, cls.FINGERPRINT_BYTES)))
+        return (offset, stat.st_ino, stat.st_mtime_ns, digest.hexdigest())
+
+    @classmethod
+    def _is_rewritten(cls, path, fingerprint):
+        """Whether a log file is replaced or rewritten since it was ingested, even to the
+        same or a larger size. Appending records moves the modification time forward only."""
+        offset, inode, mtime, digest = fingerprint
+        current = cls._fingerprint(path, offset)
+        return current is None or current[1] != inode or current[2] < mtime or current[3] != digest
+
+    def compact(self):
+        """Rewrite the store into a file without free pages, e.g. before it is shipped"""
+        self._conn.execute("VACUUM")
+
+    def close(self):
+        """Close the store"""
+        self._conn.close()
+
+    def _lookup(self, by_model, name, workload):
+        key = (by_model, name, workload)
+        if key not in self._cache:
+            # pylint: disable=import-outside-toplevel
+            from ..record import decode
+
+            row = self._conn.execute(
+                "SELECT record FROM best WHERE by_model = ? AND name = ? AND workload = ?",
+                (by_model, name, repr(workload)),
+            ).fetchone()
+            self._cache[key] = decode(row[0])[0].config if row is not None else None
+        return self._cache[key]
+
+    def _query_inside(self, target, workload):
+        if target is None:
+            raise RuntimeError(
+                "Need a target context to find the history best. "
+                "Hint: If your target is llvm, use `with tvm.target.Target('llvm'):`"
+                " above the dispatcher call. So does other target. "
+            )
+
+        # first try matching by model
+        key = (target.model, workload)
+        if key in self._best_user_defined:
+            return self._best_user_defined[key]
+        cfg = self._lookup(1, target.model, workload)
+        if cfg is not None:
+            return cfg
+
+        # then try matching by target key
+        for k in target.keys:
+            key = (k, workload)
+            if key in self._best_user_defined:
+                return self._best_user_defined[key]
+            cfg = self._lookup(0, k, workload)
+            if cfg is not None:
+                return cfg
+
+        return None
+
+    def update(self, target, workload, cfg):
+        model = target.model
+        key = (model, workload)
+        # assume user provided config is the best
+        cfg.cost = 0
+        self._best_user_defined[key] = cfg
+
+        for k in target.keys:
+            key = (k, workload)
+            self._best_user_defined[key] = cfg
+
+
 class FallbackContext(DispatchContext):
     """
     A fallback dispatch context.
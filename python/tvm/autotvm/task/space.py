@@ -677,6 +677,8 @@ class ConfigSpace(object):
         self.is_fallback = False
         self._shared_filter = None
         self._shared_filter_cache = None
+        self._shared_filter_array = None
+        self._strides = None
 
     @staticmethod
     def axis(var):
@@ -1017,6 +1019,8 @@ class ConfigSpace(object):
         self._length = None
         self._range_length = None
         self._shared_filter_cache = None
+        self._shared_filter_array = None
+        self._strides = None
 
     def _make_shared_filter_cache(self):
         def apply(t):
@@ -1066,6 +1070,109 @@ class ConfigSpace(object):
             point += int(np.prod(self.dims[:j])) * k
         return point
 
+    @property
+    def point_dtype(self):
+        """The numpy dtype of points in batch operations.
+        Points of spaces that do not fit in int64 are stored as python ints."""
+        return np.int64 if self.range_length < 2**63 else object
+
+    def _get_strides(self):
+        """The point stride of every knob dimension"""
+        if self._strides is None:
+            strides = [1]
+            for dim in self.dims[:-1]:
+                strides.append(strides[-1] * dim)
+            self._strides = np.array(strides, dtype=self.point_dtype)
+        return self._strides
+
+    def points2knobs(self, points):
+        """Convert an array of points to knobs, the batch version of `point2knob`
+
+        Parameters
+        ----------
+        points: Array of int
+            points to convert
+
+        Returns
+        -------
+        knobs: np.ndarray
+            2-D array with one knob per row
+        """
+        points = np.array(points, dtype=self.point_dtype).reshape(-1)
+        knobs = np.empty((len(points), len(self.dims)), dtype=self.point_dtype)
+        for j, dim in enumerate(self.dims):
+            knobs[:, j] = points % dim
+            points = points // dim
+        return knobs
+
+    def knobs2points(self, knobs):
+        """Convert an array of knobs to points, the batch version of `knob2point`
+
+        Parameters
+        ----------
+        knobs: 2-D Array of int
+            knobs to convert, one per row
+
+        Returns
+        -------
+        points: np.ndarray
+            1-D array of points
+        """
+        knobs = np.array(knobs, dtype=self.point_dtype).reshape(-1, len(self.dims))
+        return (knobs * self._get_strides()).sum(axis=1, dtype=self.point_dtype)
+
+    def batch_is_valid(self, points):
+        """Check which points satisfy the multi_filter condition,
+        the batch version of `is_index_valid`
+
+        Parameters
+        ----------
+        points: Array of int
+            points from the range of the space
+
+        Returns
+        -------
+        valid: np.ndarray
+            1-D bool array
+        """
+        points = np.array(points, dtype=self.point_dtype).reshape(-1)
+        if self._shared_filter is None:
+            return np.ones(len(points), dtype=bool)
+        if self._shared_filter_cache is None:
+            self._make_shared_filter_cache()
+        if self._shared_filter_array is None:
+            self._shared_filter_array = np.array(self._shared_filter_cache, dtype=bool)
+        return self._shared_filter_array[points]
+
+    def batch_random_walk(self, points):
+        """Random walk of every point as local transition,
+        the batch version of `random_walk`
+
+        Parameters
+        ----------
+        points: Array of int
+            indexes of ConfigEntity
+
+        Returns
+        -------
+        new_points: np.ndarray
+            new neighborhood indexes
+        """
+        points = np.array(points, dtype=self.point_dtype).reshape(-1)
+        dims = np.array(self.dims)
+        new_knobs = self.points2knobs(points)
+        new_points = points.copy()
+        todo = np.arange(len(points))
+        # like random_walk, keep mutating the knobs of a point until they form a valid new point
+        while len(todo) > 0:
+            from_i = np.random.randint(len(dims), size=len(todo))
+            new_knobs[todo, from_i] = np.random.randint(dims[from_i])
+            candidates = self.knobs2points(new_knobs[todo])
+            done = (candidates != points[todo]) & self.batch_is_valid(candidates)
+            new_points[todo[done]] = candidates[done]
+            todo = todo[~done]
+        return new_points
+
     def sample_ints(self, m):
         """
         Sample m different integer numbers from [0, self.range_length) without replacement
@@ -20,15 +20,26 @@ TopHub: Tensor Operator Hub
 To get the best performance, we typically need auto-tuning for the specific devices.
 TVM releases pre-tuned parameters in TopHub for some common networks and hardware targets.
 TVM will download these parameters for you when you call relay.build.
+
+On machines without network access, or when many compiler processes start at once,
+set TOPHUB_MIRROR to a local mirror directory built by
+
+    python -m tvm.autotvm.tophub --mirror <dir>
+
+The packages in a mirror are pre-indexed into per-backend lookup files, which are
+memory-mapped and queried lazily instead of loading the whole package.
 """
 
+import argparse
+import hashlib
 import logging
 from os import getenv
+import shutil
 import sys
 from pathlib import Path
 from tvm.ir.container import Array
 
-from .task import ApplyHistoryBest
+from .task import ApplyHistoryBest, ApplyHistoryBestLazy, DispatchContext
 from ..target import Target
 from ..contrib.download import download
 from .record import load_from_file
@@ -43,6 +54,12 @@ AUTOTVM_TOPHUB_DEFAULT_LOC = "https://raw.githubusercontent.com/tlc-pack/tophub/
 # value of AUTOTVM_TOPHUB_LOC_VAR to specify to not read from TopHub
 AUTOTVM_TOPHUB_NONE_LOC = "NONE"
 
+# environment variable to read the local TopHub mirror directory
+AUTOTVM_TOPHUB_MIRROR_VAR = "TOPHUB_MIRROR"
+
+# suffix of the lookup file of a package in a TopHub mirror
+AUTOTVM_TOPHUB_INDEX_SUFFIX = ".best.sqlite"
+
 # root path to store TopHub files
 AUTOTVM_TOPHUB_ROOT_PATH = Path(Path("~").expanduser(), ".tvm", "tophub")
 
@@ -81,12 +98,84 @@ def _get_tophub_location():
     return AUTOTVM_TOPHUB_DEFAULT_LOC if location is None else location
 
 
+def _get_tophub_mirror():
+    return getenv(AUTOTVM_TOPHUB_MIRROR_VAR, None)
+
+
+def _package_name(backend):
+    return f"{backend}_{PACKAGE_VERSION[backend]}.log"
+
+
+# the lookup files of a TopHub mirror opened in this process
+MIRROR_PACKAGE_CACHE = {}
+
+
+def _load_mirror_package(mirror, backend):
+    """Open the lookup file of a package in a TopHub mirror, None if it is not mirrored"""
+    package_name = _package_name(backend)
+    store = Path(mirror, package_name + AUTOTVM_TOPHUB_INDEX_SUFFIX)
+    key = str(store.absolute())
+    if key not in MIRROR_PACKAGE_CACHE:
+        if store.is_file():
+            package = ApplyHistoryBestLazy(Path(mirror, package_name), store, read_only=True)
+        elif Path(mirror, package_name).is_file():
+            # index a package that was copied into the mirror by hand into a private
+            # lookup file, since the mirror is shared and may be read-only
+            package_path = Path(mirror, package_name).absolute()
+            private_store = Path(
+                AUTOTVM_TOPHUB_ROOT_PATH,
+                "mirror_index",
+                hashlib.sha1(str(package_path).encode()).hexdigest()[:16],
+                package_name + AUTOTVM_TOPHUB_INDEX_SUFFIX,
+            )
+            logger.warning(
+                "TopHub package %s in mirror %s is not indexed, index it into %s. "
+                "Run build_mirror to index it for all users of the mirror.",
+                package_name,
+                mirror,
+                private_store,
+            )
+            private_store.parent.mkdir(parents=True, exist_ok=True)
+            package = ApplyHistoryBestLazy(package_path, private_store)
+        else:
+            logger.warning("Cannot find TopHub package %s in mirror %s", package_name, mirror)
+            return None
+        MIRROR_PACKAGE_CACHE[key] = package
+    return MIRROR_PACKAGE_CACHE[key]
+
+
+class _MirrorContext(DispatchContext):
+    """The history best of the extra files and the pre-indexed packages of a TopHub mirror.
+    As if they were loaded into a single ApplyHistoryBest, the config of the lowest cost
+    is returned.
+    """
+
+    def __init__(self, best_context, packages):
+        super(_MirrorContext, self).__init__()
+        self.best_context = best_context
+        self.packages = packages
+
+    def _query_inside(self, target, workload):
+        ret = self.best_context._query_inside(target, workload)
+        for package in self.packages:
+            cfg = package._query_inside(target, workload)
+            if cfg is not None and (ret is None or cfg.cost < ret.cost):
+                ret = cfg
+        return ret
+
+    def update(self, target, workload, cfg):
+        self.best_context.update(target, workload, cfg)
+
+
 def context(target, extra_files=None):
     """Return the dispatch context with pre-tuned parameters.
     This function will load the corresponding *.log files in AUTOTVM_TOPHUB_ROOT_PATH.
     If cannot find them, it will download them from TopHub github repo.
     Users can also add their own files in argument `extra_files`.
 
+    If TOPHUB_MIRROR is set, the packages are looked up in the pre-indexed lookup files
+    of that directory instead, and are never downloaded.
+
     Parameters
     ----------
     target: Target or List of Target
@@ -98,7 +187,9 @@ def context(target, extra_files=None):
     if tophub_location == AUTOTVM_TOPHUB_NONE_LOC:
         return EmptyContext()
 
+    mirror = _get_tophub_mirror()
     best_context = ApplyHistoryBest([])
+    packages = []
 
     targets = target if isinstance(target, (Array, list, tuple)) else [target]
 
@@ -126,6 +217,13 @@ def context(target, extra_files=None):
         for name in possible_names:
             name = _alias(name)
             if name in all_packages:
+                if mirror is not None:
+                    package = _load_mirror_package(mirror, name)
+                    if package is None:
+                        continue
+                    packages.append(package)
+                    break
+
                 if not check_backend(tophub_location, name):
                     continue
 
@@ -137,6 +235,8 @@ def context(target, extra_files=None):
         for filename in extra_files:
             best_context.load(filename)
 
+    if mirror is not None:
+        return _MirrorContext(best_context, packages)
     return best_context
 
 
@@ -157,8 +257,7 @@ def check_backend(tophub_location, backend):
     backend = _alias(backend)
     assert backend in PACKAGE_VERSION, f'Cannot find backend "{backend}" in TopHub'
 
-    version = PACKAGE_VERSION[backend]
-    package_name = f"{backend}_{version}.log"
+    package_name = _package_name(backend)
     if Path(AUTOTVM_TOPHUB_ROOT_PATH, package_name).is_file():
         return True
 
@@ -175,20 +274,29 @@ def check_backend(tophub_location, backend):
         return False
 
 
-def download_package(tophub_location, package_name):
+def download_package(tophub_location, package_name, rootpath=None):
     """Download pre-tuned parameters of operators for a backend
 
     Parameters
     ----------
     tophub_location: str
-        The location to download TopHub parameters from
+        The location to download TopHub parameters from.
+        A local directory is copied from instead.
 
     package_name: str
         The name of package
+
+    rootpath: str, optional
+        The directory to store the package. Defaults to AUTOTVM_TOPHUB_ROOT_PATH.
     """
-    rootpath = Path(AUTOTVM_TOPHUB_ROOT_PATH)
+    rootpath = Path(rootpath or AUTOTVM_TOPHUB_ROOT_PATH)
     rootpath.mkdir(parents=True, exist_ok=True)
 
+    if Path(tophub_location).is_dir():
+        logger.info("Copy pre-tuned parameters package from %s", tophub_location)
+        shutil.copyfile(Path(tophub_location, package_name), Path(rootpath, package_name))
+        return
+
     download_url = f"{tophub_location}/{package_name}"
     logger.info("Download pre-tuned parameters package from %s", download_url)
     download(download_url, Path(rootpath, package_name), overwrite=True)
@@ -215,9 +323,9 @@ def load_reference_log(backend, model, workload_name):
     backend = _alias(backend)
     if backend not in PACKAGE_VERSION:
         return []
-    version = PACKAGE_VERSION[backend]
-    package_name = f"{backend}_{version}.log"
-    filename = Path(AUTOTVM_TOPHUB_ROOT_PATH, package_name)
+    package_name = _package_name(backend)
+    mirror = _get_tophub_mirror()
+    filename = Path(mirror or AUTOTVM_TOPHUB_ROOT_PATH, package_name)
 
     global REFERENCE_LOG_CACHE
     key = (backend, model, workload_name)
@@ -226,7 +334,7 @@ def load_reference_log(backend, model, workload_name):
         tmp = []
         # If TOPHUB_LOCATION is not AUTOTVM_TOPHUB_NONE_LOC,
         # Download the config file from tophub if not exists.
-        if not Path(filename).exists():
+        if not Path(filename).exists() and mirror is None:
             tophub_location = _get_tophub_location()
             if tophub_location != AUTOTVM_TOPHUB_NONE_LOC:
                 download_package(tophub_location, package_name)
@@ -249,3 +357,56 @@ def load_reference_log(backend, model, workload_name):
         REFERENCE_LOG_CACHE[key] = tmp
 
     return REFERENCE_LOG_CACHE[key]
+
+
+def build_mirror(mirror, backends=None, tophub_location=None):
+    """Build a local TopHub mirror for offline compilation.
+    The packages are fetched into the mirror directory, then reduced into per-backend
+    lookup files of their best records. Set TOPHUB_MIRROR to the directory to use it.
+
+    Parameters
+    ----------
+    mirror: str
+        The mirror directory
+    backends: list of str, optional
+        The backends to mirror. Defaults to all the backends in TopHub.
+    tophub_location: str, optional
+        The location to fetch the packages from, a URL or a local directory.
+        Defaults to TOPHUB_LOCATION or the TopHub github repo.
+
+    Returns
+    -------
+    stores: list of str
+        The paths of the lookup files
+    """
+    tophub_location = tophub_location or _get_tophub_location()
+    backends = backends or list(PACKAGE_VERSION.keys())
+
+    stores = []
+    for backend in backends:
+        backend = _alias(backend)
+        assert backend in PACKAGE_VERSION, f'Cannot find backend "{backend}" in TopHub'
+        package_name = _package_name(backend)
+        if not Path(mirror, package_name).is_file():
+            download_package(tophub_location, package_name, mirror)
+
+        store = Path(mirror, package_name + AUTOTVM_TOPHUB_INDEX_SUFFIX)
+        if store.exists():
+            store.unlink()
+        package = ApplyHistoryBestLazy(Path(mirror, package_name), store)
+        package.compact()
+        package.close()
+        logger.info("Indexed %s into %s", package_name, store)
+        stores.append(str(store))
+    return stores
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a local TopHub mirror")
+    parser.add_argument("--mirror", type=str, required=True, help="The mirror directory")
+    parser.add_argument("--backends", type=str, nargs="*", help="The backends to mirror")
+    parser.add_argument("--location", type=str, help="The URL or directory to fetch from")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    build_mirror(args.mirror, args.backends, args.location)
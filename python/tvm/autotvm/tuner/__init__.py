@@ -29,3 +29,5 @@ from .index_based_tuner import GridSearchTuner, RandomTuner
 from .ga_tuner import GATuner
 from .xgboost_tuner import XGBTuner
 from .droplet_turner import DropletTuner
+from .model_store import ModelStore
+from .task_scheduler import TaskScheduler
@@ -37,7 +37,9 @@ def log_to_file(file_out, protocol="json"):
     file_out : File or str
         The file to log to.
     protocol: str, optional
-        The log protocol. Can be 'json' or 'pickle'
+        The log protocol. Can be 'json', 'pickle' or 'binary'.
+        The binary protocol requires file_out to be a path, see
+        :any:`autotvm.record.BinaryRecordWriter`.
 
     Returns
     -------
@@ -61,6 +63,17 @@ def log_to_file(file_out, protocol="json"):
     if isinstance(file_out, Path):
         file_out = str(file_out)
 
+    if protocol == "binary":
+        if not isinstance(file_out, str):
+            raise RuntimeError("The binary log protocol requires a file path")
+        writer = record.BinaryRecordWriter(file_out)
+
+        def _binary_callback(_, inputs, results):
+            """Callback implementation"""
+            writer.append(inputs, results)
+
+        return _binary_callback
+
     return _callback
 
 
@@ -75,8 +88,7 @@ def log_to_database(db):
 
     def _callback(_, inputs, results):
         """Callback implementation"""
-        for inp, result in zip(inputs, results):
-            db.save(inp, result)
+        db.save_batch(inputs, results)
 
     return _callback
 
@@ -66,14 +66,14 @@ class DropletTuner(Tuner):
     def next_pos(self, new_positions):
         "returns the neighbors of the best solution"
         next_set = []
-        for p in new_positions:
+        if not new_positions:
+            return next_set
+        positions = np.array(new_positions) + np.array(self.best_choice[1])
+        new_knobs = np.where(positions > 0, positions % np.array(self.dims), 0)
+        new_points = self.space.knobs2points(new_knobs)
+        for idx_p, new_p in zip(new_points.tolist(), new_knobs.tolist()):
             if len(next_set) > self.batch:
                 break
-            new_p = [
-                (x + y) % self.dims[i] if (x + y > 0) else 0
-                for i, (x, y) in enumerate(zip(p, self.best_choice[1]))
-            ]
-            idx_p = self.space.knob2point(new_p)
             if idx_p not in self.visited:
                 self.visited.add(idx_p)
                 next_set.append((idx_p, new_p))
@@ -123,5 +123,26 @@ class DropletTuner(Tuner):
     def has_next(self):
         return len(self.next) > 0
 
+    def get_state(self):
+        state = super(DropletTuner, self).get_state()
+        state.update(
+            best_choice=self.best_choice,
+            visited=list(self.visited),
+            execution=self.execution,
+            batch=self.batch,
+            step=self.step,
+            next=self.next,
+        )
+        return state
+
+    def set_state(self, state):
+        super(DropletTuner, self).set_state(state)
+        self.best_choice = state["best_choice"]
+        self.visited = set(state["visited"])
+        self.execution = state["execution"]
+        self.batch = state["batch"]
+        self.step = state["step"]
+        self.next = state["next"]
+
     def load_history(self, data_set, min_seed_records=500):
         pass
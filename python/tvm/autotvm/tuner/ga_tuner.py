@@ -28,6 +28,12 @@ class GATuner(Tuner):
     This tuner does not have a cost model so it always run measurement on real machines.
     This tuner expands the :code:`ConfigEntity` as gene.
 
+    The population is kept as a 2-D array of knobs, and every generation is bred in batch:
+    the parents, crossover points and mutations of all children are drawn at once, and
+    the children are screened with the batch constraint check of the space. Children
+    that are invalid, duplicated or already visited are dropped, so every gene of a
+    generation is a new config.
+
     Parameters
     ----------
     pop_size: int
@@ -38,6 +44,9 @@ class GATuner(Tuner):
         probability of mutation of a knob in a gene
     """
 
+    # the number of batches of children to breed before filling a generation randomly
+    MAX_BREED_ROUNDS = 20
+
     def __init__(self, task, pop_size=100, elite_num=3, mutation_prob=0.1):
         super(GATuner, self).__init__(task)
 
@@ -51,21 +60,24 @@ class GATuner(Tuner):
         # random initialization
         self.pop_size = min(self.pop_size, len(self.space))
         self.elite_num = min(self.pop_size, self.elite_num)
-        self.visited = set(self.space.sample_ints(self.pop_size))
+        self.visited = set(self.space.sample_ints(self.pop_size).tolist())
 
-        # current generation
-        self.genes = [self.space.point2knob(idx) for idx in self.visited]
+        # current generation, one gene (knob) per row
+        self.genes = self._to_genes(list(self.visited))
         self.scores = []
-        self.elites = []
+        self.elites = np.empty((0, len(self.space.dims)), dtype=np.int64)
         self.elite_scores = []
         self.trial_pt = 0
 
+    def _to_genes(self, points):
+        return self.space.points2knobs(points).astype(np.int64)
+
     def next_batch(self, batch_size):
         ret = []
         while len(ret) < batch_size and self.has_next():
             gene = self.genes[self.trial_pt % self.pop_size]
             self.trial_pt += 1
-            ret.append(self.space.get(self.space.knob2point(gene)))
+            ret.append(self.space.get(self.space.knob2point(gene.tolist())))
         return ret
 
     def update(self, inputs, results):
@@ -77,49 +89,107 @@ class GATuner(Tuner):
                 self.scores.append(0.0)
 
         if len(self.scores) >= len(self.genes) and len(self.visited) < len(self.space):
-            next_genes = []
             # There is no reason to crossover or mutate since the size of the unvisited
             # is no larger than the size of the population.
             if len(self.space) - len(self.visited) <= self.pop_size:
-                for idx in range(self.space.range_length):
-                    if self.space.is_index_valid(idx) and idx not in self.visited:
-                        next_genes.append(self.space.point2knob(idx))
-                        self.visited.add(idx)
+                points = np.arange(self.space.range_length)
+                points = points[self.space.batch_is_valid(points)]
+                points = [idx for idx in points.tolist() if idx not in self.visited]
+                self.visited.update(points)
+                next_genes = self._to_genes(points)
             else:
-                genes = self.genes + self.elites
-                scores = np.array(self.scores[: len(self.genes)] + self.elite_scores)
+                genes = np.concatenate([self.genes, self.elites])
+                scores = np.array(self.scores[: len(self.genes)] + list(self.elite_scores))
 
                 # reserve elite
-                self.elites, self.elite_scores = [], []
                 elite_indexes = np.argpartition(scores, -self.elite_num)[-self.elite_num :]
-                for ind in elite_indexes:
-                    self.elites.append(genes[ind])
-                    self.elite_scores.append(scores[ind])
+                self.elites = genes[elite_indexes]
+                self.elite_scores = scores[elite_indexes].tolist()
 
-                indices = np.arange(len(genes))
                 scores += 1e-8
                 scores /= np.max(scores)
                 probs = scores / np.sum(scores)
-                while len(next_genes) < self.pop_size:
-                    # cross over
-                    p1, p2 = np.random.choice(indices, size=2, replace=False, p=probs)
-                    p1, p2 = genes[p1], genes[p2]
-                    point = np.random.randint(len(self.space.dims))
-                    tmp_gene = p1[:point] + p2[point:]
-                    # mutation
-                    for j, dim in enumerate(self.space.dims):
-                        if np.random.random() < self.mutation_prob:
-                            tmp_gene[j] = np.random.randint(dim)
-
-                    if self.space.is_index_valid(self.space.knob2point(tmp_gene)):
-                        next_genes.append(tmp_gene)
-                        self.visited.add(self.space.knob2point(tmp_gene))
+                next_genes = self._breed(genes, probs)
             self.genes = next_genes
             self.trial_pt = 0
             self.scores = []
 
+    def _breed(self, genes, probs):
+        """Breed a generation of new valid genes from the parents, with their probabilities"""
+        dims = np.array(self.space.dims)
+        next_genes, next_points = [], []
+        num = 0
+        for _ in range(self.MAX_BREED_ROUNDS):
+            n = self.pop_size - num
+            if n <= 0:
+                break
+            # draw more children than needed, since some of them are dropped
+            n = 2 * n + 8
+
+            # select two different parents for every child
+            parents = np.random.choice(len(genes), size=(n, 2), p=probs)
+            same = parents[:, 0] == parents[:, 1]
+            while np.any(same) and len(genes) > 1:
+                parents[same, 1] = np.random.choice(len(genes), size=np.sum(same), p=probs)
+                same = parents[:, 0] == parents[:, 1]
+
+            # cross over
+            point = np.random.randint(len(dims), size=(n, 1))
+            children = np.where(
+                np.arange(len(dims)) < point, genes[parents[:, 0]], genes[parents[:, 1]]
+            )
+            # mutation
+            mutated = np.random.random(children.shape) < self.mutation_prob
+            children[mutated] = np.random.randint(np.broadcast_to(dims, children.shape)[mutated])
+
+            # drop invalid, duplicated and visited children, keeping the order they are bred
+            points = self.space.knobs2points(children)
+            keep = self.space.batch_is_valid(points)
+            _, first = np.unique(points, return_index=True)
+            keep[np.setdiff1d(np.arange(n), first)] = False
+            keep &= np.array([x not in self.visited for x in points.tolist()], dtype=bool)
+            children, points = children[keep][: self.pop_size - num], points[keep]
+            points = points[: len(children)].tolist()
+
+            self.visited.update(points)
+            next_genes.append(children)
+            next_points.extend(points)
+            num += len(children)
+
+        if num < self.pop_size:
+            # the children are mostly visited, fill the generation with random new points
+            points = []
+            while num + len(points) < self.pop_size:
+                point = self.space.sample_ints(1).tolist()[0]
+                if point not in self.visited:
+                    self.visited.add(point)
+                    points.append(point)
+            next_genes.append(self._to_genes(points))
+        return np.concatenate(next_genes)
+
     def has_next(self):
         return len(self.visited) - (len(self.genes) - self.trial_pt) < len(self.space)
 
+    def get_state(self):
+        state = super(GATuner, self).get_state()
+        state.update(
+            visited=list(self.visited),
+            genes=self.genes,
+            scores=self.scores,
+            elites=self.elites,
+            elite_scores=self.elite_scores,
+            trial_pt=self.trial_pt,
+        )
+        return state
+
+    def set_state(self, state):
+        super(GATuner, self).set_state(state)
+        self.visited = set(state["visited"])
+        self.genes = np.array(state["genes"], dtype=np.int64).reshape(-1, len(self.space.dims))
+        self.scores = state["scores"]
+        self.elites = np.array(state["elites"], dtype=np.int64).reshape(-1, len(self.space.dims))
+        self.elite_scores = state["elite_scores"]
+        self.trial_pt = state["trial_pt"]
+
     def load_history(self, data_set, min_seed_records=500):
         pass
@@ -33,6 +33,8 @@ class IndexBaseTuner(Tuner):
         A tuple of index range that this tuner can select from [begin_idx, end_idx]
     """
 
+    supports_pipelining = True
+
     def __init__(self, task, range_idx=None):
         super(IndexBaseTuner, self).__init__(task)
         assert range_idx is None or isinstance(
@@ -53,6 +55,15 @@ class IndexBaseTuner(Tuner):
     def has_next(self):
         return len(self.visited) < self.visited_max
 
+    def get_state(self):
+        state = super(IndexBaseTuner, self).get_state()
+        state["visited"] = list(self.visited)
+        return state
+
+    def set_state(self, state):
+        super(IndexBaseTuner, self).set_state(state)
+        self.visited = list(state["visited"])
+
     def load_history(self, data_set, min_seed_records=500):
         pass
 
@@ -69,6 +80,15 @@ class GridSearchTuner(IndexBaseTuner):
                 self.index, start=self.begin_idx, end=self.end_idx
             )
 
+    def get_state(self):
+        state = super(GridSearchTuner, self).get_state()
+        state["index"] = self.index
+        return state
+
+    def set_state(self, state):
+        super(GridSearchTuner, self).set_state(state)
+        self.index = state["index"]
+
     def next_batch(self, batch_size):
         ret = []
         while len(ret) < batch_size and self.has_next():
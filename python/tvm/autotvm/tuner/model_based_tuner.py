@@ -20,6 +20,8 @@ This type of tuner will fit a cost model and use some optimization methods to
 find optimums points of cost model in space.
 """
 import gc
+import os
+from collections import OrderedDict
 
 import numpy as np
 
@@ -28,10 +30,30 @@ from ..env import GLOBAL_SCOPE
 
 
 class FeatureCache(object):
-    """Feature cache manager for cache sharing between different cost models"""
+    """Feature cache manager for cache sharing between different cost models
 
-    def __init__(self):
+    Parameters
+    ----------
+    max_bytes: int, optional
+        If is not None, bound the memory used by the cached features of all keys.
+        The least recently used features are evicted when the bound is exceeded.
+    spill_dir: str, optional
+        If is not None, every cached feature is also appended to a memory-mapped
+        feature file `<spill_dir>/<name>.<key>.fea`. Evicted features are reloaded
+        from that file instead of being extracted again, also across tuner restarts.
+    name: str, optional
+        The prefix of the spill files. It should identify the tuning task.
+    """
+
+    def __init__(self, max_bytes=None, spill_dir=None, name="features"):
         self.feature_cache = {}
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.name = name
+
+        # (key, index) -> bytes of the cached feature, in least recently used order
+        self._lru = OrderedDict()
+        self._nbytes = 0
 
     def get(self, key):
         """Get feature cache dictionary for a key
@@ -47,7 +69,14 @@ class FeatureCache(object):
             cache dictionary
         """
         if key not in self.feature_cache:
-            self.feature_cache[key] = {}
+            if self.max_bytes is None and self.spill_dir is None:
+                self.feature_cache[key] = {}
+            else:
+                spill_file = None
+                if self.spill_dir is not None:
+                    os.makedirs(self.spill_dir, exist_ok=True)
+                    spill_file = os.path.join(self.spill_dir, f"{self.name}.{key}.fea")
+                self.feature_cache[key] = _BoundedFeatureDict(self, key, spill_file)
 
         return self.feature_cache[key]
 
@@ -68,15 +97,144 @@ class FeatureCache(object):
     def clear(self, key):
         """Clear feature cache for a key
 
+        The spill file of the key, if any, is kept on disk.
+
         Parameters
         ----------
         key: str
             The key of a feature type
         """
-        del self.feature_cache[key]
-        self.feature_cache[key] = {}
+        fea_cache = self.feature_cache.pop(key, None)
+        if isinstance(fea_cache, _BoundedFeatureDict):
+            for index in list(fea_cache.values):
+                self._untrack(key, index)
+            fea_cache.close()
+        self.get(key)
         gc.collect()
 
+    def _touch(self, key, index, nbytes):
+        """Mark a feature as recently used and evict the least recently used ones"""
+        lru_key = (key, index)
+        if lru_key in self._lru:
+            self._lru.move_to_end(lru_key)
+            return
+        self._lru[lru_key] = nbytes
+        self._nbytes += nbytes
+        if self.max_bytes is None:
+            return
+        while self._nbytes > self.max_bytes and len(self._lru) > 1:
+            (old_key, old_index), old_nbytes = self._lru.popitem(last=False)
+            self._nbytes -= old_nbytes
+            del self.feature_cache[old_key].values[old_index]
+
+    def _untrack(self, key, index):
+        self._nbytes -= self._lru.pop((key, index), 0)
+
+
+class _BoundedFeatureDict(object):
+    """The feature cache of one key when the cache is bounded or spilled.
+
+    The spill file is a `.fea` file of float32 features with a `.idx` companion
+    of (config index, offset, length) rows. A failed extraction is stored with
+    a negative offset.
+    """
+
+    _ENTRY_OVERHEAD = 64
+    _INDEX_DTYPE = np.dtype([("index", "<i8"), ("offset", "<i8"), ("length", "<i8")])
+
+    def __init__(self, owner, key, spill_file):
+        self.owner = owner
+        self.key = key
+        self.values = {}
+
+        self.spill_file = spill_file
+        self._spilled = {}
+        self._data_file = self._index_file = None
+        self._mmap = None
+        if spill_file is not None:
+            self._load_spill_index()
+            self._data_file = open(spill_file, "ab")
+            self._index_file = open(spill_file[:-4] + ".idx", "ab")
+
+    def _load_spill_index(self):
+        data_size = os.path.getsize(self.spill_file) if os.path.exists(self.spill_file) else 0
+        index_file = self.spill_file[:-4] + ".idx"
+        if not os.path.exists(index_file):
+            return
+        n_rows = os.path.getsize(index_file) // self._INDEX_DTYPE.itemsize
+        rows = np.fromfile(index_file, dtype=self._INDEX_DTYPE, count=n_rows)
+        for index, offset, length in rows.tolist():
+            # skip the rows whose features were not completely written
+            if (offset + length) * 4 <= data_size:
+                self._spilled[index] = (offset, length)
+        # drop a partially written tail, so new rows stay aligned
+        if os.path.getsize(index_file) != n_rows * self._INDEX_DTYPE.itemsize:
+            with open(index_file, "r+b") as f:
+                f.truncate(n_rows * self._INDEX_DTYPE.itemsize)
+        if data_size % 4:
+            with open(self.spill_file, "r+b") as f:
+                f.truncate(data_size - data_size % 4)
+
+    def _spill(self, index, value):
+        if value is None:
+            offset, length = -1, 0
+        else:
+            value = np.asarray(value, dtype=np.float32).ravel()
+            offset = self._data_file.tell() // 4
+            length = value.shape[0]
+            self._data_file.write(value.tobytes())
+        row = np.array([(index, offset, length)], dtype=self._INDEX_DTYPE)
+        self._index_file.write(row.tobytes())
+        self._spilled[index] = (offset, length)
+
+    def _unspill(self, index):
+        offset, length = self._spilled[index]
+        if offset < 0:
+            return None
+        if self._mmap is None or offset + length > self._mmap.shape[0]:
+            self._data_file.flush()
+            self._index_file.flush()
+            self._mmap = np.memmap(self.spill_file, dtype=np.float32, mode="r")
+        return np.array(self._mmap[offset : offset + length])
+
+    def __contains__(self, index):
+        return index in self.values or index in self._spilled
+
+    def __getitem__(self, index):
+        if index in self.values:
+            value = self.values[index]
+        else:
+            value = self._unspill(index)
+            self.values[index] = value
+        self.owner._touch(self.key, index, _feature_nbytes(value) + self._ENTRY_OVERHEAD)
+        return value
+
+    def __setitem__(self, index, value):
+        if self.spill_file is not None and index not in self._spilled:
+            self._spill(index, value)
+        if index in self.values:
+            self.owner._untrack(self.key, index)
+        self.values[index] = value
+        self.owner._touch(self.key, index, _feature_nbytes(value) + self._ENTRY_OVERHEAD)
+
+    def __len__(self):
+        return len(self.values)
+
+    def close(self):
+        """Close the spill files"""
+        self._mmap = None
+        for f in (self._data_file, self._index_file):
+            if f is not None:
+                f.close()
+        self._data_file = self._index_file = None
+
+    def __del__(self):
+        self.close()
+
+
+def _feature_nbytes(value):
+    return 0 if value is None else np.asarray(value).nbytes
+
 
 class CostModel(object):
     """Cost model to predict the speed of a config"""
@@ -154,6 +312,26 @@ class CostModel(object):
         """
         raise NotImplementedError()
 
+    def get_state(self):
+        """Get the trained state of the model for tuner checkpointing.
+        A base model loaded for transfer learning is not part of the state.
+
+        Returns
+        -------
+        state: dict or None
+            A picklable dictionary, or None if the model has no state to save
+        """
+        return None
+
+    def set_state(self, state):
+        """Restore the trained state of the model saved by `get_state`
+
+        Parameters
+        ----------
+        state: dict or None
+            The state returned by `get_state`
+        """
+
 
 class ModelOptimizer(object):
     """Optimizer used to find optimal points of cost model"""
@@ -200,6 +378,8 @@ class ModelBasedTuner(Tuner):
         and then pick plan_size of them according to the diversity metric.
     """
 
+    supports_pipelining = True
+
     def __init__(self, task, cost_model, model_optimizer, plan_size, diversity_filter_ratio=None):
         super(ModelBasedTuner, self).__init__(task)
 
@@ -308,6 +488,35 @@ class ModelBasedTuner(Tuner):
     def has_next(self):
         return len(self.visited) < len(self.space)
 
+    def get_state(self):
+        state = super(ModelBasedTuner, self).get_state()
+        state.update(
+            trials=list(self.trials),
+            trial_pt=self.trial_pt,
+            visited=list(self.visited),
+            xs=self.xs,
+            ys=self.ys,
+            flops_max=self.flops_max,
+            train_ct=self.train_ct,
+            cost_model=self.cost_model.get_state(),
+            # the persistent chain points of the simulated annealing optimizer
+            optimizer_points=getattr(self.model_optimizer, "points", None),
+        )
+        return state
+
+    def set_state(self, state):
+        super(ModelBasedTuner, self).set_state(state)
+        self.trials = state["trials"]
+        self.trial_pt = state["trial_pt"]
+        self.visited = set(state["visited"])
+        self.xs = state["xs"]
+        self.ys = state["ys"]
+        self.flops_max = state["flops_max"]
+        self.train_ct = state["train_ct"]
+        self.cost_model.set_state(state["cost_model"])
+        if hasattr(self.model_optimizer, "points"):
+            self.model_optimizer.points = state["optimizer_points"]
+
 
 def submodular_pick(scores, knobs, n_pick, knob_weight=1.0):
     """Run greedy optimization to pick points with regard to both score and diversity.
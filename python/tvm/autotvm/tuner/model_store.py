@@ -0,0 +1,217 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Persistent store of trained cost models for transfer learning across tasks and runs"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+
+logger = logging.getLogger("autotvm")
+
+
+class ModelStore(object):
+    """A directory of trained XGBoost cost models, keyed by template name and target.
+
+    After a task is tuned, its booster and label normalization are saved with the
+    workload it was trained on. A new task of the same template and target is
+    warm-started with the stored model of the most similar workload, used as the
+    base model of transfer learning.
+
+    The layout is `<path>/<template>/<target>/<feature_type>.<loss_type>.<workload hash>`
+    with a `.json` metadata file and a `.model` booster file per entry.
+    Every entry is written atomically, so several tuning jobs can share a store.
+
+    Parameters
+    ----------
+    path: str
+        The root directory of the store
+    """
+
+    def __init__(self, path):
+        self.path = os.fsdecode(path)
+
+    def _entry_dir(self, task):
+        target = str(task.target)
+        target_dir = f"{task.target.kind.name}.{hashlib.sha1(target.encode()).hexdigest()[:16]}"
+        return os.path.join(self.path, _sanitize(task.name), target_dir)
+
+    def save(self, cost_model):
+        """Save the trained booster of a cost model
+
+        Parameters
+        ----------
+        cost_model: XGBoostCostModel
+            A trained cost model
+
+        Returns
+        -------
+        saved: bool
+            Whether the model was saved. Untrained models are not saved.
+        """
+        if cost_model.bst is None:
+            return False
+
+        task = cost_model.task
+        workload = repr(task.workload)
+        name = "%s.%s.%s" % (
+            cost_model.fea_type,
+            cost_model.loss_type,
+            hashlib.sha1(workload.encode()).hexdigest()[:16],
+        )
+        entry_dir = self._entry_dir(task)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        meta = {
+            "task_name": task.name,
+            "target": str(task.target),
+            "workload": workload,
+            "args": _flatten_args(task.args),
+            "feature_type": cost_model.fea_type,
+            "loss_type": cost_model.loss_type,
+            "num_features": int(cost_model.bst.num_features()),
+            "y_max": float(cost_model._y_max),
+            "n_samples": int(cost_model._sample_size),
+            "timestamp": time.time(),
+        }
+        # write the booster first, so a metadata file always has its booster
+        _atomic_write(os.path.join(entry_dir, name + ".model"), bytes(cost_model.bst.save_raw()))
+        _atomic_write(os.path.join(entry_dir, name + ".json"), json.dumps(meta).encode())
+        logger.debug("Saved cost model of %s to %s", task.name, entry_dir)
+        return True
+
+    def query(self, task, feature_type, loss_type, top_k=1):
+        """Rank the stored models of the template and target of a task by workload similarity
+
+        Parameters
+        ----------
+        task: Task
+            The task to be tuned
+        feature_type: str
+            The feature type of the models
+        loss_type: str
+            The loss type of the models
+        top_k: int
+            The maximum number of models to return
+
+        Returns
+        -------
+        entries: List of (float, str, dict)
+            The distance of the workloads, the path of the booster file and the metadata
+            of the stored models, from the most similar one.
+        """
+        args = _flatten_args(task.args)
+        entries = []
+        pattern = os.path.join(self._entry_dir(task), f"{feature_type}.{loss_type}.*.json")
+        for meta_file in glob.glob(pattern):
+            with open(meta_file) as f:
+                meta = json.load(f)
+            # knob features are the flattened config, which only matches within a space
+            if feature_type == "knob" and meta["workload"] != repr(task.workload):
+                continue
+            dist = _workload_distance(args, meta["args"])
+            if dist is not None:
+                entries.append((dist, meta_file[: -len(".json")] + ".model", meta))
+        entries.sort(key=lambda x: (x[0], -x[2]["n_samples"]))
+        return entries[:top_k]
+
+    def warm_start(self, cost_model):
+        """Load the stored model of the most similar workload as the base model of a cost model
+
+        Parameters
+        ----------
+        cost_model: XGBoostCostModel
+            The cost model of the task to be tuned
+
+        Returns
+        -------
+        base_model: XGBoostCostModel or None
+            The loaded base model, or None if the store has no model for the task
+        """
+        entries = self.query(cost_model.task, cost_model.fea_type, cost_model.loss_type)
+        if not entries:
+            return None
+
+        dist, model_file, meta = entries[0]
+        with open(model_file, "rb") as f:
+            raw = f.read()
+        base_model = cost_model.spawn_base_model()
+        base_model.set_state(
+            {
+                "booster": raw,
+                "sample_size": meta["n_samples"],
+                "incremental_ct": 0,
+                "y_max": meta["y_max"],
+            }
+        )
+        cost_model.load_basemodel(base_model)
+        logger.info(
+            "Warm-start %s with the cost model of %s (distance %.2f)",
+            cost_model.task.name,
+            meta["workload"],
+            dist,
+        )
+        return base_model
+
+
+def _sanitize(name):
+    return re.sub(r"[^\w.\-]", "_", name)
+
+
+def _atomic_write(filename, data):
+    tmp_fd, tmp_name = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(filename))
+    try:
+        with os.fdopen(tmp_fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_name, filename)
+    except BaseException:
+        os.remove(tmp_name)
+        raise
+
+
+def _flatten_args(args):
+    """Flatten the arguments of a task into a list of numbers and strings"""
+    ret = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            ret.extend(_flatten_args(arg))
+        elif isinstance(arg, (bool, int, float, np.integer, np.floating)):
+            ret.append(float(arg))
+        else:
+            ret.append(str(arg))
+    return ret
+
+
+def _workload_distance(args_a, args_b):
+    """The distance of two flattened workloads, or None if they are not comparable.
+    Numbers are compared in log scale, while strings (dtypes, layouts) must be equal.
+    """
+    if len(args_a) != len(args_b):
+        return None
+    dist = 0.0
+    for a, b in zip(args_a, args_b):
+        if isinstance(a, str) or isinstance(b, str):
+            if a != b:
+                return None
+        else:
+            dist += abs(np.log2(1 + abs(a)) - np.log2(1 + abs(b)))
+    return dist
@@ -19,7 +19,6 @@
 Cost model optimizer based on simulated annealing
 """
 
-import heapq
 import logging
 import time
 
@@ -33,6 +32,9 @@ logger = logging.getLogger("autotvm")
 class SimulatedAnnealingOptimizer(ModelOptimizer):
     """parallel simulated annealing optimization algorithm
 
+    The `parallel_size` chains are advanced together as NumPy arrays, with one
+    batched cost model query per temperature step.
+
     Parameters
     ----------
     task: Task
@@ -84,17 +86,40 @@ class SimulatedAnnealingOptimizer(ModelOptimizer):
 
         scores = model.predict(points)
 
-        # build heap and insert initial points
-        heap_items = [(float("-inf"), -1 - i) for i in range(num)]
-        heapq.heapify(heap_items)
-        in_heap = set(exclusive)
-        in_heap.update([x[1] for x in heap_items])
-
-        for s, p in zip(scores, points):
-            if s > heap_items[0][0] and p not in in_heap:
-                pop = heapq.heapreplace(heap_items, (s, p))
-                in_heap.remove(pop[1])
-                in_heap.add(p)
+        # the best `num` points found so far, sorted by descending score
+        space = self.task.config_space
+        best_points = np.full(num, -1, dtype=space.point_dtype)
+        best_scores = np.full(num, float("-inf"))
+        # sorted once, so that membership is a binary search in every step
+        exclusive = np.unique(np.fromiter(exclusive, dtype=space.point_dtype, count=len(exclusive)))
+
+        def _in_exclusive(new_points):
+            if exclusive.size == 0:
+                return np.zeros(len(new_points), dtype=bool)
+            pos = np.minimum(np.searchsorted(exclusive, new_points), exclusive.size - 1)
+            return exclusive[pos] == new_points
+
+        def _update_best(new_points, new_scores):
+            """Merge the new points into the best points, return whether any of them entered"""
+            nonlocal best_points, best_scores
+            mask = new_scores > best_scores[-1]
+            if not np.any(mask):
+                return False
+            new_points, new_scores = new_points[mask], new_scores[mask]
+            mask = ~_in_exclusive(new_points) & ~np.isin(new_points, best_points)
+            new_points, new_scores = new_points[mask], new_scores[mask]
+            # keep the highest score of points that appear in several chains
+            order = np.argsort(-new_scores, kind="stable")
+            _, first = np.unique(new_points[order], return_index=True)
+            order = order[np.sort(first)]
+
+            all_points = np.concatenate([best_points, new_points[order]])
+            all_scores = np.concatenate([best_scores, new_scores[order]])
+            top = np.argsort(-all_scores, kind="stable")[:num]
+            best_points, best_scores = all_points[top], all_scores[top]
+            return bool(np.any(top >= num))
+
+        _update_best(points, scores)
 
         k = 0
         k_last_modify = 0
@@ -107,10 +132,8 @@ class SimulatedAnnealingOptimizer(ModelOptimizer):
             cool = 0
 
         while k < n_iter and k < k_last_modify + early_stop:
-            new_points = np.empty_like(points)
-            for i, p in enumerate(points):
-                new_points[i] = self.task.config_space.random_walk(p)
-
+            # advance all chains at once with a single batched model query
+            new_points = space.batch_random_walk(points)
             new_scores = model.predict(new_points)
 
             ac_prob = np.exp(np.minimum((new_scores - scores) / (t + 1e-5), 1))
@@ -119,12 +142,8 @@ class SimulatedAnnealingOptimizer(ModelOptimizer):
             points[ac_index] = new_points[ac_index]
             scores[ac_index] = new_scores[ac_index]
 
-            for s, p in zip(new_scores, new_points):
-                if s > heap_items[0][0] and p not in in_heap:
-                    pop = heapq.heapreplace(heap_items, (s, p))
-                    in_heap.remove(pop[1])
-                    in_heap.add(p)
-                    k_last_modify = k
+            if _update_best(new_points, new_scores):
+                k_last_modify = k
 
             k += 1
             t -= cool
@@ -136,20 +155,19 @@ class SimulatedAnnealingOptimizer(ModelOptimizer):
                     "elapsed: %.2f",
                     k,
                     k_last_modify,
-                    heap_items[0][0],
-                    np.max([v for v, _ in heap_items]),
+                    best_scores[-1],
+                    best_scores[0],
                     t_str,
                     time.time() - tic,
                 )
 
-        heap_items.sort(key=lambda item: -item[0])
-        heap_items = [x for x in heap_items if x[0] >= 0]
+        maximums = [(s, p) for s, p in zip(best_scores.tolist(), best_points.tolist()) if s >= 0]
         logger.debug(
             "SA iter: %d\tlast_update: %d\telapsed: %.2f", k, k_last_modify, time.time() - tic
         )
-        logger.debug("SA Maximums: %s", heap_items)
+        logger.debug("SA Maximums: %s", maximums)
 
         if self.persistent:
             self.points = points
 
-        return [x[1] for x in heap_items]
+        return [x[1] for x in maximums]
@@ -0,0 +1,260 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+# pylint: disable=invalid-name
+"""Task scheduler that allocates the trials of several AutoTVM tasks.
+Instead of tuning the tasks of a network one after another with a fixed number of trials,
+the scheduler tunes them in rounds and gives the next round to the task that is expected
+to reduce the end-to-end latency the most, similar to :any:`auto_scheduler.TaskScheduler`.
+"""
+import logging
+
+import numpy as np
+
+from ..measure import create_measure_batch
+
+logger = logging.getLogger("autotvm")
+
+
+class TaskScheduler(object):
+    """Allocate the time resources when tuning multiple AutoTVM tasks together
+
+    Parameters
+    ----------
+    tasks: List[Task]
+        All tasks to tune
+    tuners: List[Tuner]
+        The tuner of each task
+    task_weights: Optional[List[float]]
+        The weights of tasks, e.g. the number of times a task appears in the network.
+        The objective is the weighted sum of the best latencies of all tasks.
+    strategy: str = "gradient"
+        The scheduling strategy.
+        "round-robin": Tune tasks in round robin order.
+        "gradient" : Tune the task with the largest expected decrease of the objective,
+        estimated from its latency contribution (weight x best latency) and its recent
+        improvement.
+    alpha: float = 0.2
+        The weight of the recent improvement (backward gradient) in the 'gradient' strategy
+    beta: float = 2
+        The ratio of the flops of the best similar task a task is expected to reach
+        in the 'gradient' strategy. Tasks are similar if they use the same template.
+    backward_window_size: int = 3
+        The number of rounds to compute the recent improvement of a task
+    """
+
+    def __init__(
+        self,
+        tasks,
+        tuners,
+        task_weights=None,
+        strategy="gradient",
+        alpha=0.2,
+        beta=2,
+        backward_window_size=3,
+    ):
+        assert len(tasks) != 0, "No tasks"
+        assert len(tasks) == len(tuners), "Every task needs a tuner"
+        assert strategy in ["round-robin", "gradient"]
+
+        self.tasks = tasks
+        self.tuners = tuners
+        self.task_weights = task_weights or [1] * len(tasks)
+        self.strategy = strategy
+        self.alpha = alpha
+        self.beta = beta
+        self.backward_window_size = backward_window_size
+
+        # task_cts[i] saves how many rounds task i is tuned
+        self.task_cts = [0] * len(tasks)
+        # task_best_cts[i] saves the round task i found the best latency
+        self.task_best_cts = [0] * len(tasks)
+        # task_costs_history[i] saves the best latency of task i after each round
+        self.task_costs_history = [[] for _ in tasks]
+        # best_costs[i] saves the best latency of task i
+        self.best_costs = 1e10 * np.ones(len(tasks))
+        self.dead_tasks = set()
+
+        # tasks of the same template are similar
+        self.group_task_ids = {}
+        for i, task in enumerate(tasks):
+            self.group_task_ids.setdefault(task.name, []).append(i)
+
+        self.ct = 0
+        self.num_measures_per_round = None
+
+    def _compute_score(self, costs):
+        return sum(c * w for c, w in zip(costs, self.task_weights))
+
+    def tune(
+        self,
+        n_trial,
+        measure_option,
+        num_measures_per_round=64,
+        early_stopping=None,
+        per_task_early_stopping=None,
+        callbacks=(),
+    ):
+        """Tune all tasks together
+
+        Parameters
+        ----------
+        n_trial: int
+            The total number of configs to measure for all tasks
+        measure_option: dict
+            The options for how to measure generated code.
+            You should use the return value ot autotvm.measure_option for this argument.
+        num_measures_per_round: int = 64
+            The number of trials of a task in one round
+        early_stopping: int, optional
+            Stop tuning when the objective does not improve in this number of trials
+        per_task_early_stopping: int, optional
+            Stop tuning a task when its latency does not improve in this number of trials
+        callbacks: List of callable
+            The callback functions of :any:`Tuner.tune`, called for all tasks
+        """
+        early_stopping = early_stopping or 1e20
+        per_task_early_stopping = per_task_early_stopping or 1e20
+
+        # make sure every task is tuned at least once
+        self.num_measures_per_round = min(num_measures_per_round, n_trial // len(self.tasks))
+        if self.num_measures_per_round <= 0:
+            raise ValueError(
+                "n_trial is too small. Please set it to a higher value."
+                f"It should be at least {len(self.tasks)} for these tasks."
+            )
+
+        # keep the resources of the runner, e.g. the local tracker and server,
+        # alive across the rounds instead of restarting them for every round
+        measure_batch = create_measure_batch(self.tasks[0], measure_option)
+        try:
+            # warm up every task with one round
+            for idx in range(len(self.tasks)):
+                if not self.task_cts[idx]:
+                    self._tune_task(idx, measure_option, per_task_early_stopping, callbacks)
+            best_ct = self.ct
+            best_score = self._compute_score(self.best_costs)
+
+            task_idx = -1
+            while self.ct < n_trial and len(self.dead_tasks) < len(self.tasks):
+                if self.strategy == "round-robin":
+                    task_idx = (task_idx + 1) % len(self.tasks)
+                    while task_idx in self.dead_tasks:
+                        task_idx = (task_idx + 1) % len(self.tasks)
+                else:
+                    gradients = self._compute_gradients()
+                    if max(gradients) == min(gradients):
+                        alive = [i for i in range(len(self.tasks)) if i not in self.dead_tasks]
+                        task_idx = alive[np.random.randint(len(alive))]
+                    else:
+                        task_idx = int(np.argmin(gradients))
+
+                self._tune_task(task_idx, measure_option, per_task_early_stopping, callbacks)
+
+                score = self._compute_score(self.best_costs)
+                if score < best_score:
+                    best_score, best_ct = score, self.ct
+                elif self.ct - best_ct >= early_stopping and all(c < 1e9 for c in self.best_costs):
+                    logger.info(
+                        "Stop early since no performance improvement in the last %d trials",
+                        early_stopping,
+                    )
+                    break
+        finally:
+            del measure_batch
+            measure_option["runner"].close()
+            for tuner in self.tuners:
+                if hasattr(tuner, "save_model"):
+                    tuner.save_model()
+
+    def _compute_gradients(self):
+        """Estimate the change of the objective if each task is tuned for one more round"""
+        gradients = []
+        for i, task in enumerate(self.tasks):
+            if i in self.dead_tasks:
+                gradients.append(0)
+                continue
+
+            # the objective is linear in the latency of a task
+            chain_grad = self.task_weights[i]
+
+            # the improvement in the last rounds
+            history = self.task_costs_history[i]
+            if len(history) > self.backward_window_size:
+                backward_grad = (
+                    history[-1] - history[-1 - self.backward_window_size]
+                ) / self.backward_window_size
+            else:
+                backward_grad = 0
+
+            # the expected latency after one more round, bounded by similar tasks
+            g_next_1 = self.best_costs[i] - self.best_costs[i] / self.task_cts[i]
+            g_next_2 = self.beta * 1e30
+            group = self.group_task_ids[task.name]
+            if len(group) > 1 and task.flop:
+                best_flops = max(
+                    self.tasks[j].flop / self.best_costs[j] for j in group if self.tasks[j].flop
+                )
+                g_next_2 = self.beta * task.flop / best_flops
+            forward_grad = min(g_next_1, g_next_2) - self.best_costs[i]
+
+            gradients.append(
+                chain_grad * (self.alpha * backward_grad + (1 - self.alpha) * forward_grad)
+            )
+        return gradients
+
+    def _tune_task(self, task_idx, measure_option, per_task_early_stopping, callbacks):
+        """Tune the selected task for one round"""
+        tuner = self.tuners[task_idx]
+        n_measured = [0]
+
+        def _count(_, _inputs, results):
+            n_measured[0] += len(results)
+
+        if tuner.has_next():
+            tuner.tune(
+                n_trial=self.num_measures_per_round,
+                measure_option=measure_option,
+                callbacks=list(callbacks) + [_count],
+            )
+        self.ct += n_measured[0]
+        self.task_cts[task_idx] += 1
+
+        if tuner.best_measure_pair is not None:
+            cost = np.mean(tuner.best_measure_pair[1].costs)
+            if cost < self.best_costs[task_idx]:
+                self.best_costs[task_idx] = cost
+                self.task_best_cts[task_idx] = self.task_cts[task_idx]
+        self.task_costs_history[task_idx].append(self.best_costs[task_idx])
+
+        # stop tuning this task if its space has been fully explored
+        # or it has no improvement for a long while
+        no_change_trials = (
+            self.task_cts[task_idx] - self.task_best_cts[task_idx]
+        ) * self.num_measures_per_round
+        if n_measured[0] == 0 or no_change_trials > per_task_early_stopping:
+            self.dead_tasks.add(task_idx)
+
+        logger.info(
+            "Task %d/%d round %d: best latency %.4g ms, estimated total latency %.4g ms, "
+            "trials %d",
+            task_idx + 1,
+            len(self.tasks),
+            self.task_cts[task_idx],
+            self.best_costs[task_idx] * 1e3,
+            self._compute_score(self.best_costs) * 1e3,
+            self.ct,
+        )
@@ -16,18 +16,26 @@
 # under the License.
 # pylint: disable=unused-argument, no-self-use, invalid-name
 """Base class of tuner"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import os
+import pickle
+import random
 import tempfile
 
 import numpy as np
 
 from ..measure import MeasureInput, create_measure_batch
-from ..utils import format_si_prefix
+from ..record import encode, decode
+from ..utils import format_si_prefix, get_task_key
 
 from ..env import GLOBAL_SCOPE
 
 logger = logging.getLogger("autotvm")
 
+CHECKPOINT_VERSION = 1
+
 
 class Tuner(object):
     """Base class for tuners
@@ -38,6 +46,10 @@ class Tuner(object):
         Tuning Task
     """
 
+    # Whether next_batch can be called again before the previous batches are passed to
+    # update. Tuners that do not declare it are tuned with a pipeline depth of 1.
+    supports_pipelining = False
+
     def __init__(self, task, **kwargs):
         self.param = kwargs
         self.recorder = None
@@ -91,7 +103,18 @@ class Tuner(object):
             result for measurement
         """
 
-    def tune(self, n_trial, measure_option, early_stopping=None, callbacks=(), si_prefix="G"):
+    def tune(
+        self,
+        n_trial,
+        measure_option,
+        early_stopping=None,
+        callbacks=(),
+        si_prefix="G",
+        pipeline_depth=1,
+        checkpoint_file=None,
+        checkpoint_interval=1,
+        resume_from=None,
+    ):
         """Begin tuning
 
         Parameters
@@ -110,6 +133,27 @@ class Tuner(object):
             every measurement pair. See autotvm/tuner/callback.py for some examples.
         si_prefix: str
             One of tvm.autotvm.utils.SI_PREFIXES. The SI prefix to use when reporting FLOPS.
+        pipeline_depth: int, optional
+            The maximum number of measurement batches in flight.
+            With the default of 1, proposing, building and running a batch happen in lockstep.
+            With a larger value, the tuner proposes new batches while earlier ones are
+            being built by the builder and run by the runner, which keeps builders and
+            devices busy during model fitting. Results are fed back to the tuner in
+            proposal order as they arrive, so proposals can run ahead of the results
+            by up to `pipeline_depth - 1` batches. Tuners that do not set
+            `supports_pipelining` are always tuned in lockstep.
+        checkpoint_file: str, optional
+            If is not None, save the full state of the tuner to this file every
+            `checkpoint_interval` measured batches and at the end of tuning.
+            With pipelining, configs proposed but not measured yet at checkpoint
+            time are treated as visited after resuming.
+        checkpoint_interval: int, optional
+            The number of measured batches between two checkpoints.
+        resume_from: str, optional
+            A checkpoint file written by a previous tuning job of the same task and tuner.
+            Tuning continues from the saved state, and the trials measured before
+            count towards `n_trial` and `early_stopping`.
+            If the file does not exist, tuning starts from scratch.
         """
         measure_batch = create_measure_batch(self.task, measure_option)
         n_parallel = getattr(measure_batch, "n_parallel", 1)
@@ -122,18 +166,39 @@ class Tuner(object):
 
         old_level = logger.level
 
-        GLOBAL_SCOPE.in_tuning = True
         i = error_ct = 0
-        errors = []
-        while i < n_trial:
-            if not self.has_next():
-                break
+        if resume_from is not None:
+            if os.path.exists(resume_from):
+                i, error_ct = self.load_checkpoint(resume_from)
+                logger.info("Resume tuning from %s after %d trials", resume_from, i)
+            else:
+                logger.warning(
+                    "Checkpoint %s does not exist, start tuning from scratch", resume_from
+                )
 
-            configs = self.next_batch(min(n_parallel, n_trial - i))
+        if pipeline_depth > 1 and not self.supports_pipelining:
+            logger.warning(
+                "%s does not support pipelining, measure one batch at a time",
+                type(self).__name__,
+            )
+            pipeline_depth = 1
 
-            inputs = [MeasureInput(self.task.target, self.task, config) for config in configs]
-            results = measure_batch(inputs)
+        # the runner can skip the repeats of candidates much slower than the best one,
+        # which is kept by the tuner across tune() calls and checkpoints
+        if self.best_measure_pair is not None:
+            measure_batch.runner.best_cost = np.mean(self.best_measure_pair[1].costs)
 
+        GLOBAL_SCOPE.in_tuning = True
+        if pipeline_depth > 1:
+            batches = self._measure_pipelined(
+                measure_batch, n_trial - i, n_parallel, pipeline_depth
+            )
+        else:
+            batches = self._measure_lockstep(measure_batch, n_trial - i, n_parallel)
+
+        n_batch = 0
+        errors = []
+        for inputs, results in batches:
             # keep best config
             for k, (inp, res) in enumerate(zip(inputs, results)):
                 config = inp.config
@@ -156,6 +221,7 @@ class Tuner(object):
                     self.best_config = config
                     self.best_measure_pair = (inp, res)
                     self.best_iter = i + k
+                    measure_batch.runner.best_cost = np.mean(res.costs)
 
                 logger.debug(
                     "No: %d\t%sFLOPS: %.2f/%.2f\tresult: %s\t%s",
@@ -174,6 +240,10 @@ class Tuner(object):
             for callback in callbacks:
                 callback(self, inputs, results)
 
+            n_batch += 1
+            if checkpoint_file is not None and n_batch % checkpoint_interval == 0:
+                self.save_checkpoint(checkpoint_file, i, error_ct)
+
             if i >= self.best_iter + early_stopping:
                 logger.debug("Early stopped. Best iter: %d.", self.best_iter)
                 break
@@ -195,9 +265,169 @@ class Tuner(object):
                 self.task,
                 f,
             )
+        batches.close()
+        if checkpoint_file is not None:
+            self.save_checkpoint(checkpoint_file, i, error_ct)
         GLOBAL_SCOPE.in_tuning = False
         del measure_batch
 
+    def _measure_lockstep(self, measure_batch, n_trial, n_parallel):
+        """Generator: propose and measure one batch at a time.
+        The next batch is proposed after the tuner is updated with the previous one.
+        """
+        i = 0
+        while i < n_trial:
+            if not self.has_next():
+                break
+
+            configs = self.next_batch(min(n_parallel, n_trial - i))
+
+            inputs = [MeasureInput(self.task.target, self.task, config) for config in configs]
+            results = measure_batch(inputs)
+            i += len(results)
+            yield inputs, results
+
+    def _measure_pipelined(self, measure_batch, n_trial, n_parallel, pipeline_depth):
+        """Generator: keep up to pipeline_depth batches in flight.
+        Building and running happen in their own threads, so a batch can be built
+        while the previous one is running and the tuner is proposing the next one.
+        """
+        builder, runner = measure_batch.builder, measure_batch.runner
+        builder.pipeline_depth = pipeline_depth
+        build_pool = ThreadPoolExecutor(max_workers=1)
+        run_pool = ThreadPoolExecutor(max_workers=1)
+
+        def _run(inputs, build_future):
+            results = runner.run(inputs, build_future.result())
+            builder.update(inputs, results)
+            return results
+
+        inflight = deque()
+        proposed = 0
+        try:
+            while True:
+                while len(inflight) < pipeline_depth and proposed < n_trial and self.has_next():
+                    configs = self.next_batch(min(n_parallel, n_trial - proposed))
+                    if not configs:
+                        break
+                    inputs = [
+                        MeasureInput(self.task.target, self.task, config) for config in configs
+                    ]
+                    build_future = build_pool.submit(builder.build, inputs)
+                    inflight.append((inputs, run_pool.submit(_run, inputs, build_future)))
+                    proposed += len(inputs)
+
+                if not inflight:
+                    break
+                inputs, run_future = inflight.popleft()
+                yield inputs, run_future.result()
+        finally:
+            # drop the batches that have not started when tuning stops early
+            for _, run_future in inflight:
+                run_future.cancel()
+            build_pool.shutdown(wait=True)
+            run_pool.shutdown(wait=True)
+            builder.pipeline_depth = 1
+
+    def get_state(self):
+        """Get the state of the tuner for checkpointing.
+        Subclasses extend the state of the base class with their own search state.
+
+        Returns
+        -------
+        state: dict
+            A picklable dictionary
+        """
+        best_record = None
+        if self.best_measure_pair is not None:
+            best_record = encode(*self.best_measure_pair)
+        return {
+            "best_flops": self.best_flops,
+            "best_iter": self.best_iter,
+            "best_record": best_record,
+        }
+
+    def set_state(self, state):
+        """Restore the state of the tuner saved by `get_state`
+
+        Parameters
+        ----------
+        state: dict
+            The state returned by `get_state`
+        """
+        self.best_flops = state["best_flops"]
+        self.best_iter = state["best_iter"]
+        self.best_config = self.best_measure_pair = None
+        if state["best_record"] is not None:
+            self.best_measure_pair = decode(state["best_record"])
+            self.best_config = self.best_measure_pair[0].config
+
+    def save_checkpoint(self, filename, n_measured=0, error_ct=0):
+        """Save the state of the tuner and the random number generators to a file.
+        The file is replaced atomically, so an interrupted save keeps the previous checkpoint.
+
+        Parameters
+        ----------
+        filename: str
+            The checkpoint file
+        n_measured: int
+            The number of trials measured so far
+        error_ct: int
+            The number of consecutive failed trials
+        """
+        checkpoint = {
+            "version": CHECKPOINT_VERSION,
+            "tuner": type(self).__name__,
+            "task": get_task_key(self.task),
+            "n_measured": n_measured,
+            "error_ct": error_ct,
+            "np_random": np.random.get_state(),
+            "random": random.getstate(),
+            "state": self.get_state(),
+        }
+        dirname = os.path.dirname(os.path.abspath(filename))
+        fd, tmp_name = tempfile.mkstemp(prefix=".tuner_checkpoint_", dir=dirname)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(checkpoint, f)
+            os.replace(tmp_name, filename)
+        except BaseException:
+            os.remove(tmp_name)
+            raise
+
+    def load_checkpoint(self, filename):
+        """Restore the state of the tuner and the random number generators from a file
+        written by `save_checkpoint`
+
+        Parameters
+        ----------
+        filename: str
+            The checkpoint file
+
+        Returns
+        -------
+        n_measured: int
+            The number of trials measured before the checkpoint
+        error_ct: int
+            The number of consecutive failed trials before the checkpoint
+        """
+        with open(filename, "rb") as f:
+            checkpoint = pickle.load(f)
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            raise RuntimeError(f"Unsupported tuner checkpoint version in {filename}")
+        if checkpoint["tuner"] != type(self).__name__:
+            raise RuntimeError(
+                f"Checkpoint {filename} was written by {checkpoint['tuner']}, "
+                f"not by {type(self).__name__}"
+            )
+        if checkpoint["task"] != get_task_key(self.task):
+            raise RuntimeError(f"Checkpoint {filename} was written for another task")
+
+        self.set_state(checkpoint["state"])
+        np.random.set_state(checkpoint["np_random"])
+        random.setstate(checkpoint["random"])
+        return checkpoint["n_measured"], checkpoint["error_ct"]
+
     def reset(self):
         """reset the status of tuner"""
         self.best_config = None
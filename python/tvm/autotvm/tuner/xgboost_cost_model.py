@@ -17,6 +17,7 @@
 # pylint: disable=invalid-name
 """XGBoost as cost model"""
 
+import hashlib
 import logging
 import time
 
@@ -26,7 +27,7 @@ import numpy as np
 from tvm.contrib.popen_pool import PopenPoolExecutor, StatusKind
 
 from .. import feature
-from ..utils import get_rank
+from ..utils import get_rank, get_task_key
 from .metric import cover_curve, max_curve, recall_curve
 from .model_based_tuner import CostModel, FeatureCache
 
@@ -79,6 +80,22 @@ class XGBoostCostModel(CostModel):
         If is not none, the cost model will print training log every `log_interval` iterations.
     upper_model: XGBoostCostModel, optional
         The upper model used in transfer learning
+    incremental: bool, optional
+        If is True, `fit` continues boosting the previous model on the samples
+        measured since the last call instead of retraining from scratch.
+        A full refit still happens every `refit_interval` fits, when the model
+        is combined with a base model, or when the validation error drifts.
+    refit_interval: int, optional
+        The number of incremental fits between two full refits.
+    drift_threshold: float, optional
+        Do a full refit when the score of the previous model on the new samples
+        drops below `(1 - drift_threshold)` times its score on the samples it was
+        trained on, both evaluated as the average recall of the top `n_new` samples.
+    feature_cache_bytes: int, optional
+        If is not None, bound the memory of the feature cache with LRU eviction.
+    feature_cache_dir: str, optional
+        If is not None, spill extracted features to memory-mapped per-task files in
+        this directory, so they are reused across tuner restarts.
     """
 
     def __init__(
@@ -89,6 +106,11 @@ class XGBoostCostModel(CostModel):
         num_threads=None,
         log_interval=25,
         upper_model=None,
+        incremental=False,
+        refit_interval=8,
+        drift_threshold=0.3,
+        feature_cache_bytes=None,
+        feature_cache_dir=None,
     ):
         global xgb
         super(XGBoostCostModel, self).__init__()
@@ -155,7 +177,11 @@ class XGBoostCostModel(CostModel):
         if upper_model:  # share a same feature cache with upper model
             self.feature_cache = upper_model.feature_cache
         else:
-            self.feature_cache = FeatureCache()
+            self.feature_cache = FeatureCache(
+                max_bytes=feature_cache_bytes,
+                spill_dir=feature_cache_dir,
+                name=_task_cache_name(task),
+            )
         self.upper_model = upper_model
         self.feature_extra_ct = 0
         self.pool = None
@@ -164,6 +190,17 @@ class XGBoostCostModel(CostModel):
         self._sample_size = 0
         self._reset_pool(self.space, self.target, self.task)
 
+        self.incremental = incremental
+        self.refit_interval = refit_interval
+        self.drift_threshold = drift_threshold
+        self._incremental_ct = 0
+        self._y_max = 0.0
+
+        # growable buffer of the features of the training samples
+        self._fea_buf = np.empty((0, 0), dtype=np.float32)
+        self._fea_index = np.empty((0,), dtype=np.int64)
+        self._fea_size = 0
+
     def _reset_pool(self, space, target, task):
         """reset processing pool for feature extraction"""
 
@@ -195,14 +232,10 @@ class XGBoostCostModel(CostModel):
         tic = time.time()
         self._reset_pool(self.space, self.target, self.task)
 
-        x_train = self._get_feature(xs)
+        x_train, n_old = self._append_feature(xs)
         y_train = np.array(ys)
         y_max = np.max(y_train)
-        y_train = y_train / max(y_max, 1e-8)
-
         valid_index = y_train > 1e-6
-        index = np.random.permutation(len(x_train))
-        dtrain = xgb.DMatrix(x_train[index], y_train[index])
         self._sample_size = len(x_train)
 
         if self.base_model:
@@ -210,8 +243,41 @@ class XGBoostCostModel(CostModel):
             if discount < 0.05:  # discard base model
                 self.base_model.upper_model = None
                 self.base_model = None
-            else:
-                dtrain.set_base_margin(discount * self.base_model.predict(xs, output_margin=True))
+
+        if self._can_fit_incrementally(n_old, y_max):
+            # new samples are normalized with the scale the model was trained on
+            y_scaled = y_train / max(self._y_max, 1e-8)
+            dnew = xgb.DMatrix(x_train[n_old:], y_scaled[n_old:])
+            n_new = len(xs) - n_old
+            # compare the scores on the new and the trained samples at the same N
+            feval = xgb_average_recalln_curve_score(min(n_new, n_old))
+            score = _eval_score(self.bst, dnew, feval)
+            train_score = _eval_score(
+                self.bst, xgb.DMatrix(x_train[:n_old], y_scaled[:n_old]), feval
+            )
+            if score >= (1 - self.drift_threshold) * train_score:
+                self._fit_incremental(dnew, n_new)
+                self._incremental_ct += 1
+                logger.debug(
+                    "XGB incremental train: %.2f\tobs: %d\tnew: %d",
+                    time.time() - tic,
+                    len(xs),
+                    n_new,
+                )
+                return
+            logger.debug("XGB drift detected: %.4f vs %.4f, refit", score, train_score)
+
+        self._y_max = max(y_max, 1e-8)
+        y_train = y_train / self._y_max
+
+        index = np.random.permutation(len(x_train))
+        dtrain = xgb.DMatrix(x_train[index], y_train[index])
+
+        if self.base_model:
+            dtrain.set_base_margin(
+                self._base_model_discount()
+                * self.base_model.predict(np.asarray(xs)[index], output_margin=True)
+            )
 
         self.bst = xgb.train(
             self.xgb_params,
@@ -229,6 +295,7 @@ class XGBoostCostModel(CostModel):
                 )
             ],
         )
+        self._incremental_ct = 0
 
         logger.debug(
             "XGB train: %.2f\tobs: %d\terror: %d\tn_cache: %d",
@@ -238,6 +305,69 @@ class XGBoostCostModel(CostModel):
             self.feature_cache.size(self.fea_type),
         )
 
+    def _can_fit_incrementally(self, n_old, y_max):
+        """Whether the next fit can continue boosting the current model"""
+        if not self.incremental or self.bst is None or self.base_model is not None:
+            return False
+        if n_old in (0, self._fea_size):
+            return False
+        if self._incremental_ct >= self.refit_interval:
+            return False
+        # the regression labels are normalized by the best flops seen so far,
+        # so a new maximum invalidates the scale of the previous trees
+        if self.loss_type == "reg" and y_max > self._y_max:
+            return False
+        return True
+
+    def _fit_incremental(self, dnew, n_new):
+        """Continue boosting the current model on the new samples only"""
+        # reset the early stopping state recorded by the previous training
+        self.bst.set_attr(best_score=None, best_iteration=None, best_msg=None)
+        self.bst = xgb.train(
+            self.xgb_params,
+            dnew,
+            num_boost_round=400,
+            xgb_model=self.bst,
+            callbacks=[
+                CustomCallback(
+                    stopping_rounds=20,
+                    metric=f"tr-a-recall@{n_new}",
+                    evals=[(dnew, "tr")],
+                    maximize=True,
+                    fevals=[xgb_average_recalln_curve_score(n_new)],
+                    verbose_eval=self.log_interval,
+                    loss_type=self.loss_type,
+                )
+            ],
+        )
+
+    def _append_feature(self, xs):
+        """Append the features of the samples that are not in the buffer yet.
+        Return the features of all samples in `xs` and the number of reused rows."""
+        xs = np.asarray(xs, dtype=np.int64)
+        n_old = self._fea_size
+        # the training samples only grow by appending, rebuild the buffer otherwise
+        if len(xs) < n_old or not np.array_equal(xs[:n_old], self._fea_index[:n_old]):
+            n_old = self._fea_size = 0
+
+        if len(xs) > n_old:
+            new_feas = self._get_feature(xs[n_old:])
+            n_total = len(xs)
+            n_cols = max(self._fea_buf.shape[1], new_feas.shape[1])
+            if n_total > self._fea_buf.shape[0] or n_cols > self._fea_buf.shape[1]:
+                capacity = max(n_total, 2 * self._fea_buf.shape[0])
+                buf = np.zeros((capacity, n_cols), dtype=np.float32)
+                buf[:n_old, : self._fea_buf.shape[1]] = self._fea_buf[:n_old]
+                index = np.empty((capacity,), dtype=np.int64)
+                index[:n_old] = self._fea_index[:n_old]
+                self._fea_buf, self._fea_index = buf, index
+            self._fea_buf[n_old:n_total, : new_feas.shape[1]] = new_feas
+            self._fea_buf[n_old:n_total, new_feas.shape[1] :] = 0
+            self._fea_index[n_old:n_total] = xs[n_old:]
+            self._fea_size = n_total
+
+        return self._fea_buf[: self._fea_size], n_old
+
     def fit_log(self, records, plan_size, min_seed_records=500):
         tic = time.time()
 
@@ -319,6 +449,10 @@ class XGBoostCostModel(CostModel):
 
     def predict(self, xs, output_margin=False):
         feas = self._get_feature(xs)
+        # a model trained on another workload may have seen shorter features
+        n_features = self.bst.num_features()
+        if feas.shape[1] > n_features:
+            feas = feas[:, :n_features]
         dtest = xgb.DMatrix(feas)
 
         if self.base_model:
@@ -328,6 +462,23 @@ class XGBoostCostModel(CostModel):
 
         return self.bst.predict(dtest, output_margin=output_margin)
 
+    def get_state(self):
+        return {
+            "booster": None if self.bst is None else bytes(self.bst.save_raw()),
+            "sample_size": self._sample_size,
+            "incremental_ct": self._incremental_ct,
+            "y_max": self._y_max,
+        }
+
+    def set_state(self, state):
+        self.bst = None
+        if state["booster"] is not None:
+            self.bst = xgb.Booster(self.xgb_params)
+            self.bst.load_model(bytearray(state["booster"]))
+        self._sample_size = state["sample_size"]
+        self._incremental_ct = state["incremental_ct"]
+        self._y_max = state["y_max"]
+
     def load_basemodel(self, base_model):
         self.base_model = base_model
         self.base_model._close_pool()
@@ -340,29 +491,38 @@ class XGBoostCostModel(CostModel):
 
     def _get_feature(self, indexes):
         """get features for indexes, run extraction if we do not have cache for them"""
-        # free feature cache
-        if self.feature_cache.size(self.fea_type) >= 100000:
+        # free feature cache, a bounded cache evicts by itself
+        if (
+            self.feature_cache.max_bytes is None
+            and self.feature_cache.size(self.fea_type) >= 100000
+        ):
             self.feature_cache.clear(self.fea_type)
 
         fea_cache = self.feature_cache.get(self.fea_type)
 
         indexes = np.array(indexes)
-        need_extract = [x for x in indexes if x not in fea_cache]
+        # keep the features of this batch, a bounded cache may evict them meanwhile
+        feas = {}
+        for x in indexes:
+            if x not in feas and x in fea_cache:
+                feas[x] = fea_cache[x]
+        need_extract = [x for x in indexes if x not in feas]
 
         if need_extract:
             pool = self._get_pool()
-            feas = pool.map_with_error_catching(self.feature_extract_func, need_extract)
-            for i, fea in zip(need_extract, feas):
-                fea_cache[i] = fea.value if fea.status == StatusKind.COMPLETE else None
+            results = pool.map_with_error_catching(self.feature_extract_func, need_extract)
+            for i, fea in zip(need_extract, results):
+                feas[i] = fea.value if fea.status == StatusKind.COMPLETE else None
+                fea_cache[i] = feas[i]
 
         feature_len = -1
         for idx in indexes:
-            if fea_cache[idx] is not None:
-                feature_len = max(fea_cache[idx].shape[-1], feature_len)
+            if feas[idx] is not None:
+                feature_len = max(feas[idx].shape[-1], feature_len)
 
         ret = np.empty((len(indexes), feature_len), dtype=np.float32)
         for i, ii in enumerate(indexes):
-            t = fea_cache[ii]
+            t = feas[ii]
             if t is not None and t.shape[0] < feature_len:
                 t = np.pad(t, (0, feature_len - t.shape[0]))
             ret[i, :] = t if t is not None else 0
@@ -372,6 +532,11 @@ class XGBoostCostModel(CostModel):
         self._close_pool()
 
 
+def _task_cache_name(task):
+    """the name of the spilled feature files of a task"""
+    return f"{task.name}.{hashlib.sha1(get_task_key(task).encode()).hexdigest()[:16]}"
+
+
 # Global variables for passing arguments to extract functions.
 _extract_space = None
 _extract_target = None
@@ -631,6 +796,12 @@ class CustomCallback(XGBoostCallback):
         return False
 
 
+def _eval_score(bst, dmatrix, feval):
+    """evaluate a feval on a dmatrix with the predictions of a booster"""
+    _, score = feval(bst.predict(dmatrix), dmatrix)
+    return score
+
+
 # feval wrapper for xgboost
 def xgb_max_curve_score(N):
     """evaluate max curve score for xgb"""
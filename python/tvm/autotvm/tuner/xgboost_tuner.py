@@ -15,10 +15,13 @@
 # specific language governing permissions and limitations
 # under the License.
 """Tuner that uses xgboost as cost model"""
+import time
 
 from .model_based_tuner import ModelBasedTuner, ModelOptimizer
+from .model_store import ModelStore
 from .xgboost_cost_model import XGBoostCostModel
 from .sa_model_optimizer import SimulatedAnnealingOptimizer
+from ..env import GLOBAL_SCOPE
 
 
 class XGBTuner(ModelBasedTuner):
@@ -72,6 +75,28 @@ class XGBTuner(ModelBasedTuner):
         The verbose level.
         If is 0, output nothing.
         Otherwise, output debug information every `verbose` iterations.
+
+    incremental: bool = False
+        If is True, the cost model continues boosting on the new samples of each plan
+        instead of retraining from scratch, and refits fully only periodically.
+
+    feature_cache_bytes: int, optional
+        If is not None, bound the memory of the feature cache with LRU eviction.
+
+    feature_cache_dir: str, optional
+        If is not None, spill extracted features to memory-mapped per-task files
+        in this directory, so they are reused across tuner restarts.
+
+    model_store: str or ModelStore, optional
+        If is not None, a persistent store of trained cost models.
+        A task without history is warm-started with the stored model of the most similar
+        workload of the same template and target, and the trained model is saved to the
+        store at the end of tuning.
+
+    model_store_interval: float = 300
+        The minimum number of seconds between two saves to the model store, for a tuner
+        whose `tune` is called once per round, e.g. by a TaskScheduler.
+        Call `save_model` to save the latest model at the end.
     """
 
     def __init__(
@@ -84,6 +109,11 @@ class XGBTuner(ModelBasedTuner):
         optimizer="sa",
         diversity_filter_ratio=None,
         log_interval=50,
+        incremental=False,
+        feature_cache_bytes=None,
+        feature_cache_dir=None,
+        model_store=None,
+        model_store_interval=300,
     ):
         cost_model = XGBoostCostModel(
             task,
@@ -91,6 +121,9 @@ class XGBTuner(ModelBasedTuner):
             loss_type=loss_type,
             num_threads=num_threads,
             log_interval=log_interval // 2,
+            incremental=incremental,
+            feature_cache_bytes=feature_cache_bytes,
+            feature_cache_dir=feature_cache_dir,
         )
         if optimizer == "sa":
             optimizer = SimulatedAnnealingOptimizer(task, log_interval=log_interval)
@@ -103,8 +136,48 @@ class XGBTuner(ModelBasedTuner):
             task, cost_model, optimizer, plan_size, diversity_filter_ratio
         )
 
+        if model_store is not None and not isinstance(model_store, ModelStore):
+            model_store = ModelStore(model_store)
+        self.model_store = model_store
+        self.model_store_interval = model_store_interval
+        self._saved_train_ct = 0
+        self._last_save = None
+
     def tune(self, *args, **kwargs):  # pylint: disable=arguments-differ
+        # a resumed tuner restores its own history instead
+        if (
+            self.model_store is not None
+            and self.cost_model.base_model is None
+            and not self.xs
+            and not kwargs.get("resume_from")
+        ):
+            GLOBAL_SCOPE.in_tuning = True
+            base_model = self.model_store.warm_start(self.cost_model)
+            if base_model is not None and not self.trials:
+                self.trials = self.model_optimizer.find_maximums(
+                    base_model, self.plan_size, self.visited
+                )
+                self.trial_pt = 0
+            GLOBAL_SCOPE.in_tuning = False
+
         super(XGBTuner, self).tune(*args, **kwargs)
 
+        if self._last_save is None or time.time() - self._last_save >= self.model_store_interval:
+            self.save_model()
+
         # manually close pool to avoid multiprocessing issues
         self.cost_model._close_pool()
+
+    def save_model(self):
+        """Save the cost model to the model store if it is retrained since the last save
+
+        Returns
+        -------
+        saved: bool
+            Whether the model was saved
+        """
+        if self.model_store is None or self.train_ct == self._saved_train_ct:
+            return False
+        self._last_save = time.time()
+        self._saved_train_ct = self.train_ct
+        return self.model_store.save(self.cost_model)
@@ -167,3 +167,18 @@ YOCTO_EXP10 = -24
 def format_si_prefix(x, si_prefix):
     exp10 = 10 ** (SI_PREFIXES.index(si_prefix) * 3 + YOCTO_EXP10)
     return float(x) / exp10
+
+
+def get_task_key(task):
+    """get a string that identifies a tuning task across sessions
+
+    Parameters
+    ----------
+    task: autotvm.task.Task
+
+    Returns
+    -------
+    key: str
+        the key built from the name, arguments and targets of the task
+    """
+    return repr((task.name, task.args, str(task.target), str(task.target_host)))
@@ -371,12 +371,18 @@ class PopenPoolExecutor:
             raise TypeError("initializer must be callable for PopenPoolExecutor")
 
     def __del__(self):
+        self.shutdown()
+
+    def shutdown(self):
+        """Kill the worker processes and release the resources of the executor.
+        Pending functions are not waited for."""
         self._lock.acquire()
         for worker in self._worker_map.values():
             try:
                 worker.kill()
             except ImportError:
                 pass
+        self._worker_map = {}
         self._lock.release()
         self._threadpool.shutdown()
 
@@ -29,6 +29,7 @@
 #include <tvm/runtime/registry.h>
 
 #include <fstream>
+#include <mutex>
 #include <sstream>
 #include <string>
 #include <utility>
@@ -351,8 +352,14 @@ void ReadMeasureRecord(const std::string& str, MeasureInputNode* inp, MeasureRes
 
 void RecordToFileNode::Callback(const SearchPolicy& policy, const Array<MeasureInput>& inputs,
                                 const Array<MeasureResult>& results) {
+  // Serialize the batch first and append it at once, so the records written by the measurers
+  // of tasks tuned concurrently are not interleaved.
+  std::ostringstream os;
+  WriteMeasureRecords(&os, inputs, results);
+  static std::mutex mutex;
+  std::lock_guard<std::mutex> lock(mutex);
   std::ofstream ofs(filename, std::ofstream::app);
-  WriteMeasureRecords(&ofs, inputs, results);
+  ofs << os.str();
 }
 
 RecordReader::RecordReader(String filename) {
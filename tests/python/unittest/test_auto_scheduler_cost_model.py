@@ -79,6 +79,57 @@ def test_xgb_model():
     model.load(tmpfile)
 
 
+def test_xgb_model_incremental():
+    task, inputs, results = get_sample_records(50)
+
+    model = auto_scheduler.XGBModel(
+        num_warmup_sample=-1, incremental=True, refit_interval=2, replay_buffer_size=32
+    )
+    # the first update trains a model, the next two continue boosting it, then it is refit
+    n_rounds = 0
+    for i, incremental_ct in zip(range(0, 50, 10), [0, 1, 2, 0, 1]):
+        model.update(inputs[i : i + 10], results[i : i + 10])
+        # the measurement inputs are dropped once their features are extracted
+        assert not model.inputs
+        assert len(model._replay_costs) == min(i + 10, 32)
+        assert model._incremental_ct == incremental_ct
+        if incremental_ct:
+            assert model.bst.num_boosted_rounds() > n_rounds
+        n_rounds = model.bst.num_boosted_rounds()
+    assert model.num_samples == 50
+
+    preds = model.predict(task, [x.state for x in inputs])
+    assert len(preds) == len(inputs)
+    stage_preds = model.predict_stages(task, [x.state for x in inputs])
+    np.testing.assert_allclose(stage_preds[: len(inputs)], preds, rtol=1e-5)
+
+
+def test_xgb_model_incremental_unregistered():
+    _, inputs, results = get_sample_records(20)
+
+    # records read from a file whose tasks cannot be rebuilt in this process
+    tmpdir = tvm.contrib.utils.tempdir()
+    tmpfile = tmpdir.relpath("records.json")
+    auto_scheduler.save_records(tmpfile, inputs[:10], results[:10])
+    with open(tmpfile) as f:
+        log = f.read()
+    with open(tmpfile, "w") as f:
+        f.write(log.replace("matmul_auto_scheduler_test", "unregistered_matmul"))
+    unregistered_inputs, unregistered_results = auto_scheduler.load_records(tmpfile)
+
+    model = auto_scheduler.XGBModel(num_warmup_sample=-1, incremental=True)
+    # only the records of unregistered tasks are dropped
+    model.update(list(unregistered_inputs) + inputs[10:], list(unregistered_results) + results[10:])
+    assert model.num_samples == len(model._replay_costs) == 10
+    costs = [np.mean([x.value for x in res.costs]) for res in results[10:]]
+    np.testing.assert_allclose(model._replay_costs, costs)
+
+    model.update(unregistered_inputs, unregistered_results)
+    assert model.num_samples == 10
+
+
 if __name__ == "__main__":
     test_random_model()
     test_xgb_model()
+    test_xgb_model_incremental()
+    test_xgb_model_incremental_unregistered()
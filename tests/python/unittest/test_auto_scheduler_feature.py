@@ -20,6 +20,9 @@
 import math
 import tempfile
 
+import numpy as np
+import pytest
+
 import tvm
 from tvm import te, auto_scheduler, relay
 from tvm.script import tir as T
@@ -299,7 +302,37 @@ def test_zero_dim():
     assert features["B0.stride"] == 1
 
 
+def test_ragged_features():
+    dag = auto_scheduler.ComputeDAG(matmul_auto_scheduler_test(64, 64, 64))
+    target = tvm.target.Target("llvm")
+    task = auto_scheduler.SearchTask(compute_dag=dag, workload_key="test", target=target)
+    states = [dag.get_init_state()] * 3
+
+    features = auto_scheduler.feature.get_per_store_features_from_states(states, task)
+    ragged = auto_scheduler.feature.get_per_store_features_from_states(states, task, ragged=True)
+    assert len(ragged) == len(features)
+    for x, y in zip(features, ragged):
+        np.testing.assert_allclose(np.asarray(x, dtype="float32"), y)
+    assert not ragged.all_zero().any()
+    np.testing.assert_equal(ragged[-1], ragged[2])
+    with pytest.raises(IndexError):
+        ragged[3]  # pylint: disable=pointless-statement
+
+    # grow a cache in place and gather records from it
+    cache = auto_scheduler.feature.RaggedFeatures()
+    cache.extend(ragged[:1])
+    cache.extend(ragged[1:])
+    cache.extend(list(features))
+    assert len(cache) == 6
+    np.testing.assert_equal(cache.row_counts(), [len(x) for x in features] * 2)
+    np.testing.assert_allclose(cache.take([5, 0])[0], np.asarray(features[2], dtype="float32"))
+    np.testing.assert_equal(cache.take([-1])[0], cache[5])
+    assert len(list(cache)) == 6
+    np.testing.assert_equal(cache.pack_ids(), np.repeat(np.arange(6), cache.row_counts()))
+
+
 if __name__ == "__main__":
     test_cpu_matmul()
     test_cpu_fusion()
     test_gpu_feature()
+    test_ragged_features()
@@ -19,6 +19,7 @@
 import json
 
 import multiprocessing
+import os
 import numpy as np
 import tvm
 from tvm import topi
@@ -203,6 +204,77 @@ def test_recover_measure_input():
         assert str(correct_inp.state) == str(inp.state)
 
 
+def test_record_index():
+    task = auto_scheduler.SearchTask(
+        func=matmul_auto_scheduler_test, args=(64, 64, 64), target="llvm"
+    )
+    inp = auto_scheduler.measure.MeasureInput(task, task.compute_dag.init_state)
+
+    def result(cost, error_no=0):
+        return auto_scheduler.measure.MeasureResult([cost], error_no, "", 0.2, 1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_file = os.path.join(tmpdir, "records.json")
+        callback = auto_scheduler.RecordToIndexedFile(log_file)
+        callback.callback(None, [inp] * 3, [result(0.3), result(0.1), result(0.01, 1)])
+        assert os.path.isfile(log_file + auto_scheduler.measure_record.RECORD_INDEX_SUFFIX)
+
+        _, res = auto_scheduler.load_best_record(log_file, task.workload_key)
+        assert np.isclose(res.costs[0].value, 0.1)
+
+        # records appended by other writers are indexed when the index is used
+        auto_scheduler.save_records(log_file, [inp], [result(0.05)])
+        _, res = auto_scheduler.load_best_record(log_file, task.workload_key, task.target)
+        assert np.isclose(res.costs[0].value, 0.05)
+        context = auto_scheduler.ApplyHistoryBest(log_file)
+        entry = context.best_by_targetkey["cpu"]
+        assert np.allclose([cost for _, cost in list(entry.values())[0].values()], [0.05])
+
+        # the index is rebuilt when the log file is rewritten
+        open(log_file, "w").close()
+        auto_scheduler.save_records(log_file, [inp], [result(0.2)])
+        index = auto_scheduler.RecordIndex(log_file)
+        _, res = index.load_best(task.workload_key)
+        assert np.isclose(res.costs[0].value, 0.2)
+        assert len(index.best_records()) == 1
+        index.close()
+
+
+def test_distill_and_merge_record_files():
+    task = auto_scheduler.SearchTask(
+        func=matmul_auto_scheduler_test, args=(64, 64, 64), target="llvm"
+    )
+    inp = auto_scheduler.measure.MeasureInput(task, task.compute_dag.init_state)
+
+    def result(cost, error_no=0):
+        return auto_scheduler.measure.MeasureResult([cost], error_no, "", 0.2, 1)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log_a = os.path.join(tmpdir, "a.json")
+        log_b = os.path.join(tmpdir, "b.json")
+        auto_scheduler.save_records(log_a, [inp] * 3, [result(0.3), result(0.2), result(0.01, 1)])
+        auto_scheduler.save_records(log_b, [inp] * 2, [result(0.4), result(0.1)])
+
+        # small chunks split the files between lines
+        out_file = os.path.join(tmpdir, "best.json")
+        auto_scheduler.measure_record.distill_record_file(log_a, out_file, chunk_size=100)
+        _, results = zip(*auto_scheduler.load_records(out_file))
+        assert np.allclose([res.costs[0].value for res in results], [0.2])
+        # a new output file gets the default mode of new files
+        assert os.stat(out_file).st_mode & 0o777 == os.stat(log_a).st_mode & 0o777
+
+        # the mode of an existing output file is kept
+        os.chmod(out_file, 0o640)
+        auto_scheduler.measure_record.distill_record_file(log_b, out_file, n_parallel=2)
+        _, results = zip(*auto_scheduler.load_records(out_file))
+        assert np.allclose([res.costs[0].value for res in results], [0.1])
+        assert os.stat(out_file).st_mode & 0o777 == 0o640
+
+        auto_scheduler.measure_record.merge_record_files([log_a, log_a], out_file)
+        _, results = zip(*auto_scheduler.load_records(out_file))
+        assert np.allclose([res.costs[0].value for res in results], [0.2])
+
+
 def test_workload_dis_factor():
     calc = auto_scheduler.utils.calc_workload_dis_factor
     decode = auto_scheduler.utils.decode_workload_key
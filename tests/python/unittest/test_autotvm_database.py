@@ -116,6 +116,37 @@ def test_db_filter():
     assert len(records) == 2
 
 
+def test_sqlite_db(tmp_path):
+    logging.info("test sqlite db ...")
+    records = get_sample_records(5)
+    inps = [inp for inp, _ in records]
+    results = [res for _, res in records]
+    db_file = str(tmp_path / "records.db")
+
+    _db = database.SQLiteDatabase(db_file)
+    _db.save_batch(inps[:3], results[:3])
+    assert _db.load(inps[0]) == results[0]
+    assert _db.load_batch(inps) == results[:3] + [None, None]
+
+    # extend keeps all results, the latest one is loaded
+    res = MeasureResult(*(list(tuple(results[0]))[:-1] + [results[0].timestamp + 1]))
+    _db.save(inps[0], res, extend=True)
+    assert _db.load(inps[0]).timestamp == res.timestamp
+    assert len(_db.load(inps[0], get_all=True)) == 2
+    _db.save(inps[0], results[0])
+    assert _db.load(inps[0], get_all=True) == [results[0]]
+    _db.close()
+
+    # records persist and are filtered in bulk
+    _db = database.SQLiteDatabase(db_file)
+    partial_results, unsaved = database.filter_inputs(_db, inps)
+    assert partial_results == results[:3] + [None, None]
+    assert unsaved == inps[3:]
+    assert len(_db.filter(lambda inp, ress: True)) == 3
+    _db.flush()
+    assert _db.load(inps[0]) is None
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     test_save_load()
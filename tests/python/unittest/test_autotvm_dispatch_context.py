@@ -20,6 +20,8 @@ to the parameters of workload"""
 
 from tvm import autotvm
 import tvm
+from tvm.autotvm.measure import MeasureInput, MeasureResult
+from tvm.testing.autotvm import get_sample_task
 
 
 @autotvm.template("testing/dispatch_fallback")
@@ -47,5 +49,43 @@ def test_tophub_kinds_match():
     verify_arm_cpu("llvm -model=snapdragon835 -mtriple=arm64-linux-android -mattr=+neon")
 
 
+def test_tophub_mirror(tmpdir, monkeypatch):
+    tsk, target = get_sample_task()
+    inputs = [MeasureInput(target, tsk, tsk.config_space.get(i)) for i in range(3)]
+    results = [MeasureResult((i + 1,), 0, 0, 0) for i in range(3)]
+    results[1] = MeasureResult((0.5,), 0, 0, 0)
+
+    # a local directory replaces the TopHub repo
+    location = tmpdir.mkdir("location")
+    package = str(location / autotvm.tophub._package_name("llvm"))
+    autotvm.callback.log_to_file(package)(None, inputs, results)
+
+    mirror = str(tmpdir / "mirror")
+    stores = autotvm.tophub.build_mirror(mirror, ["llvm"], tophub_location=str(location))
+    assert len(stores) == 1
+
+    monkeypatch.setenv(autotvm.tophub.AUTOTVM_TOPHUB_LOC_VAR, "http://unreachable")
+    monkeypatch.setenv(autotvm.tophub.AUTOTVM_TOPHUB_MIRROR_VAR, mirror)
+    with autotvm.tophub.context(target) as ctx:
+        assert str(ctx.query(target, tsk.workload)) == str(inputs[1].config)
+
+    # extra files are merged with the mirrored packages
+    extra_file = str(tmpdir / "extra.log")
+    autotvm.callback.log_to_file(extra_file)(None, inputs[2:], [MeasureResult((0.1,), 0, 0, 0)])
+    with autotvm.tophub.context(target, extra_files=[extra_file]) as ctx:
+        assert str(ctx.query(target, tsk.workload)) == str(inputs[2].config)
+
+    # a package copied into a mirror by hand is indexed outside of the shared mirror
+    copied_mirror = tmpdir.mkdir("copied_mirror")
+    autotvm.callback.log_to_file(str(copied_mirror / autotvm.tophub._package_name("llvm")))(
+        None, inputs, results
+    )
+    monkeypatch.setattr(autotvm.tophub, "AUTOTVM_TOPHUB_ROOT_PATH", str(tmpdir / "root"))
+    monkeypatch.setenv(autotvm.tophub.AUTOTVM_TOPHUB_MIRROR_VAR, str(copied_mirror))
+    with autotvm.tophub.context(target) as ctx:
+        assert str(ctx.query(target, tsk.workload)) == str(inputs[1].config)
+    assert len(copied_mirror.listdir()) == 1
+
+
 if __name__ == "__main__":
     test_fallback()
@@ -52,6 +52,25 @@ def test_multi_filter():
     assert tuner.visited.issubset(valid_indexes)
 
 
+def test_pipeline_fallback():
+    """Droplet proposes batches from the results of the previous one, so it is not pipelined"""
+    task, _ = get_sample_task()
+    measure_option = autotvm.measure_option(builder=autotvm.LocalBuilder(), runner=DummyRunner())
+
+    measured = []
+    tuner = autotvm.tuner.DropletTuner(task)
+    assert not tuner.supports_pipelining
+    tuner.tune(
+        n_trial=8,
+        measure_option=measure_option,
+        callbacks=[lambda _, inputs, results: measured.extend(inputs)],
+        pipeline_depth=3,
+    )
+    assert 0 < len(measured) <= 8
+    assert measure_option["builder"].pipeline_depth == 1
+
+
 if __name__ == "__main__":
     test_tuner()
     test_multi_filter()
+    test_pipeline_fallback()
@@ -18,6 +18,8 @@
 
 from tvm.testing.autotvm import DummyRunner, get_sample_task
 from tvm import autotvm
+from tvm.autotvm.measure import MeasureInput, MeasureResult
+from tvm.contrib import utils
 
 
 def test_ga_tuner():
@@ -85,5 +87,58 @@ def test_ga_tuner():
     assert tuner.visited.issubset(valid_indexes)
 
 
+def test_ga_tuner_generation():
+    """Test that every generation of GATuner only has new valid configs"""
+    task, target = get_sample_task()
+    tuner = autotvm.tuner.GATuner(task, pop_size=8)
+    measured = set()
+    for _ in range(4):
+        configs = tuner.next_batch(tuner.pop_size)
+        points = [config.index for config in configs]
+        assert len(points) == tuner.pop_size == len(set(points))
+        assert not measured & set(points)
+        assert all(tuner.space.is_index_valid(x) for x in points)
+        measured.update(points)
+
+        inputs = [MeasureInput(target, task, config) for config in configs]
+        results = [MeasureResult((i + 1.0,), 0, 0, 0) for i in range(len(configs))]
+        tuner.update(inputs, results)
+
+
+def test_checkpoint_resume():
+    """Test resuming GATuner from a checkpoint"""
+    checkpoint = utils.tempdir().relpath("ga.ckpt")
+    measure_option = autotvm.measure_option(builder=autotvm.LocalBuilder(), runner=DummyRunner())
+
+    task, _ = get_sample_task()
+    measured = []
+    tuner = autotvm.tuner.GATuner(task, pop_size=16)
+    tuner.tune(
+        n_trial=32,
+        measure_option=measure_option,
+        callbacks=[lambda _, inputs, results: measured.extend(inputs)],
+        checkpoint_file=checkpoint,
+    )
+    first = set(inp.config.index for inp in measured)
+    assert len(measured) == 32
+
+    # a new tuner continues with the remaining trials and skips measured configs
+    task, _ = get_sample_task()
+    measured = []
+    resumed = autotvm.tuner.GATuner(task, pop_size=16)
+    resumed.tune(
+        n_trial=48,
+        measure_option=measure_option,
+        callbacks=[lambda _, inputs, results: measured.extend(inputs)],
+        resume_from=checkpoint,
+    )
+    assert len(measured) == 16
+    assert not first & set(inp.config.index for inp in measured)
+    assert resumed.visited.issuperset(first)
+    assert resumed.best_flops >= tuner.best_flops
+
+
 if __name__ == "__main__":
     test_ga_tuner()
+    test_ga_tuner_generation()
+    test_checkpoint_resume()
@@ -22,6 +22,7 @@
 # TODO: restore the file name after this issue is resolved.
 import os
 import copy
+import types
 import numpy as np
 import tvm
 from tvm import te
@@ -31,7 +32,8 @@ from tvm import autotvm
 from tvm import relay
 from tvm.autotvm.task import ConfigEntity
 from tvm.autotvm.measure import MeasureResult, MeasureInput
-from tvm.autotvm.graph_tuner import DPTuner, PBQPTuner
+from tvm.autotvm.graph_tuner import DPTuner, PBQPTuner, LayoutTransformDatabase
+from tvm.autotvm.graph_tuner.dynamic_programming_stage import DPStage
 
 
 def _create_args(dshape, kshape, strides, padding, dilation, layout, out_layout, dtype, out_dtype):
@@ -231,6 +233,57 @@ def test_graph_tuner_layout_transform_runner():
         )
 
 
+def test_layout_transform_database(tmp_path):
+    log_file = "%s/test_tuner.log" % (os.getcwd())
+    db_file = str(tmp_path / "layout_transform.db")
+    target = "llvm"
+    dshape = (1, 3, 8, 8)
+    dtype = "float32"
+    layout = "NCHW"
+    conv2d = relay.op.get("nn.conv2d")
+    target_ops = [conv2d]
+
+    g, records, ltf_records, ltf_keys, _ = _create_data(target, dshape, dtype, layout)
+    layout_db = LayoutTransformDatabase(db_file)
+    saved_costs = {}
+    for i, ltf_wkl in enumerate(ltf_keys):
+        saved_costs[ltf_wkl] = 1e-5 * (i + 1)
+        ltf_task = autotvm.task.create("layout_transform", list(ltf_wkl[1:]), target)
+        ms_input = MeasureInput(target=target, task=ltf_task, config=ltf_task.config_space.get(0))
+        ms_output = MeasureResult(
+            costs=(saved_costs[ltf_wkl],), error_no=0, all_cost=-1, timestamp=-1
+        )
+        layout_db.save(ltf_wkl, (ms_input, ms_output))
+    assert layout_db.load(target, ltf_keys[0])[1].costs[0] == 1e-5
+    assert layout_db.interpolate(target, ltf_keys[0]) is None
+    layout_db.close()
+
+    # saved timings are reused instead of being inferred or benchmarked
+    for db_path in [db_file, tmp_path / "layout_transform.db"]:
+        executor = DPTuner(
+            g, {"data": dshape}, records, target_ops, target=target, log_file=log_file
+        )
+        executor.benchmark_layout_transform(
+            layout_records=ltf_records, infer_layout=True, layout_db=db_path
+        )
+        out = executor._layout_transform_perf_records
+        for ltf_wkl in out:
+            if ltf_wkl in saved_costs:
+                assert out[ltf_wkl][1].costs[0] == saved_costs[ltf_wkl]
+
+    # timings of the same layout pair are interpolated by the number of elements
+    layout_db = LayoutTransformDatabase(db_file)
+    ltf_task = autotvm.task.create("layout_transform", list(ltf_keys[0][1:]), target)
+    for n in [2, 4, 8]:
+        ltf_wkl = ("layout_transform", ("TENSOR", (n, 4, 8, 8, 4), dtype), "NCHW4c", "NCHW8c")
+        ms_input = MeasureInput(target=target, task=ltf_task, config=ltf_task.config_space.get(0))
+        ms_output = MeasureResult(costs=(1e-5 * n,), error_no=0, all_cost=-1, timestamp=-1)
+        layout_db.save(ltf_wkl, (ms_input, ms_output))
+    ltf_wkl = ("layout_transform", ("TENSOR", (16, 4, 8, 8, 4), dtype), "NCHW4c", "NCHW8c")
+    assert abs(layout_db.interpolate(target, ltf_wkl) - 1.6e-4) < 1e-9
+    layout_db.close()
+
+
 def test_DPTuner_run():
     log_file = "%s/test_tuner.log" % (os.getcwd())
     target = "llvm"
@@ -776,6 +829,40 @@ def test_triangle_block():
     )
 
 
+def test_DPStage_min_sum_states():
+    """Compare the node elimination of the output nodes with the search over all
+    combinations of their schedules, which the backward pass used before"""
+    rng = np.random.RandomState(0)
+
+    def _create_stages(num_outputs, num_deps, num_deps_per_output, max_candidates):
+        node_list = [
+            {"record_candidates": [None] * rng.randint(1, max_candidates + 1)}
+            for _ in range(num_outputs + num_deps)
+        ]
+        stage_dict = {}
+        for idx in range(num_outputs):
+            dep = rng.choice(np.arange(num_outputs, num_outputs + num_deps), num_deps_per_output)
+            dep = sorted(set(dep.tolist()))
+            shape = [len(node_list[x]["record_candidates"]) for x in [idx] + dep]
+            stage_dict[idx] = types.SimpleNamespace(dep=dep, states=rng.rand(*shape))
+        return list(range(num_outputs)), stage_dict, node_list
+
+    # the last graph has more output nodes than the 16 the backward pass used to support
+    for args in [(1, 0, 0, 3), (4, 3, 2, 3), (5, 2, 1, 3), (18, 2, 2, 2)]:
+        output_idx_list, stage_dict, node_list = _create_stages(*args)
+        states_list, aligned_node_list = DPStage.align_states(
+            output_idx_list, stage_dict, node_list
+        )
+        total_time = sum(states[3] for states in states_list)
+        min_pos = np.unravel_index(np.argmin(total_time), total_time.shape)
+        expected = {idx: int(pos) for idx, pos in zip(aligned_node_list, min_pos)}
+
+        num_states = []
+        out = DPStage.min_sum_states(output_idx_list, stage_dict, num_states.append)
+        assert out == expected, "Output mismatch: expecting %s but got %s" % (expected, out)
+        assert max(num_states) <= total_time.size
+
+
 if __name__ == "__main__":
     test_graph_tuner_layout_transform()
     test_DPTuner_run()
@@ -783,3 +870,4 @@ if __name__ == "__main__":
     test_many_sub_graphs()
     test_tuple()
     test_triangle_block()
+    test_DPStage_min_sum_states()
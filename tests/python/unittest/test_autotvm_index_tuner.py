@@ -125,7 +125,29 @@ def test_random_tuner():
         assert 8 <= idx <= 15
 
 
+def test_pipelined_tune():
+    """Test tuning with several measurement batches in flight"""
+
+    task, _ = get_sample_task()
+    measure_option = autotvm.measure_option(
+        builder=autotvm.LocalBuilder(n_parallel=2), runner=DummyRunner()
+    )
+
+    measured = []
+    tuner = autotvm.tuner.RandomTuner(task, range_idx=(8, 15))
+    tuner.tune(
+        n_trial=8,
+        measure_option=measure_option,
+        callbacks=[lambda _, inputs, results: measured.extend(inputs)],
+        pipeline_depth=3,
+    )
+    assert len(measured) == 8
+    assert len(set(inp.config.index for inp in measured)) == 8
+    assert not tuner.has_next()
+
+
 if __name__ == "__main__":
     test_grid_search_tuner()
     test_grid_search_tuner_spawn()
     test_random_tuner()
+    test_pipelined_tune()
@@ -15,6 +15,7 @@
 # specific language governing permissions and limitations
 # under the License.
 """Test builder and runner"""
+import contextlib
 import logging
 import multiprocessing
 import concurrent
@@ -86,9 +87,136 @@ def test_task_runner_with_ref_input():
     assert runner.executor.ran_dummy_executor
 
 
+def test_local_builder_dedup():
+    """test that structurally identical configs are built and measured once"""
+    task, target = get_sample_task()
+    builder = autotvm.LocalBuilder(dedup=True)
+    builder.set_task(task)
+
+    config = task.config_space.get(3)
+    inputs = [autotvm.MeasureInput(target, task, config) for _ in range(2)]
+    build_results = builder.build(inputs)
+    assert build_results[0].error is None
+    assert build_results[0].filename == build_results[1].filename
+
+    results = DummyRunner().run(inputs, build_results)
+    builder.update(inputs, results)
+
+    # A later duplicate reuses the measurement result without building
+    build_results = builder.build(inputs[:1])
+    assert isinstance(build_results[0], MeasureResult)
+    assert build_results[0].costs == results[0].costs
+    assert build_results[0].reused and build_results[0].all_cost == 0
+
+
+def test_adaptive_measurement():
+    """test that adaptive measurement skips the repeats of dominated candidates"""
+    task, target = get_sample_task()
+    inp = autotvm.MeasureInput(target, task, task.config_space.get(0))
+    build_result = measure.measure_methods.BuildResult("", ((1,), "float32"), None, 0.0)
+
+    class FakeModule:
+        entry_name = "default_function"
+
+        def __init__(self, cost):
+            self.cost = cost
+            self.repeats = 0
+
+        def time_evaluator(self, name, dev, number, repeat, min_repeat_ms, f_preproc):
+            self.repeats += repeat
+            results = [self.cost] * repeat
+            return lambda *args: type("ProfileResult", (), {"results": results})
+
+    class FakeRemote:
+        def device(self, *args):
+            return tvm.cpu(0)
+
+    def make_loader(mod):
+        @contextlib.contextmanager
+        def loader(remote_kwargs, build_result):
+            yield FakeRemote(), mod
+
+        return loader
+
+    def run(mod, best_cost):
+        return measure.measure_methods.run_through_rpc(
+            inp,
+            build_result,
+            1,
+            5,
+            0,
+            0,
+            {},
+            [np.zeros((1,), "float32")],
+            module_loader=make_loader(mod),
+            best_cost=best_cost,
+            abort_ratio=10,
+        )
+
+    mod = FakeModule(1.0)
+    res = run(mod, 0.01)
+    assert res.repeats == 1 and mod.repeats == 1
+
+    mod = FakeModule(1.0)
+    res = run(mod, 0.5)
+    assert res.repeats == 5 and mod.repeats == 5
+    assert res.costs == (1.0, 1.0, 1.0)
+
+
+def test_runner_best_cost_from_tuner():
+    """Test that the runner compares candidates with the best cost of the tuner"""
+
+    class _Runner(DummyRunner):
+        def __init__(self):
+            super(_Runner, self).__init__()
+            self.seen = []
+
+        def run(self, measure_inputs, build_results):
+            self.seen.append(self.best_cost)
+            return super(_Runner, self).run(measure_inputs, build_results)
+
+    runner = _Runner()
+    measure_option = autotvm.measure_option(builder=autotvm.LocalBuilder(), runner=runner)
+    task, _ = get_sample_task()
+    tuner = autotvm.tuner.RandomTuner(task)
+
+    tuner.tune(n_trial=4, measure_option=measure_option)
+    assert runner.seen[0] is None
+    best_cost = np.mean(tuner.best_measure_pair[1].costs)
+    assert runner.best_cost == best_cost
+
+    # set_task resets the runner, but the tuner passes in the best cost it has found
+    runner.seen = []
+    tuner.tune(n_trial=4, measure_option=measure_option)
+    assert runner.seen[0] == best_cost
+
+
+def test_local_runner_warm_worker():
+    """test measuring configs of a task in a pinned warm worker that is recycled"""
+    task, target = get_sample_task()
+    runner = measure.LocalRunner(warm_worker=True, warm_worker_max_uses=2, worker_cores=[0])
+    measure_option = autotvm.measure_option(builder=autotvm.LocalBuilder(), runner=runner)
+
+    results = []
+    tuner = autotvm.tuner.RandomTuner(task)
+    tuner.tune(
+        n_trial=4,
+        measure_option=measure_option,
+        callbacks=[lambda _, inputs, res: results.extend(res)],
+    )
+    assert runner._local_rpc is None
+    assert runner.executor is runner._warm_executor
+    assert len(results) == 4
+    assert all(res.error_no == MeasureErrorNo.NO_ERROR for res in results)
+
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
 
     test_task_tuner_without_measurement()
     test_task_tuner_without_measurement_spawn()
     test_task_runner_with_ref_input()
+    test_local_builder_dedup()
+    test_adaptive_measurement()
+    test_runner_best_cost_from_tuner()
+    test_local_runner_warm_worker()
@@ -19,6 +19,8 @@ from io import StringIO
 from os import PathLike
 import time
 
+import pytest
+
 from tvm.contrib import utils
 
 from tvm import autotvm
@@ -36,7 +38,7 @@ def test_load_dump():
         (2.0, 2.23, 0.23, 0.123, 0.234, 0.123), MeasureErrorNo.NO_ERROR, 2.3, time.time()
     )
 
-    for protocol in ["json", "pickle"]:
+    for protocol in ["json", "pickle", "binary"]:
         row = encode(inp, result, protocol=protocol)
         inp_2, result_2 = decode(row, protocol=protocol)
 
@@ -47,6 +49,13 @@ def test_load_dump():
         assert result.costs == result_2.costs
         assert result.error_no == result_2.error_no
         assert result.timestamp == result_2.timestamp
+        assert not result_2.reused
+
+    # the marker of results reused from structurally identical configs is kept
+    reused = MeasureResult(result.costs, result.error_no, 0.0, time.time(), reused=True)
+    for protocol in ["json", "pickle", "binary"]:
+        _, result_2 = decode(encode(inp, reused, protocol=protocol), protocol=protocol)
+        assert result_2.reused and result_2.costs == reused.costs
 
 
 def test_file_io():
@@ -72,6 +81,12 @@ def test_file_io():
     for x, y in zip(ref, autotvm.record.load_from_file(file_path)):
         assert x[1] == y[1]
 
+    # Parallel loading keeps the file order
+    ref = zip(inputs, results)
+    for x, y in zip(ref, autotvm.record.load_from_file(file_path, workers=2, chunk_size=3)):
+        assert x[1] == y[1]
+        assert measure_str_key(x[0]) == measure_str_key(y[0])
+
     # Confirm functionality of multiple file loads
     hist_best = ApplyHistoryBest([file_path, file_path])
     x = hist_best.query(target, tsk.workload)
@@ -100,6 +115,10 @@ def test_apply_history_best(tmpdir):
     hist_best = ApplyHistoryBest(str(filepath_batch_1))
     assert str(hist_best.query(target, tsk.workload)) == best
 
+    # Parse the log in worker processes
+    hist_best = ApplyHistoryBest(filepath_batch_1, workers=2)
+    assert str(hist_best.query(target, tsk.workload)) == best
+
     # Write data into StringIO buffer
     stringio_batch_1 = StringIO()
     assert isinstance(filepath_batch_1, PathLike)
@@ -157,6 +176,125 @@ def test_apply_history_best_multiple_batches(tmpdir):
     assert str(hist_best.query(target, tsk.workload)) == best
 
 
+def test_binary_file_io(tmpdir):
+    tsk, target = get_sample_task()
+    best = str(tsk.config_space.get(2))
+
+    inputs = [MeasureInput(target, tsk, tsk.config_space.get(i)) for i in range(4)]
+    results = [MeasureResult((i + 1,), 0, 0, 0) for i in range(4)]
+    results[2] = MeasureResult((0.5,), 0, 0, 0)
+    results[3] = MeasureResult((0.1,), MeasureErrorNo.RUNTIME_DEVICE, 0, 0)
+
+    file_path = str(tmpdir / "records.bin")
+    cb = autotvm.callback.log_to_file(file_path, protocol="binary")
+    cb(None, inputs[:2], results[:2])
+    cb(None, inputs[2:], results[2:])
+    assert autotvm.record.is_binary_record_file(file_path)
+
+    for x, y in zip(results, autotvm.record.load_from_file(file_path)):
+        assert x.costs == y[1].costs or x.error_no != 0
+
+    # The best record is found through the sidecar index
+    index = autotvm.record.BinaryRecordIndex(file_path)
+    assert len(index.best_offsets()) == 1
+    assert str(index.read(index.best_offsets()[0])[0].config) == best
+    hist_best = ApplyHistoryBest(file_path)
+    assert str(hist_best.query(target, tsk.workload)) == best
+
+    # Records appended without updating the index are indexed on load
+    with open(file_path, "ab") as fo:
+        row = encode(inputs[0], MeasureResult((0.2,), 0, 0, 0), protocol="binary")
+        fo.write(len(row).to_bytes(4, "little") + row)
+    hist_best = ApplyHistoryBest(file_path)
+    assert str(hist_best.query(target, tsk.workload)) == str(inputs[0].config)
+
+    # Convert to json and back
+    json_path = str(tmpdir / "records.log")
+    autotvm.record.convert_log(file_path, json_path)
+    assert not autotvm.record.is_binary_record_file(json_path)
+    assert len(list(autotvm.record.load_from_file(json_path))) == 5
+    bin_path = str(tmpdir / "records_2.bin")
+    autotvm.record.convert_log(json_path, bin_path)
+    hist_best = ApplyHistoryBest(bin_path)
+    assert str(hist_best.query(target, tsk.workload)) == str(inputs[0].config)
+
+
+def test_pick_best_split_merge(tmpdir):
+    tsk, target = get_sample_task()
+    inputs = [MeasureInput(target, tsk, tsk.config_space.get(i)) for i in range(4)]
+    results = [MeasureResult((i + 1,), 0, 0, 0) for i in range(4)]
+
+    log_a, log_b = str(tmpdir / "a.log"), str(tmpdir / "b.log")
+    autotvm.callback.log_to_file(log_a)(None, inputs, results)
+    autotvm.callback.log_to_file(log_b)(None, inputs[2:], [MeasureResult((0.5,), 0, 0, 0)] * 2)
+
+    # the best record of both files
+    best_log = str(tmpdir / "best.log")
+    autotvm.record.pick_best([log_a, log_b], best_log)
+    best = list(autotvm.record.load_from_file(best_log))
+    assert len(best) == 1
+    assert str(best[0][0].config) == str(inputs[2].config)
+    assert best[0][1].costs == (0.5,)
+    autotvm.record.pick_best([log_a, log_b], best_log, workers=2)
+    best = list(autotvm.record.load_from_file(best_log))
+    assert [str(inp.config) for inp, _ in best] == [str(inputs[2].config)]
+
+    # duplicated records are deleted, even when sorted in several runs
+    out_files = autotvm.record.split_workload([log_a, log_b], max_memory=1024)
+    assert out_files == [log_a + ".000.wkl"]
+    assert len(list(autotvm.record.load_from_file(out_files[0]))) == 4
+    out_files = autotvm.record.split_workload([log_a, log_b], clean=False, max_memory=1024)
+    assert len(list(autotvm.record.load_from_file(out_files[0]))) == 6
+
+    merged_log = str(tmpdir / "merged.log")
+    autotvm.record.merge_logs([log_a, log_b], merged_log, max_memory=1024)
+    merged = list(autotvm.record.load_from_file(merged_log))
+    assert sorted(str(inp.config) for inp, _ in merged) == sorted(str(x.config) for x in inputs)
+
+
+def test_apply_history_best_lazy(tmpdir):
+    tsk, target = get_sample_task()
+    best = str(tsk.config_space.get(2))
+
+    inputs = [MeasureInput(target, tsk, tsk.config_space.get(i)) for i in range(3)]
+    results = [MeasureResult((i,), 0, 0, 0) for i in range(1, 3)]
+    results.append(MeasureResult((0.5,), 0, 2.3, 0))
+
+    filepath = str(tmpdir / "records.log")
+    with open(filepath, "w") as file:
+        autotvm.callback.log_to_file(file)(None, inputs, results)
+
+    store = str(tmpdir / "records.sqlite")
+    hist_best = autotvm.apply_history_best_lazy(filepath, store=store)
+    assert str(hist_best.query(target, tsk.workload)) == best
+
+    # Records appended later are ingested by the next context sharing the store
+    with open(filepath, "a") as file:
+        autotvm.callback.log_to_file(file)(None, inputs[:1], [MeasureResult((0.1,), 0, 0, 0)])
+    hist_best = autotvm.apply_history_best_lazy(filepath, store=store)
+    assert str(hist_best.query(target, tsk.workload)) == str(inputs[0].config)
+
+    # A rewritten log file rebuilds the store
+    with open(filepath, "w") as file:
+        autotvm.callback.log_to_file(file)(None, inputs[1:2], results[1:2])
+    hist_best = autotvm.apply_history_best_lazy(filepath, store=store)
+    assert str(hist_best.query(target, tsk.workload)) == str(inputs[1].config)
+    hist_best.close()
+
+    # So does a log file rewritten to a larger size
+    with open(filepath, "w") as file:
+        autotvm.callback.log_to_file(file)(None, inputs * 2, results * 2)
+    hist_best = autotvm.apply_history_best_lazy(filepath, store=store)
+    assert str(hist_best.query(target, tsk.workload)) == best
+    hist_best.close()
+
+    # Records are written to the store in batches
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(autotvm.apply_history_best_lazy, "SYNC_BATCH_SIZE", 2)
+        hist_best = autotvm.apply_history_best_lazy(filepath, store=str(tmpdir / "batch.sqlite"))
+        assert str(hist_best.query(target, tsk.workload)) == best
+
+
 if __name__ == "__main__":
     test_load_dump()
     test_apply_history_best()
@@ -0,0 +1,71 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Test the simulated annealing model optimizer"""
+
+import numpy as np
+
+from tvm.testing.autotvm import get_sample_task
+from tvm.autotvm.tuner.sa_model_optimizer import SimulatedAnnealingOptimizer
+
+
+class _IndexModel:
+    """A cost model whose score is a fixed function of the config index"""
+
+    def __init__(self, offset=0):
+        self.offset = offset
+
+    def predict(self, points):
+        return np.asarray(points, dtype="float64") - self.offset
+
+
+def test_find_maximums():
+    """Test finding the best points of the whole space"""
+    task, _ = get_sample_task()
+    space = task.config_space
+    assert len(space) == 64
+
+    # every point starts a chain, so the whole space is scored
+    optimizer = SimulatedAnnealingOptimizer(
+        task, n_iter=10, persistent=False, parallel_size=len(space)
+    )
+    exclusive = {63, 60, 10}
+    maximums = optimizer.find_maximums(_IndexModel(), 8, exclusive)
+    expected = [x for x in range(63, -1, -1) if x not in exclusive][:8]
+    assert maximums == expected
+
+    # points with negative scores are not returned
+    maximums = optimizer.find_maximums(_IndexModel(offset=60), 8, set())
+    assert maximums == [63, 62, 61, 60]
+
+
+def test_find_maximums_random_walk():
+    """Test that the chains only return distinct points that are not excluded"""
+    task, _ = get_sample_task()
+    optimizer = SimulatedAnnealingOptimizer(task, n_iter=50, parallel_size=8, early_stop=None)
+    exclusive = set(range(0, 64, 3))
+    for _ in range(2):
+        maximums = optimizer.find_maximums(_IndexModel(), 8, exclusive)
+        assert len(maximums) == len(set(maximums)) == 8
+        assert not exclusive.intersection(maximums)
+        assert all(task.config_space.is_index_valid(x) for x in maximums)
+        # the persistent chains continue from the last points
+        exclusive.update(maximums)
+
+
+if __name__ == "__main__":
+    test_find_maximums()
+    test_find_maximums_random_walk()
@@ -16,6 +16,8 @@
 # under the License.
 """Test space definition primitives"""
 
+import numpy as np
+
 from tvm import te
 from tvm.autotvm.task.space import ConfigSpace, FallbackConfigEntity
 
@@ -257,7 +259,29 @@ def test_filter_and_multi_filter():
     assert cfg.range_length == 48
 
 
+def test_batch_operations():
+    cfg = ConfigSpace()
+    gemm_func(cfg, 128)
+    cfg.multi_filter(
+        filter=lambda entity: 32 <= (entity["tile_x"].size[1] * entity["tile_y"].size[1]) < 1024
+    )
+
+    points = np.arange(cfg.range_length)
+    knobs = cfg.points2knobs(points)
+    assert knobs.tolist() == [cfg.point2knob(p) for p in points]
+    assert cfg.knobs2points(knobs).tolist() == points.tolist()
+
+    valid = cfg.batch_is_valid(points)
+    assert valid.tolist() == [cfg.is_index_valid(p) for p in points]
+
+    points = points[valid]
+    new_points = cfg.batch_random_walk(points)
+    assert (new_points != points).all()
+    assert cfg.batch_is_valid(new_points).all()
+
+
 if __name__ == "__main__":
     test_split()
     test_multi_filter()
     test_filter_and_multi_filter()
+    test_batch_operations()
@@ -0,0 +1,92 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+"""Test the task scheduler of AutoTVM"""
+
+from tvm.testing.autotvm import DummyRunner, get_sample_task
+from tvm import autotvm
+
+
+def test_task_scheduler():
+    """Test allocating trials to several tasks"""
+    measure_option = autotvm.measure_option(builder=autotvm.LocalBuilder(), runner=DummyRunner())
+
+    for strategy in ["round-robin", "gradient"]:
+        tasks = [get_sample_task(n)[0] for n in (32, 64, 128)]
+        tuners = [autotvm.tuner.RandomTuner(task) for task in tasks]
+        measured = {}
+
+        def _callback(_, inputs, results):
+            for inp in inputs:
+                measured.setdefault(inp.task.args, []).append(inp.config.index)
+
+        scheduler = autotvm.tuner.TaskScheduler(tasks, tuners, strategy=strategy)
+        scheduler.tune(
+            n_trial=48,
+            measure_option=measure_option,
+            num_measures_per_round=8,
+            callbacks=[_callback],
+        )
+        assert scheduler.ct == sum(len(x) for x in measured.values()) >= 48
+        # every task is warmed up and measures distinct configs
+        assert all(ct > 0 for ct in scheduler.task_cts)
+        assert all(len(set(x)) == len(x) for x in measured.values())
+        assert all(cost < 1e9 for cost in scheduler.best_costs)
+
+
+def test_task_scheduler_early_stopping():
+    """Test stopping a task that does not improve"""
+    measure_option = autotvm.measure_option(builder=autotvm.LocalBuilder(), runner=DummyRunner())
+
+    tasks = [get_sample_task(n)[0] for n in (32, 64)]
+    tuners = [autotvm.tuner.GridSearchTuner(task) for task in tasks]
+    scheduler = autotvm.tuner.TaskScheduler(tasks, tuners)
+    scheduler.tune(
+        n_trial=1000,
+        measure_option=measure_option,
+        num_measures_per_round=8,
+        per_task_early_stopping=8,
+    )
+    assert scheduler.dead_tasks == {0, 1}
+    assert scheduler.ct < 1000
+
+
+def test_task_scheduler_close_runner():
+    """Test releasing the resources of the runner after tuning"""
+
+    class _Runner(DummyRunner):
+        def __init__(self):
+            super(_Runner, self).__init__()
+            self.n_closed = 0
+
+        def close(self):
+            self.n_closed += 1
+
+    runner = _Runner()
+    measure_option = autotvm.measure_option(builder=autotvm.LocalBuilder(), runner=runner)
+
+    tasks = [get_sample_task(n)[0] for n in (32, 64)]
+    tuners = [autotvm.tuner.RandomTuner(task) for task in tasks]
+    scheduler = autotvm.tuner.TaskScheduler(tasks, tuners)
+    scheduler.tune(n_trial=32, measure_option=measure_option, num_measures_per_round=8)
+    # the runner is kept open across the rounds and closed once at the end
+    assert runner.n_closed == 1
+
+
+if __name__ == "__main__":
+    test_task_scheduler()
+    test_task_scheduler_early_stopping()
+    test_task_scheduler_close_runner()
@@ -23,9 +23,11 @@ import tvm
 from tvm import te
 from tvm import autotvm
 from tvm.autotvm import MeasureInput, MeasureResult
+from tvm.autotvm.tuner import ModelStore
+from tvm.autotvm.tuner.model_based_tuner import FeatureCache
 from tvm.autotvm.tuner.xgboost_cost_model import XGBoostCostModel
 
-from tvm.testing.autotvm import get_sample_task, get_sample_records
+from tvm.testing.autotvm import DummyRunner, get_sample_task, get_sample_records
 
 
 def test_fit():
@@ -48,6 +50,104 @@ def test_fit():
     upper_model.predict(np.ones(8))
 
 
+def test_fit_incremental():
+    task, target = get_sample_task()
+
+    # a drift threshold of 1 never refits because of drift
+    model = XGBoostCostModel(
+        task,
+        feature_type="knob",
+        loss_type="rank",
+        incremental=True,
+        refit_interval=2,
+        drift_threshold=1.0,
+    )
+
+    xs = np.arange(32)
+    ys = np.random.rand(32)
+    model.fit(xs, ys, plan_size=16)
+    assert model._fea_size == 32
+    assert model._incremental_ct == 0
+
+    # two incremental fits continue boosting the model, then the third one refits it
+    n_rounds = model.bst.num_boosted_rounds()
+    for i, incremental_ct in enumerate([1, 2, 0]):
+        xs = np.arange(32 + 16 * (i + 1))
+        ys = np.concatenate([ys, np.random.rand(16)])
+        model.fit(xs, ys, plan_size=16)
+        assert model._fea_size == len(xs)
+        assert model._incremental_ct == incremental_ct
+        if incremental_ct:
+            assert model.bst.num_boosted_rounds() > n_rounds
+            n_rounds = model.bst.num_boosted_rounds()
+        np.testing.assert_equal(model._fea_index[: len(xs)], xs)
+
+    model.predict(np.arange(8))
+
+
+def test_feature_cache(tmp_path):
+    cache = FeatureCache(max_bytes=1024, spill_dir=str(tmp_path), name="task")
+    fea_cache = cache.get("itervar")
+    for i in range(32):
+        fea_cache[i] = np.arange(16, dtype=np.float32) + i
+    fea_cache[32] = None
+
+    # least recently used features are evicted from memory but stay reusable
+    assert cache._nbytes <= 1024
+    assert cache.size("itervar") < 33
+    assert 0 in fea_cache
+    np.testing.assert_equal(fea_cache[0], np.arange(16))
+    assert fea_cache[32] is None
+
+    # features are reused by a new cache of the same task
+    cache.clear("itervar")
+    restored = FeatureCache(max_bytes=1024, spill_dir=str(tmp_path), name="task").get("itervar")
+    assert all(i in restored for i in range(33))
+    np.testing.assert_equal(restored[31], np.arange(16) + 31)
+    assert 33 not in restored
+
+
+def test_model_store(tmp_path):
+    task, target = get_sample_task()
+    store = ModelStore(str(tmp_path))
+
+    model = XGBoostCostModel(task, feature_type="itervar", loss_type="reg")
+    assert not store.save(model)
+    model.fit(np.arange(32), np.random.rand(32), plan_size=16)
+    assert store.save(model)
+
+    assert len(store.query(task, "itervar", "reg")) == 1
+    assert not store.query(task, "curve", "reg")
+
+    # a new task of the same template is warm-started with the stored model
+    upper_model = XGBoostCostModel(task, feature_type="itervar", loss_type="reg")
+    base_model = store.warm_start(upper_model)
+    assert base_model is not None
+    assert upper_model.base_model is base_model
+    upper_model.fit(np.arange(8), np.random.rand(8), plan_size=16)
+    upper_model.predict(np.arange(12))
+
+
+def test_tuner_model_store(tmp_path):
+    task, target = get_sample_task()
+    measure_option = autotvm.measure_option(builder=autotvm.LocalBuilder(), runner=DummyRunner())
+    tuner = autotvm.tuner.XGBTuner(
+        task, plan_size=8, feature_type="knob", model_store=str(tmp_path)
+    )
+
+    tuner.tune(n_trial=16, measure_option=measure_option)
+    entries = tuner.model_store.query(task, "knob", "reg")
+    assert len(entries) == 1
+    n_samples = entries[0][2]["n_samples"]
+
+    # the saves of a tuner tuned in rounds are throttled
+    tuner.tune(n_trial=16, measure_option=measure_option)
+    assert tuner.model_store.query(task, "knob", "reg")[0][2]["n_samples"] == n_samples
+    assert tuner.save_model()
+    assert tuner.model_store.query(task, "knob", "reg")[0][2]["n_samples"] > n_samples
+    assert not tuner.save_model()
+
+
 def fit_spawn():
     assert multiprocessing.get_start_method(False) == "spawn"
     test_fit()
@@ -93,6 +193,7 @@ def test_update():
 
 if __name__ == "__main__":
     test_fit()
+    test_fit_incremental()
     test_fit_spawn()
     test_tuner()
     test_update()